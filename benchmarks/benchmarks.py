@@ -0,0 +1,304 @@
+'''
+Performance benchmarks in the layout of airspeed velocity (asv): classes with a setup, time_* methods timed and
+peakmem_* methods measured for their peak memory, parametrised by params / param_names. timeraw_* methods return code
+which is timed in a fresh interpreter. They run offline without asv
+via benchmarks/run.py.
+'''
+import os
+import tempfile
+import threading
+
+import numpy as np
+import srrp
+
+GAMMA = 5 / 3
+
+
+def lorentzToSpeed(lorentz):
+    return np.sqrt(1 - 1 / lorentz ** 2)
+
+
+# One Riemann problem per wave pattern (left state, right state)
+PATTERNS = {
+    'SS': (srrp.State(rho=1, vx=0.5, vt=0, pressure=1), srrp.State(rho=1, vx=-0.5, vt=0, pressure=1)),
+    'RS': (srrp.State(rho=1, vx=0.5, vt=0, pressure=1), srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1)),
+    'RR': (srrp.State(rho=1, vx=-0.5, vt=0, pressure=1), srrp.State(rho=1, vx=0.5, vt=0, pressure=1)),
+    'RR*': (srrp.State(rho=0.01, vx=-0.9, vt=0.3, pressure=1), srrp.State(rho=0.02, vx=0.9, vt=0.4, pressure=1)),
+}
+
+
+def ponsTable():
+    '''
+    The Riemann problems of Pons et al. (2000) - Table 1, see tests/integration/pons2000.py
+    '''
+    return [(srrp.State(rho=1, vx=0, vt=vtL, pressure=1e3), srrp.State(rho=1, vx=0, vt=vtR, pressure=1e-2))
+            for vtL in [0, 0.9, 0.99] for vtR in [0, 0.9, 0.99]]
+
+
+def copyState(state):
+    return srrp.State(state.rho, state.vx, state.vt, state.pressure)
+
+
+class Import:
+    # time budget in seconds (see run.py), the core of srrp only needs numpy
+    budget = 0.5
+
+    def timeraw_import(self):
+        return 'import srrp'
+
+    def timeraw_import_solve(self):
+        return """
+import srrp
+srrp.Solver().solve(srrp.State(1, 0.5, 0, 1), srrp.State(0.125, 0, 0, 0.1), 5 / 3).getState([0.])
+"""
+
+
+class SolvePattern:
+    params = list(PATTERNS)
+    param_names = ['pattern']
+
+    def setup(self, pattern):
+        self.stateL, self.stateR = PATTERNS[pattern]
+        solver = srrp.Solver()
+        solver.solve(copyState(self.stateL), copyState(self.stateR), GAMMA)
+        assert solver.solution_type == pattern
+
+    def time_solve(self, pattern):
+        srrp.Solver().solve(copyState(self.stateL), copyState(self.stateR), GAMMA)
+
+    def time_solve_star(self, pattern):
+        srrp.Solver().solve_star(copyState(self.stateL), copyState(self.stateR), GAMMA)
+
+    def time_solve_star_numpy(self, pattern):
+        srrp.Solver(backend='numpy').solve_star(copyState(self.stateL), copyState(self.stateR), GAMMA)
+
+    def time_solve_star_kernels(self, pattern):
+        srrp.Solver(backend='kernels').solve_star(copyState(self.stateL), copyState(self.stateR), GAMMA)
+
+
+class SolveLorentz:
+    '''
+    Shock tube with tangential flow at extreme Lorentz factors, in the left or in both states
+    '''
+    params = ([1, 1e2, 1e4], ['left', 'both'])
+    param_names = ['lorentz', 'tangential']
+
+    def setup(self, lorentz, tangential):
+        vt = lorentzToSpeed(lorentz)
+        self.stateL = srrp.State(rho=1, vx=0, vt=vt, pressure=1e3)
+        self.stateR = srrp.State(rho=1, vx=0, vt=vt if tangential == 'both' else 0, pressure=1e-2)
+
+    def time_solve(self, lorentz, tangential):
+        srrp.Solver().solve(copyState(self.stateL), copyState(self.stateR), GAMMA)
+
+
+class SolvePons:
+    def setup(self):
+        self.problems = ponsTable()
+
+    def time_solve_table(self):
+        for stateL, stateR in self.problems:
+            srrp.Solver().solve(copyState(stateL), copyState(stateR), GAMMA)
+
+    def time_solve_many_table(self):
+        statesL = srrp.StateArray.fromStates([stateL for stateL, _ in self.problems])
+        statesR = srrp.StateArray.fromStates([stateR for _, stateR in self.problems])
+        srrp.Solver().solve_many(statesL, statesR, GAMMA)
+
+
+class SolveMany:
+    '''
+    Batches of random Riemann problems, covering all wave patterns
+    '''
+    params = [10 ** 2, 10 ** 4]
+    param_names = ['size']
+
+    def setup(self, size):
+        random = np.random.RandomState(42)
+        speed = random.uniform(0, 0.9, (2, size))
+        angle = random.uniform(0, 2 * np.pi, (2, size))
+        rho = 10 ** random.uniform(-2, 2, (2, size))
+        pressure = 10 ** random.uniform(-2, 3, (2, size))
+        self.statesL, self.statesR = [
+            srrp.StateArray(rho=rho[i], vx=speed[i] * np.cos(angle[i]), vt=speed[i] * np.sin(angle[i]),
+                            pressure=pressure[i]) for i in range(2)]
+
+    def time_solve_many(self, size):
+        srrp.Solver().solve_many(self.statesL, self.statesR, GAMMA)
+
+    def peakmem_solve_many(self, size):
+        srrp.Solver().solve_many(self.statesL, self.statesR, GAMMA)
+
+
+class Sampling:
+    '''
+    Sampling a solution with rarefaction (Pons et al. 2000, strongest tangential flow) on xi in [-1, 1]
+    '''
+    params = ([10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6], [False, True])
+    param_names = ['points', 'sorted']
+
+    def setup(self, points, sorted):
+        stateL, stateR = ponsTable()[-1]
+        self.solution = srrp.Solver().solve(stateL, stateR, GAMMA)
+        self.xis = np.linspace(-1, 1, points)
+        if not sorted:
+            self.xis = np.random.RandomState(42).permutation(self.xis)
+
+    def time_getState(self, points, sorted):
+        self.solution.getState(self.xis)
+
+    def peakmem_getState(self, points, sorted):
+        self.solution.getState(self.xis)
+
+
+class SpaceTime:
+    '''
+    Sampling the solution of Sampling at 1000 positions and the given number of times, e.g. for an animation
+    '''
+    params = [10, 100]
+    param_names = ['times']
+
+    def setup(self, times):
+        stateL, stateR = ponsTable()[-1]
+        self.solution = srrp.Solver().solve(stateL, stateR, GAMMA)
+        self.xs = np.linspace(-1, 1, 1000)
+        self.ts = np.linspace(0.1, 1, times)
+
+    def time_sampleSpaceTime(self, times):
+        self.solution.sampleSpaceTime(self.xs, self.ts)
+
+    def time_getState_per_time(self, times):
+        for t in self.ts:
+            self.solution.getState(self.xs / t)
+
+
+class Oblique:
+    '''
+    Sampling the solution of Sampling on a 3D mesh with the given number of cells per axis, oblique to all axes
+    '''
+    params = [50, 200]
+    param_names = ['cells']
+
+    def setup(self, cells):
+        stateL, stateR = ponsTable()[-1]
+        self.solution = srrp.Solver().solve(stateL, stateR, GAMMA)
+        self.coordinates = np.meshgrid(*[np.linspace(-1, 1, cells)] * 3, indexing='ij', sparse=True)
+
+    def time_sampleOblique(self, cells):
+        self.solution.sampleOblique(self.coordinates, [1, 2, 3], t=1, tangent=[0, 0, 1])
+
+
+class CellAverages:
+    params = [10 ** 3, 10 ** 5]
+    param_names = ['cells']
+
+    def setup(self, cells):
+        stateL, stateR = ponsTable()[-1]
+        self.solution = srrp.Solver().solve(stateL, stateR, GAMMA)
+        self.xEdges = np.linspace(-1, 1, cells + 1)
+
+    def time_getCellAverages(self, cells):
+        self.solution.getCellAverages(self.xEdges, t=1)
+
+
+class SurrogateLookup:
+    '''
+    Lookups of p* in a StarSurrogate table (a few microseconds per problem), compared to exact batch solves of the
+    same problems
+    '''
+    params = [10 ** 2, 10 ** 4]
+    param_names = ['size']
+
+    def setup(self, size):
+        self.surrogate = srrp.StarSurrogate(GAMMA, pressureRatio=(1e-2, 1), theta=(0.1, 10),
+                                            normalVelocity=(-0.5, 0.5), nodes=10)
+        random = np.random.RandomState(42)
+        pressure = 10 ** random.uniform(-2, 0, size)
+        self.statesL = srrp.StateArray(rho=10 ** random.uniform(-1, 1, size), vx=random.uniform(-0.2, 0.2, size),
+                                       vt=0, pressure=1)
+        self.statesR = srrp.StateArray(rho=pressure * 10 ** random.uniform(-1, 1, size),
+                                       vx=random.uniform(-0.2, 0.2, size), vt=0, pressure=pressure)
+
+    def time_lookup(self, size):
+        self.surrogate.lookup(self.statesL, self.statesR)
+
+    def time_solve(self, size):
+        self.surrogate.solve(self.statesL, self.statesR, tolerance=1e-3)
+
+    def time_solve_many(self, size):
+        srrp.Solver().solve_many(self.statesL, self.statesR, GAMMA)
+
+
+class GodunovFlux:
+    '''
+    Exact Godunov fluxes through the interfaces of a smooth profile with a density jump
+    '''
+    params = [10 ** 3, 10 ** 5]
+    param_names = ['interfaces']
+
+    def setup(self, interfaces):
+        x = np.linspace(0, 1, interfaces + 1)
+        states = srrp.StateArray(rho=1 + 0.5 * np.sin(8 * np.pi * x) + 2 * (x > 0.5), vx=0.3 * np.sin(4 * np.pi * x),
+                                 vt=0.2 * np.cos(2 * np.pi * x), pressure=1 + 0.3 * np.cos(6 * np.pi * x))
+        self.statesL, self.statesR = states[:-1], states[1:]
+
+    def time_godunov_flux(self, interfaces):
+        srrp.godunov_flux(self.statesL, self.statesR, GAMMA)
+
+
+class SolverService:
+    '''
+    Throughput of concurrent clients sending single problems to a SolverServer, with a warm or without a cache,
+    compared to solving the same problems in process
+    '''
+    params = ([1, 8], [True, False])
+    param_names = ['clients', 'cache']
+    requests = 16
+
+    def setup(self, clients, cache):
+        self.directory = tempfile.mkdtemp()
+        self.server = srrp.SolverServer(os.path.join(self.directory, 'srrp.sock'),
+                                        cacheSize=2 ** 16 if cache else 0).start()
+        self.clients = [srrp.SolverClient(self.server.address) for _ in range(clients)]
+        random = np.random.RandomState(42)
+        size = clients * self.requests
+        self.statesL = srrp.StateArray(rho=10 ** random.uniform(-1, 1, size), vx=random.uniform(-0.5, 0.5, size),
+                                       vt=random.uniform(0, 0.5, size), pressure=1)
+        self.statesR = srrp.StateArray(rho=10 ** random.uniform(-1, 1, size), vx=random.uniform(-0.5, 0.5, size),
+                                       vt=random.uniform(0, 0.5, size), pressure=10 ** random.uniform(-2, 0, size))
+
+    def teardown(self, clients, cache):
+        for client in self.clients:
+            client.close()
+        self.server.shutdown()
+        os.rmdir(self.directory)
+
+    def time_requests(self, clients, cache):
+        def send(idx, client):
+            for problem in range(idx * self.requests, (idx + 1) * self.requests):
+                client.solve(self.statesL[problem:problem + 1], self.statesR[problem:problem + 1], GAMMA)
+
+        threads = [threading.Thread(target=send, args=item) for item in enumerate(self.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def time_direct(self, clients, cache):
+        for problem in range(clients * self.requests):
+            srrp.Solver().solve(self.statesL[problem], self.statesR[problem], GAMMA)
+
+
+class FiniteVolume:
+    '''
+    Second order finite-volume evolution of a shock tube with tangential velocity on 50 cells
+    '''
+    params = ['hll', 'hllc', 'exact']
+    param_names = ['flux']
+
+    def setup(self, flux):
+        self.scheme = srrp.FiniteVolume(GAMMA, flux=flux, order=2)
+
+    def time_evolve(self, flux):
+        self.scheme.evolve(srrp.State(rho=1, vx=0.5, vt=0, pressure=1), srrp.State(rho=0.125, vx=0, vt=0.9,
+                                                                                   pressure=0.1), cells=50, t=0.4)
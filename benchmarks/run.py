@@ -0,0 +1,151 @@
+'''
+Offline runner for the asv style benchmarks in benchmarks.py, without asv:
+
+    python benchmarks/run.py [-k SUBSTRING] [--repeat N] [--json results.json] [--compare baseline.json]
+
+Every time_* benchmark reports its best wall time over the repeats and the peak memory traced (tracemalloc) during one
+extra call, peakmem_* benchmarks only the latter. timeraw_* benchmarks return code, which is timed in a fresh
+interpreter per repeat (e.g. imports). With --compare, benchmarks which became slower or use more memory
+than in a previously saved --json file by more than --threshold are flagged, and the exit status is 1. The same holds
+for benchmarks slower than the time budget (seconds) of their class, if it has one.
+'''
+import argparse
+import inspect
+import itertools
+import json
+import os
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmarks
+
+
+def collect(pattern=None):
+    '''
+    (name, setup, function, args) of every benchmark and parameter combination whose name contains pattern
+    '''
+    for className, cls in inspect.getmembers(benchmarks, inspect.isclass):
+        if cls.__module__ != benchmarks.__name__:
+            continue
+        params = getattr(cls, 'params', [])
+        if params and not isinstance(params, tuple):
+            params = (params,)
+        for methodName, _ in inspect.getmembers(cls, inspect.isfunction):
+            if not methodName.startswith(('time_', 'timeraw_', 'peakmem_')):
+                continue
+            for args in itertools.product(*params):
+                name = f'{className}.{methodName}'
+                if args:
+                    name += '(' + ', '.join(str(arg) for arg in args) + ')'
+                if pattern is None or pattern in name:
+                    instance = cls()
+                    yield name, getattr(instance, 'setup', None), getattr(instance, methodName), args
+
+
+def peakMemory(function, args):
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def timeRaw(code, repeat):
+    # best wall time of the code in fresh interpreters, which only measure the code itself
+    script = f'import time\nstart = time.perf_counter()\nexec({code!r})\nprint(time.perf_counter() - start)'
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path[:2] + [os.environ.get('PYTHONPATH', '')]))
+    return min(float(subprocess.run([sys.executable, '-c', script], env=environment, check=True, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, universal_newlines=True).stdout) for _ in range(repeat))
+
+
+def run(name, setup, function, args, repeat):
+    if function.__name__.startswith('timeraw_'):
+        return {'peakmem': None, 'time': timeRaw(function(*args), repeat)}
+    if setup is not None:
+        setup(*args)
+    result = {'peakmem': None, 'time': None}
+    try:
+        if function.__name__.startswith('time_'):
+            timer = timeit.Timer(lambda: function(*args))
+            number, _ = timer.autorange()
+            result['time'] = min(timer.repeat(repeat=repeat, number=number)) / number
+        result['peakmem'] = peakMemory(function, args)
+    finally:
+        teardown = getattr(function.__self__, 'teardown', None)
+        if teardown is not None:
+            teardown(*args)
+    return result
+
+
+def formatTime(seconds):
+    if seconds is None:
+        return ''
+    for unit, scale in [('s', 1), ('ms', 1e-3), ('us', 1e-6)]:
+        if seconds >= scale:
+            return f'{seconds / scale:.3f} {unit}'
+    return f'{seconds / 1e-9:.1f} ns'
+
+
+def formatMemory(size):
+    if size is None:
+        return ''
+    for unit, scale in [('MiB', 2 ** 20), ('KiB', 2 ** 10)]:
+        if size >= scale:
+            return f'{size / scale:.1f} {unit}'
+    return f'{size} B'
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key in ['time', 'peakmem']:
+            old, new = baseline[name].get(key), result[key]
+            if old and new and new > (1 + threshold) * old:
+                regressions.append(f'{name}: {key} {new / old:.2f}x')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='pattern', help='only run benchmarks whose name contains this substring')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repeats, the best one is reported')
+    parser.add_argument('--json', help='save the results to this file')
+    parser.add_argument('--compare', help='results file of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown reported as regression')
+    options = parser.parse_args(argv)
+
+    results = {}
+    overBudget = []
+    for name, setup, function, args in collect(options.pattern):
+        results[name] = run(name, setup, function, args, options.repeat)
+        print(f'{name:<60} {formatTime(results[name]["time"]):>12} {formatMemory(results[name]["peakmem"]):>12}',
+              flush=True)
+        budget = getattr(function.__self__, 'budget', None)
+        if budget is not None and results[name]['time'] > budget:
+            overBudget.append(f'{name}: {formatTime(results[name]["time"])} > {formatTime(budget)}')
+    for entry in overBudget:
+        print(f'OVER BUDGET {entry}')
+
+    if options.json:
+        with open(options.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if options.compare:
+        with open(options.compare) as file:
+            regressions = compare(results, json.load(file), options.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions or overBudget else 0
+    return 1 if overBudget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
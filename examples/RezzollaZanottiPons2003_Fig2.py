@@ -12,17 +12,7 @@ DOI: 10.1017/S0022112002003506
 def get_dus(stateL, stateR, pressure, gamma=5 / 3):
     solver = srrp.Solver()
     solver.solve(stateL, stateR, gamma)
-    dus = []
-
-    for p in pressure:
-        if p < stateR.pressure:
-            dus.append(solver.get_du_RR(p))
-        elif p < stateL.pressure:
-            dus.append(solver.get_du_RS(p))
-        else:
-            dus.append(solver.get_du_SS(p))
-
-    return dus, solver.get_du_limit_RS(), solver.get_du_limit_SS()
+    return solver.get_du(pressure), solver.get_du_limit_RS(), solver.get_du_limit_SS()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,29 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import srrp
+
+'''
+Convergence of the HLL, HLLC and exact Godunov fluxes of srrp.FiniteVolume for the problem of shock-shock.py with
+tangential velocity, against the exact cell averages
+'''
+
+if __name__ == '__main__':
+    gamma = 5 / 3
+    stateL = srrp.State(rho=1, pressure=1, vx=0.5, vt=0)
+    stateR = srrp.State(rho=0.125, pressure=0.1, vx=0, vt=0.9)
+    t = 0.4
+    cells = [50, 100, 200, 400, 800]
+
+    for flux in srrp.FiniteVolume.fluxes:
+        rows = srrp.FiniteVolume(gamma, flux=flux, order=2).convergence(stateL, stateR, t, cells=cells)
+        for row in rows:
+            print(f'{flux:>5} {row.cells:6d} {row.error:.3e} {row.order:5.2f}')
+        plt.loglog([row.cells for row in rows], [row.error for row in rows], 'o-', label=flux)
+
+    plt.loglog(cells, 0.5 / np.array(cells), 'k--', label='first order')
+    plt.legend(loc='lower left')
+    plt.grid(True, ls='--')
+    plt.xlabel('cells')
+    plt.ylabel('L1 error of rho')
+
+    plt.show()
@@ -0,0 +1,24 @@
+import argparse
+import srrp
+
+'''
+Long-lived solver service for the analysis processes of one node, see srrp.SolverServer:
+
+    python examples/solver-service.py --socket /tmp/srrp.sock
+'''
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket', help='path of the Unix socket')
+    parser.add_argument('--port', type=int, help='localhost port, if no socket is given')
+    parser.add_argument('--batch-window', type=float, default=1e-3, help='seconds to wait for concurrent requests')
+    parser.add_argument('--cache-size', type=int, default=2 ** 16, help='number of cached solutions')
+    options = parser.parse_args()
+
+    server = srrp.SolverServer(options.socket or ('localhost', options.port or 0), batchWindow=options.batch_window,
+                               cacheSize=options.cache_size)
+    print(f'serving on {server.address}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -19,8 +19,10 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     install_requires=[
-        'scipy>=1.4.0',
         'numpy>=1.17.0'
     ],
+    extras_require={
+        'scipy': ['scipy>=1.4.0'],
+    },
     python_requires='>=3.6',
 )
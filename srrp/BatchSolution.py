@@ -0,0 +1,81 @@
+import numpy as np
+from .Rarefaction import Rarefaction
+from .StateArray import StateArray
+
+
+class BatchSolution:
+    '''
+    Solutions of many independent Riemann problems as struct of arrays, see Solver.solve_many.
+    Everything is given in the frame of the original left and right states:
+        - pressure: pressure p* at the contact discontinuity
+        - contactSpeed: speed of the contact discontinuity (nan for the vacuum pattern RR*)
+        - states: [stateL, stateL', stateR', stateR] as StateArrays
+        - waveSpeeds: (n, 5) array of the speeds [left wave outer edge, left wave inner edge, contact,
+          right wave inner edge, right wave outer edge]. Both edges of a shock are its speed.
+        - isShockL, isShockR: whether the left/right wave is a shock (otherwise a rarefaction)
+        - solutionType: wave pattern as classified by the solver ('SS', 'RS', 'RR', 'RR*'), which orders the
+          states by pressure, see `reversed`
+        - eos: the EquationOfState of the gas, which getState needs inside rarefaction fans
+    '''
+
+    def __init__(self, solutionType, reversed, pressure, contactSpeed, states, waveSpeeds, isShockL, isShockR,
+                 eos=None):
+        self.solutionType = solutionType
+        self.reversed = reversed
+        self.pressure = pressure
+        self.contactSpeed = contactSpeed
+        self.states = states
+        self.waveSpeeds = waveSpeeds
+        self.isShockL = isShockL
+        self.isShockR = isShockR
+        self.eos = eos
+
+    @classmethod
+    def concatenate(cls, batches):
+        return cls(*[np.concatenate([getattr(batch, var) for batch in batches])
+                     for var in ['solutionType', 'reversed', 'pressure', 'contactSpeed']],
+                   [StateArray.concatenate([batch.states[idx] for batch in batches]) for idx in range(4)],
+                   *[np.concatenate([getattr(batch, var) for batch in batches])
+                     for var in ['waveSpeeds', 'isShockL', 'isShockR']], eos=batches[0].eos)
+
+    def take(self, idx):
+        '''
+        Solutions of a subset (or a permutation) of the problems
+        '''
+        return BatchSolution(*[getattr(self, var)[idx] for var in ['solutionType', 'reversed', 'pressure',
+                                                                    'contactSpeed']],
+                             [states[idx] for states in self.states],
+                             *[getattr(self, var)[idx] for var in ['waveSpeeds', 'isShockL', 'isShockR']], eos=self.eos)
+
+    def getState(self, xis=0.):
+        '''
+        States at the self similar coordinates xis = (x - x0) / t, one per problem (or one for all problems), as a
+        StateArray, e.g. the states at the interfaces of a Godunov scheme for xis = 0. Constant regions are gathered
+        from the states, the rarefaction fans of each side are evaluated in one batch with Rarefaction.computeFanStates.
+        '''
+        xis = np.broadcast_to(np.asarray(xis, dtype=float), self.pressure.shape)
+        edges = np.array(self.waveSpeeds)
+        # the vacuum of RR* between the tails of both rarefactions is split in the middle
+        edges[:, 2] = np.where(np.isnan(edges[:, 2]), 0.5 * (edges[:, 1] + edges[:, 3]), edges[:, 2])
+        # regions: stateL, left fan, stateL', stateR', right fan, stateR (the fan of a shock is empty)
+        region = np.sum(xis[:, np.newaxis] >= edges, axis=-1)
+        stateIndex = np.array([0, 0, 1, 2, 2, 3])[region]
+        states = StateArray(*[np.choose(stateIndex, [getattr(state, var) for state in self.states])
+                              for var in StateArray.variables])
+        for fanRegion, ahead, behind, sign in [(1, 0, 1, -1), (4, 3, 2, +1)]:
+            inFan = np.flatnonzero(region == fanRegion)
+            if len(inFan):
+                states[inFan] = Rarefaction.computeFanStates(self.states[ahead][inFan], self.states[behind][inFan],
+                                                             xis[inFan], self.eos, sign)
+        return states
+
+    def __len__(self):
+        return len(self.pressure)
+
+    def __str__(self):
+        patterns, counts = np.unique(self.solutionType, return_counts=True)
+        return f'BatchSolution: {len(self)} problems (' + ', '.join(
+            f'{pattern}: {count}' for pattern, count in zip(patterns, counts)) + ')'
+
+    def __repr__(self):
+        return str(self)
@@ -1,11 +1,180 @@
 import numpy as np
+from .RootFinder import findRootNewtonUnbounded
 
 
-class IdealEquationOfState:
+def interpolateHermite(nodes, values, slopes, x):
+    '''
+    Piecewise cubic Hermite interpolation of the tabulated values and slopes at the increasing nodes
+    '''
+    idx = np.clip(np.searchsorted(nodes, x) - 1, 0, len(nodes) - 2)
+    width = nodes[idx + 1] - nodes[idx]
+    t = (x - nodes[idx]) / width
+    t2, t3 = t * t, t * t * t
+    return ((2 * t3 - 3 * t2 + 1) * values[idx] + (t3 - 2 * t2 + t) * width * slopes[idx]
+            + (-2 * t3 + 3 * t2) * values[idx + 1] + (t3 - t2) * width * slopes[idx + 1])
+
+
+class EquationOfState:
+    '''
+    Equation of state of a gas whose specific enthalpy h(theta) (including the rest mass) only depends on
+    theta = pressure / rho, like the ideal gas, the Taub-Mathews and the Synge gas. Shock, Rarefaction and Solver only
+    go through the methods of this class and of its isentropes (EntropyConservation):
+        - computeEnthalpy(pressure, rho), computeSpeedOfSound(pressure, rho) and computeRho(pressure, h) with its
+          partial derivatives computeRhoDerivatives(pressure, h)
+        - computeTaubAdiabat(stateA, pressureB), the enthalpy behind a shock, and its derivative with respect to
+          pressureB, computeTaubAdiabatDerivative(stateA, pressureB, hB)
+        - isentropes labelled by computeIsentropicConstant(pressure, rho), along which theta, rho and the pressure
+          follow from computeThetaOnIsentrope, computeRhoOnIsentrope and computePressureOnIsentrope
+        - the isentrope coordinate s = arcsinh(sqrt(sigma theta)), in which rarefactions are integrated, see
+          computeCoordinateQuantities
+    Subclasses define sigma = h'(0) and the functions of theta computeEnthalpyFromTheta, computeDEnthalpyDTheta,
+    computeThetaFromEnthalpy and computeLogDensity. The generic implementations of all other methods solve the
+    isentropes and the Taub adiabat with a vectorised Newton iteration and may be overridden with closed forms.
+    Every method works elementwise on arrays. integralTolerance is the accuracy of the equation of state itself, below
+    which rarefaction integrals (IsentropeIntegral) are not refined.
+    '''
+    sigma = None
+    integralTolerance = 0
+
+    def computeEnthalpyFromTheta(self, theta):
+        raise NotImplementedError
+
+    def computeDEnthalpyDTheta(self, theta):
+        raise NotImplementedError
+
+    def computeThetaFromEnthalpy(self, h):
+        raise NotImplementedError
+
+    def computeLogDensity(self, theta):
+        '''
+        log(rho) along isentropes up to a constant: the antiderivative of (h'(theta) - 1) / theta, because
+        d(h - theta) = theta d(log rho) for adiabatic changes
+        '''
+        raise NotImplementedError
+
+    def computeSpeedOfSoundFromTheta(self, theta):
+        dh = self.computeDEnthalpyDTheta(theta)
+        return np.sqrt(dh * theta / (self.computeEnthalpyFromTheta(theta) * (dh - 1)))
+
+    def computeEnthalpy(self, pressure, rho):
+        return self.computeEnthalpyFromTheta(pressure / rho)
+
+    def computeSpeedOfSound(self, pressure, rho):
+        return self.computeSpeedOfSoundFromTheta(pressure / rho)
+
+    def computeRho(self, pressure, h):
+        return pressure / self.computeThetaFromEnthalpy(h)
+
+    def computeRhoDerivatives(self, pressure, h):
+        '''
+        Partial derivatives of computeRho with respect to pressure and h
+        '''
+        theta = self.computeThetaFromEnthalpy(h)
+        rho = pressure / theta
+        return rho / pressure, -rho / (theta * self.computeDEnthalpyDTheta(theta))
+
+    def computeTaubAdiabat(self, stateA, pressureB):
+        '''
+        Enthalpy hB behind a shock running into stateA from the Taub adiabat
+            hB^2 - hA^2 = (hA / rhoA + hB / rhoB) (pressureB - pressureA)
+        by Newton's method, starting from the ideal gas with the mean slope (hA - 1) / thetaA of h(theta)
+        '''
+        hA = self.computeEnthalpy(stateA.pressure, stateA.rho)
+        nuA = hA / stateA.rho
+        dp = np.subtract(pressureB, stateA.pressure)
+        hB = IdealEquationOfState.solveTaubAdiabat(stateA, pressureB, (hA - 1) * stateA.rho / stateA.pressure)
+
+        def taubAdiabat(h):
+            theta = self.computeThetaFromEnthalpy(h)
+            return (h * h - hA * hA - (nuA + h * theta / pressureB) * dp,
+                    2 * h - (theta + h / self.computeDEnthalpyDTheta(theta)) * dp / pressureB)
+
+        return findRootNewtonUnbounded(taubAdiabat, hB)[()]
+
+    def computeTaubAdiabatDerivative(self, stateA, pressureB, hB):
+        '''
+        Derivative of computeTaubAdiabat with respect to pressureB, by implicit differentiation of the Taub adiabat
+        '''
+        hA = self.computeEnthalpy(stateA.pressure, stateA.rho)
+        rhoB = self.computeRho(pressureB, hB)
+        rhoP, rhoH = self.computeRhoDerivatives(pressureB, hB)
+        dp = pressureB - stateA.pressure
+        nuSum = hA / stateA.rho + hB / rhoB
+        dTaubDp = -nuSum + hB * rhoP / rhoB ** 2 * dp
+        dTaubDh = 2 * hB - (1 / rhoB - hB * rhoH / rhoB ** 2) * dp
+        return -dTaubDp / dTaubDh
+
+    def computeIsentropicConstant(self, pressure, rho):
+        return rho * np.exp(-self.computeLogDensity(pressure / rho))
+
+    def computeThetaOnIsentrope(self, pressure, isentropicConstant):
+        '''
+        theta at the given pressure along the isentrope, from log(pressure / K) = log(theta) + computeLogDensity(theta)
+        by Newton's method in log(theta)
+        '''
+        def isentrope(logTheta):
+            theta = np.exp(logTheta)
+            return logTheta + self.computeLogDensity(theta) - logPressure, self.computeDEnthalpyDTheta(theta)
+
+        # vacuum (pressure 0) is carried along as log(theta) = -inf
+        with np.errstate(divide='ignore', invalid='ignore'):
+            logPressure = np.log(pressure / isentropicConstant)
+            logTheta = findRootNewtonUnbounded(isentrope, logPressure / self.sigma)
+        return np.where(np.asarray(pressure) > 0, np.exp(logTheta), 0.)[()]
+
+    def computeRhoOnIsentrope(self, pressure, isentropicConstant):
+        theta = self.computeThetaOnIsentrope(pressure, isentropicConstant)
+        with np.errstate(divide='ignore'):
+            return isentropicConstant * np.exp(self.computeLogDensity(theta))
+
+    def computePressureOnIsentrope(self, theta, isentropicConstant):
+        with np.errstate(divide='ignore'):
+            return isentropicConstant * theta * np.exp(self.computeLogDensity(theta))
+
+    def computeThetaFromCoordinate(self, s):
+        return np.sinh(s) ** 2 / self.sigma
+
+    def computeCoordinateFromTheta(self, theta):
+        return np.arcsinh(np.sqrt(self.sigma * theta))
+
+    def computeCoordinateQuantities(self, s):
+        '''
+        Enthalpy h, sound speed cs and (dh / ds) / cs as functions of the isentrope coordinate s. The latter stays
+        finite in the cold limit s -> 0, where cs vanishes, with the limit 2 sqrt(sigma - 1).
+        '''
+        theta = self.computeThetaFromCoordinate(s)
+        h = self.computeEnthalpyFromTheta(theta)
+        cs = self.computeSpeedOfSoundFromTheta(theta)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dhds_cs = self.computeDEnthalpyDTheta(theta) * np.sinh(2 * s) / (self.sigma * cs)
+        return h, cs, np.where(s == 0, 2 * np.sqrt(self.sigma - 1), dhds_cs)[()]
+
+
+class IdealEquationOfState(EquationOfState):
+    '''
+    Ideal gas h = 1 + sigma theta with sigma = gamma / (gamma - 1), using closed forms throughout. Its isentropes are
+    labelled by the traditional constant pressure / rho^gamma.
+    '''
+
     def __init__(self, gamma):
         self.gamma = gamma
         self.sigma = gamma / (gamma - 1)
 
+    def computeEnthalpyFromTheta(self, theta):
+        return 1 + self.sigma * theta
+
+    def computeDEnthalpyDTheta(self, theta):
+        return np.full_like(theta, self.sigma, dtype=float)[()]
+
+    def computeThetaFromEnthalpy(self, h):
+        return (h - 1) / self.sigma
+
+    def computeLogDensity(self, theta):
+        return (self.sigma - 1) * np.log(theta)
+
+    def computeSpeedOfSoundFromTheta(self, theta):
+        return np.sqrt(self.gamma * theta / (1 + self.sigma * theta))
+
     def computeSpeedOfSound(self, pressure, rho):
         h = self.computeEnthalpy(pressure, rho)
         return np.sqrt(self.gamma * pressure / (h * rho))
@@ -16,11 +185,152 @@ class IdealEquationOfState:
     def computeRho(self, pressure, h):
         return self.sigma / (h - 1) * pressure
 
+    @staticmethod
+    def solveTaubAdiabat(stateA, pressureB, sigma):
+        '''
+        Root of the Taub adiabat c_2 hB^2 + c_1 hB + c_0 = 0 of an ideal gas with the given sigma
+        '''
+        hA = 1 + sigma * stateA.pressure / stateA.rho
+        with np.errstate(divide='ignore', invalid='ignore'):
+            c_2 = (1. + np.subtract(stateA.pressure, pressureB) / (pressureB * sigma))
+            c_1 = - np.subtract(stateA.pressure, pressureB) / (pressureB * sigma)
+            c_0 = hA * np.subtract(stateA.pressure, pressureB) / stateA.rho - hA ** 2
+            hB = np.where(c_2 == 0, - c_0 / c_1, (-c_1 + np.sqrt(c_1 * c_1 - 4 * c_2 * c_0)) / (2 * c_2))
+        return hB[()]
+
+    def computeTaubAdiabat(self, stateA, pressureB):
+        return IdealEquationOfState.solveTaubAdiabat(stateA, pressureB, self.sigma)
+
+    def computeIsentropicConstant(self, pressure, rho):
+        return pressure / np.power(rho, self.gamma)
+
+    def computeThetaOnIsentrope(self, pressure, isentropicConstant):
+        return np.power(isentropicConstant, 1. / self.gamma) * np.power(pressure, 1. - 1. / self.gamma)
+
+    def computeRhoOnIsentrope(self, pressure, isentropicConstant):
+        return np.power(pressure / isentropicConstant, 1. / self.gamma)
+
+    def computePressureOnIsentrope(self, theta, isentropicConstant):
+        return np.power(np.power(theta, self.gamma) / isentropicConstant, 1. / (self.gamma - 1))
+
+    def computeCoordinateQuantities(self, s):
+        h = np.cosh(s) ** 2
+        return h, np.sqrt(self.gamma - 1) * np.tanh(s), 2 * h / np.sqrt(self.gamma - 1)
+
     def __eq__(self, other):
-        return self.gamma == other.gamma
+        return isinstance(other, IdealEquationOfState) and self.gamma == other.gamma
+
+
+class TaubMathewsEquationOfState(EquationOfState):
+    '''
+    Taub-Mathews equation of state (h - theta) (h - 4 theta) = 1 (Mignone, Plewa & Bodo 2005, ApJS 160, 199), which
+    approximates the Synge gas with gamma = 5/3 for cold and 4/3 for hot gas. Its isentropes are
+    rho ~ (3 theta (h - theta))^(3/2).
+    '''
+    sigma = 5 / 2
+
+    def computeEnthalpyFromTheta(self, theta):
+        return 2.5 * theta + np.sqrt(2.25 * theta ** 2 + 1)
+
+    def computeDEnthalpyDTheta(self, theta):
+        return 2.5 + 2.25 * theta / np.sqrt(2.25 * theta ** 2 + 1)
+
+    def computeThetaFromEnthalpy(self, h):
+        # smaller root of 4 theta^2 - 5 h theta + h^2 - 1 = 0, without cancellation for h -> 1
+        return 2 * (h - 1) * (h + 1) / (5 * h + np.sqrt(9 * h ** 2 + 16))
+
+    def computeLogDensity(self, theta):
+        return 1.5 * np.log(3 * theta * (1.5 * theta + np.sqrt(2.25 * theta ** 2 + 1)))
+
+    def __eq__(self, other):
+        return isinstance(other, TaubMathewsEquationOfState)
+
+
+class TabulatedEquationOfState(EquationOfState):
+    '''
+    Equation of state given by a table of h(theta) at increasing theta > 0, e.g. the Synge gas
+    h = K_3(1 / theta) / K_2(1 / theta), see fromFunction. h, h' and log(rho) along isentropes are interpolated with
+    cubic Hermite polynomials in log(theta) and theta(h) by inverse interpolation, so evaluations cost a table lookup.
+    Below the table the gas is continued as an ideal gas with sigma = (h - 1) / theta of the first entry, above it
+    with the constant slope h' of the last entry. The interpolation is only continuously differentiable, so rarefaction
+    integrals are resolved to integralTolerance only instead of to machine precision.
+    '''
+
+    def __init__(self, theta, h, dhdtheta=None, integralTolerance=1e-8):
+        theta, h = np.asarray(theta, dtype=float), np.asarray(h, dtype=float)
+        x = np.log(theta)
+        if dhdtheta is None:
+            dhdtheta = np.gradient(h, x, edge_order=2) / theta
+        dhdtheta = np.asarray(dhdtheta, dtype=float)
+        assert np.all(np.diff(theta) > 0) and np.all(dhdtheta > 1)
+
+        self.sigma = (h[0] - 1) / theta[0]
+        self.integralTolerance = integralTolerance
+        self.theta, self.h, self.dhdtheta = theta, h, dhdtheta
+        self.__x = x
+        self.__dhdx = dhdtheta * theta
+        self.__dhdthetadx = np.gradient(dhdtheta, x, edge_order=2)
+        # log density: integral of h' - 1 over log(theta), exact for the Hermite interpolant of h'
+        g, dgdx, dx = dhdtheta - 1, self.__dhdthetadx, np.diff(x)
+        cells = dx / 2 * (g[:-1] + g[1:]) + dx ** 2 / 12 * (dgdx[:-1] - dgdx[1:])
+        self.__logDensity = (self.sigma - 1) * x[0] + np.concatenate([[0], np.cumsum(cells)])
+
+    @classmethod
+    def fromFunction(cls, enthalpy, derivative=None, thetaMin=1e-6, thetaMax=1e6, size=4001, step=1e-3,
+                     **kwargs):
+        '''
+        Table of the function h(theta) on size logarithmically spaced values of theta. Without the derivative h'(theta)
+        it is approximated by fourth order central differences in log(theta) with the given step.
+        '''
+        theta = np.logspace(np.log10(thetaMin), np.log10(thetaMax), size)
+        if derivative is None:
+            dhdx = (8 * (enthalpy(theta * np.exp(step)) - enthalpy(theta * np.exp(-step)))
+                    - (enthalpy(theta * np.exp(2 * step)) - enthalpy(theta * np.exp(-2 * step)))) / (12 * step)
+            return cls(theta, enthalpy(theta), dhdx / theta, **kwargs)
+        return cls(theta, enthalpy(theta), derivative(theta), **kwargs)
+
+    def __evaluate(self, theta, values, slopes, below, above):
+        theta = np.asarray(theta, dtype=float)
+        with np.errstate(divide='ignore'):
+            x = np.log(theta)
+        inside = interpolateHermite(self.__x, values, slopes, np.clip(x, self.__x[0], self.__x[-1]))
+        return np.where(theta < self.theta[0], below(theta, x), np.where(theta > self.theta[-1], above(theta, x),
+                                                                            inside))[()]
+
+    def computeEnthalpyFromTheta(self, theta):
+        return self.__evaluate(theta, self.h, self.__dhdx, lambda theta, x: 1 + self.sigma * theta,
+                               lambda theta, x: self.h[-1] + self.dhdtheta[-1] * (theta - self.theta[-1]))
+
+    def computeDEnthalpyDTheta(self, theta):
+        return self.__evaluate(theta, self.dhdtheta, self.__dhdthetadx, lambda theta, x: self.sigma + 0 * theta,
+                               lambda theta, x: self.dhdtheta[-1] + 0 * theta)
+
+    def computeLogDensity(self, theta):
+        return self.__evaluate(theta, self.__logDensity, self.dhdtheta - 1, lambda theta, x: (self.sigma - 1) * x,
+                               lambda theta, x: self.__logDensity[-1] + (self.dhdtheta[-1] - 1) * (x - self.__x[-1]))
+
+    def computeThetaFromEnthalpy(self, h):
+        h = np.asarray(h, dtype=float)
+        inside = np.exp(interpolateHermite(self.h, self.__x, 1 / self.__dhdx, np.clip(h, self.h[0], self.h[-1])))
+        # one Newton step makes theta(h) consistent with the interpolation of h(theta)
+        inside -= (self.computeEnthalpyFromTheta(inside) - h) / self.computeDEnthalpyDTheta(inside)
+        return np.where(h < self.h[0], (h - 1) / self.sigma,
+                        np.where(h > self.h[-1], self.theta[-1] + (h - self.h[-1]) / self.dhdtheta[-1], inside))[()]
+
+
+def getEquationOfState(eos):
+    '''
+    Equation of state from an EquationOfState or the adiabatic index of an ideal gas
+    '''
+    return eos if isinstance(eos, EquationOfState) else IdealEquationOfState(eos)
 
 
 class EntropyConservation:
+    '''
+    Isentrope of an EquationOfState through a given state, labelled by its isentropic constant (which may also be an
+    array of constants for a batch of isentropes)
+    '''
+
     @classmethod
     def fromState(cls, state, eos):
         isentropicConstant = EntropyConservation.computeSpecificEntropy(state, eos)
@@ -28,26 +338,44 @@ class EntropyConservation:
 
     @staticmethod
     def computeSpecificEntropy(state, eos):
-        return state.pressure / np.power(state.rho, eos.gamma)
+        return eos.computeIsentropicConstant(state.pressure, state.rho)
 
-    def __init__(self, isentropicConstant, eos: IdealEquationOfState):
+    def __init__(self, isentropicConstant, eos: EquationOfState):
         self.isentropicConstant = isentropicConstant
         self.eos = eos
 
     def computeRho(self, pressure):
-        return np.power(pressure / self.isentropicConstant, 1. / self.eos.gamma)
+        return self.eos.computeRhoOnIsentrope(pressure, self.isentropicConstant)
+
+    def computeTheta(self, pressure):
+        '''
+        Temperature-like pressure / rho along the isentrope, which vanishes in vacuum
+        '''
+        return self.eos.computeThetaOnIsentrope(pressure, self.isentropicConstant)
 
     def computeSpeedOfSound(self, pressure, rho=None, h=None):
-        if rho is None:
-            rho = self.computeRho(pressure)
-        if h is None:
-            h = self.computeEnthalpy(pressure, rho)
-        return np.sqrt(self.eos.gamma * pressure / (h * rho))
+        theta = self.computeTheta(pressure) if rho is None else pressure / rho
+        return self.eos.computeSpeedOfSoundFromTheta(theta)
 
     def computeEnthalpy(self, pressure, rho=None):
-        if rho is None:
-            rho = self.computeRho(pressure)
-        return 1 + self.eos.sigma * pressure / rho
+        theta = self.computeTheta(pressure) if rho is None else pressure / rho
+        return self.eos.computeEnthalpyFromTheta(theta)
+
+    def computeCoordinate(self, pressure):
+        '''
+        Coordinate s = arcsinh(sqrt(sigma theta)) along the isentrope, in which the rarefaction integrand is smooth
+        (and constant for vanishing tangential velocity in an ideal gas, where h = cosh(s)^2).
+        '''
+        return self.eos.computeCoordinateFromTheta(self.computeTheta(pressure))
+
+    def computePressureFromCoordinate(self, s):
+        return self.eos.computePressureOnIsentrope(self.eos.computeThetaFromCoordinate(s), self.isentropicConstant)
+
+    def take(self, idx):
+        '''
+        Sub-batch of a batch of isentropes
+        '''
+        return EntropyConservation(self.isentropicConstant[idx], self.eos)
 
     def __eq__(self, other):
         return (self.eos == other.eos) and (self.isentropicConstant == other.isentropicConstant)
@@ -0,0 +1,29 @@
+import numpy as np
+
+from .EquationOfState import getEquationOfState
+from .Solver import Solver, broadcastStates
+from .SolverStats import SolverStats
+from .StateArray import StateArray
+
+
+def godunov_flux(statesL, statesR, gamma, chunkSize=65536, stats: SolverStats = None):
+    '''
+    Exact Godunov fluxes (D, S_x, S_t, tau) in x direction through interfaces with the left and right states given as
+    struct of arrays (see Solver.solve_many), one entry per interface. The Riemann problems of all interfaces are solved
+    with Solver.solve_many and sampled at xi = 0 with BatchSolution.getState, interfaces with identical states are not
+    solved. The interfaces are processed in chunks of chunkSize, which bounds the memory of the intermediate solutions.
+    '''
+    eos = getEquationOfState(gamma)
+    stateL, stateR = broadcastStates(statesL, statesR)
+    fluxes = tuple(np.empty(len(stateL)) for _ in range(4))
+    with SolverStats.recording(stats):
+        for start in range(0, len(stateL), chunkSize):
+            chunk = slice(start, start + chunkSize)
+            left, right = stateL[chunk], stateR[chunk]
+            interface = StateArray(*[np.array(getattr(left, var)) for var in StateArray.variables])
+            differ = np.flatnonzero(~(left == right))
+            if len(differ):
+                interface[differ] = Solver(stats).solve_many(left[differ], right[differ], eos).getState(0.)
+            for flux, value in zip(fluxes, interface.fluxes(eos)):
+                flux[chunk] = value
+    return fluxes
@@ -0,0 +1,167 @@
+import functools
+import numpy as np
+from .EquationOfState import EntropyConservation, EquationOfState
+from .SolverStats import recordCount
+from .Util import *
+
+
+def evaluateLegendre(coefficients, x):
+    '''
+    Clenshaw evaluation of Legendre series with one row of coefficients per entry of x
+    '''
+    b1 = np.zeros_like(x)
+    b2 = np.zeros_like(x)
+    for k in range(coefficients.shape[-1] - 1, -1, -1):
+        b1, b2 = coefficients[..., k] + (2 * k + 1) / (k + 1) * x * b1 - (k + 1) / (k + 2) * b2, b1
+    return b1
+
+
+@functools.lru_cache(maxsize=None)
+def gaussLegendre(order):
+    '''
+    Gauss-Legendre nodes and weights of the given order with the discrete Legendre transform at these nodes (rows k:
+    (2k + 1) / 2 * w_i * P_k(x_i)), cached since every table build needs them. The arrays are read-only.
+    '''
+    nodes, weights = np.polynomial.legendre.leggauss(order)
+    transform = (np.arange(order)[:, np.newaxis] + 0.5) * weights * np.polynomial.legendre.legvander(nodes, order - 1).T
+    for array in [nodes, weights, transform]:
+        array.flags.writeable = False
+    return nodes, weights, transform
+
+
+def integrateLegendre(coefficients):
+    '''
+    Coefficients of the antiderivative of Legendre series (along the last axis) vanishing at x = -1,
+    using int P_k = (P_{k+1} - P_{k-1}) / (2k + 1)
+    '''
+    order = coefficients.shape[-1]
+    scaled = coefficients / (2 * np.arange(order) + 1)
+    integrated = np.zeros(coefficients.shape[:-1] + (order + 1,))
+    integrated[..., 1:] += scaled
+    integrated[..., :order - 1] -= scaled[..., 1:]
+    # P_k(-1) = (-1)^k
+    integrated[..., 0] = -np.sum(integrated[..., 1:] * (-1) ** np.arange(1, order + 1), axis=-1)
+    return integrated
+
+
+class IsentropeIntegral:
+    '''
+    Cumulative integral of the rarefaction integrand (see Rarefaction.computeVxb) along one isentrope with fixed
+    invariant A, starting from vacuum:
+
+        B(p) = int_0^p sqrt(h^2 + A^2 (1 - cs^2)) / ((h^2 + A^2) rho cs) dp'
+
+    The integrand is transformed to the isentrope coordinate s = arcsinh(sqrt(sigma theta)) (arccosh(sqrt(h)) for an
+    ideal gas) where it is smooth and bounded, and [0, s(pressureMax)] is split into uniform panels. On each panel the
+    integrand is interpolated at `order` Gauss-Legendre nodes and the antiderivative of the interpolant is stored as a
+    Legendre series, so evaluating B(p) costs a panel index computation and one polynomial evaluation of fixed degree,
+    independent of p.
+
+    A, pressureMax and the isentropic constant may also be one-dimensional arrays describing a batch of isentropes,
+    which share the number of panels. In that case the integral is evaluated for one coordinate per isentrope.
+
+    Error bound: the truncation error of a panel is estimated by the magnitude of its two highest Legendre coefficients
+    (times the panel width). Panels are halved until the sum of these estimates over the whole table is below
+    `tolerance` (or the integralTolerance of the equation of state, if larger), which bounds |B(p) - B_exact(p)| for
+    any 0 <= p <= pressureMax up to rounding errors of O(1e-16 * |B|). The final estimate is available as
+    `errorEstimate`. Pressures above pressureMax are integrated from the end of the table with a single Gauss-Legendre
+    rule.
+    '''
+
+    @classmethod
+    def fromState(cls, state, eos: EquationOfState, pressureMax=None, **kwargs):
+        isentrope = EntropyConservation.fromState(state, eos)
+        if pressureMax is None:
+            pressureMax = state.pressure
+        return cls(isentrope, computeA(state, eos), pressureMax, **kwargs)
+
+    def __init__(self, isentrope: EntropyConservation, A, pressureMax, tolerance=1e-13, order=12, panelWidth=0.5):
+        self.isentrope = isentrope
+        self.A = A
+        self.pressureMax = pressureMax
+        self.tolerance = tolerance = max(tolerance, isentrope.eos.integralTolerance)
+        self.order = order
+        # A batch of isentropes is given by one-dimensional arrays of isentropic constants, A and pressureMax
+        self.batched = np.ndim(A) > 0
+
+        self.sMax = np.maximum(isentrope.computeCoordinate(pressureMax), np.finfo(float).tiny)
+        nodes, weights, transform = gaussLegendre(order)
+
+        nPanels = max(1, int(np.ceil(np.max(self.sMax) / panelWidth)))
+        while True:
+            self.panelWidth = self.sMax / nPanels
+            halfWidth = 0.5 * self.panelWidth[..., np.newaxis, np.newaxis]
+            sNodes = 2 * halfWidth * (np.arange(nPanels)[:, np.newaxis] + 0.5) + halfWidth * nodes
+            coefficients = self.integrand(sNodes) @ transform.T
+            truncation = np.sum(np.abs(coefficients[..., -2:]), axis=(-2, -1))
+            self.errorEstimate = np.max(2 * halfWidth[..., 0, 0] * truncation)
+            if self.errorEstimate <= tolerance or nPanels >= 2 ** 16:
+                break
+            nPanels *= 2
+
+        self.nPanels = nPanels
+        recordCount('tableBuilds')
+        recordCount('tablePanels', nPanels * np.size(self.sMax))
+        self.coefficients = halfWidth * integrateLegendre(coefficients)
+        panelIntegrals = 2 * halfWidth[..., 0] * coefficients[..., 0]
+        self.offsets = np.concatenate([np.zeros(np.shape(self.sMax) + (1,)), np.cumsum(panelIntegrals, axis=-1)],
+                                      axis=-1)
+        self.coefficients[..., 0] += self.offsets[..., :-1]
+
+    def take(self, idx):
+        '''
+        Sub-batch of a batch of isentrope integrals
+        '''
+        integral = IsentropeIntegral.__new__(IsentropeIntegral)
+        integral.__dict__.update(self.__dict__)
+        integral.isentrope = self.isentrope.take(idx)
+        for var in ['A', 'pressureMax', 'sMax', 'panelWidth', 'coefficients', 'offsets']:
+            setattr(integral, var, getattr(self, var)[idx])
+        return integral
+
+    def integrand(self, s):
+        '''
+        Integrand of B in the isentrope coordinate s, i.e. the integrand of Rarefaction.computeVxb times
+        dp / ds = rho dh / ds (for an ideal gas h = cosh(s)^2 and cs^2 = (gamma - 1) tanh(s)^2)
+        '''
+        h, cs, dhds_cs = self.isentrope.eos.computeCoordinateQuantities(s)
+        h_sqr = h * h
+        A_sqr = np.reshape(self.A, np.shape(self.A) + (1,) * (np.ndim(s) - np.ndim(self.A))) ** 2
+        return dhds_cs * np.sqrt(h_sqr + A_sqr * (1 - cs ** 2)) / (h_sqr + A_sqr)
+
+    def integrateCoordinate(self, sLower, sUpper):
+        '''
+        Fixed order Gauss-Legendre quadrature of the integrand, vectorised over the integration bounds
+        '''
+        nodes, weights, _ = gaussLegendre(self.order)
+        sLower, sUpper = np.broadcast_arrays(np.asarray(sLower, dtype=float), np.asarray(sUpper, dtype=float))
+        halfWidth = 0.5 * (sUpper - sLower)
+        sNodes = (0.5 * (sUpper + sLower))[..., np.newaxis] + halfWidth[..., np.newaxis] * nodes
+        return halfWidth * np.sum(weights * self.integrand(sNodes), axis=-1)
+
+    def computeIntegralCoordinate(self, s):
+        '''
+        B as a function of the isentrope coordinate (one value per isentrope for batches)
+        '''
+        s = np.asarray(s, dtype=float)
+        panel = np.clip((s / self.panelWidth).astype(int), 0, self.nPanels - 1)
+        x = np.clip(2 * (s - panel * self.panelWidth) / self.panelWidth - 1, -1, 1)
+        if self.batched:
+            coefficients = self.coefficients[np.arange(len(self.sMax)), panel]
+        else:
+            coefficients = self.coefficients[panel]
+        integral = evaluateLegendre(coefficients, x)
+        beyond = s > self.sMax
+        if np.any(beyond):
+            extension = self.integrateCoordinate(self.sMax, np.maximum(s, self.sMax))
+            integral = np.where(beyond, self.offsets[..., -1] + extension, integral)
+        return integral
+
+    def computeIntegral(self, pressure):
+        return self.computeIntegralCoordinate(self.isentrope.computeCoordinate(pressure))
+
+    def integrate(self, pressureA, pressureB):
+        '''
+        Integral of the rarefaction integrand from pressureA to pressureB
+        '''
+        return self.computeIntegral(pressureB) - self.computeIntegral(pressureA)
@@ -0,0 +1,239 @@
+'''
+Scalar kernels of the star region solve of ideal gases: the Taub adiabat, the velocity behind shocks and
+rarefactions, Brent's method for p* and adaptive Gauss-Kronrod quadrature of the rarefaction integrand. They only use
+floats and the math module, so they are compiled in nopython mode by Numba if it is installed (numbaAvailable) and run
+as plain Python otherwise. The root finder and the quadrature call their functions directly rather than taking them as
+arguments, so the compiled functions can be cached on disk. Solver uses them with backend='kernels' and only imports
+this module (and Numba) then.
+'''
+import math
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+numbaAvailable = numba is not None
+
+
+def jit(function):
+    return numba.njit(cache=True)(function) if numbaAvailable else function
+
+
+# Gauss-Kronrod 15 point rule on [-1, 1]: the non-negative Kronrod nodes, their weights and the weights of the 7 point
+# Gauss rule on the nodes of odd index
+KRONROD_NODES = (0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+                 0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+                 0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+                 0.207784955007898467600689403773245, 0.)
+KRONROD_WEIGHTS = (0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+                   0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+                   0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+                   0.204432940075298892414161999234649, 0.209482141084727828012999174891714)
+GAUSS_WEIGHTS = (0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+                 0.381830050505118944950369775488975, 0.417959183673469387755102040816327)
+
+
+@jit
+def findStarRoot(args, a, b, fa, fb, xtol=1e-14, rtol=4e-16, maxiter=100):
+    '''
+    Brent's method for the root of starResidual(x, args) bracketed by [a, b] with the residuals fa and fb, as in
+    scipy.optimize.brentq
+    '''
+    xpre, xcur, fpre, fcur = a, b, fa, fb
+    xblk, fblk, spre, scur = 0., 0., 0., 0.
+    if fpre == 0:
+        return xpre
+    for _ in range(maxiter):
+        if fpre * fcur < 0:
+            xblk, fblk = xpre, fpre
+            spre = scur = xcur - xpre
+        if abs(fblk) < abs(fcur):
+            xpre, xcur, xblk = xcur, xblk, xcur
+            fpre, fcur, fblk = fcur, fblk, fcur
+        delta = 0.5 * (xtol + rtol * abs(xcur))
+        sbis = 0.5 * (xblk - xcur)
+        if fcur == 0 or abs(sbis) < delta:
+            return xcur
+        if abs(spre) > delta and abs(fcur) < abs(fpre):
+            if xpre == xblk:
+                stry = -fcur * (xcur - xpre) / (fcur - fpre)
+            else:
+                dpre = (fpre - fcur) / (xpre - xcur)
+                dblk = (fblk - fcur) / (xblk - xcur)
+                stry = -fcur * (fblk * dblk - fpre * dpre) / (dblk * dpre * (fblk - fpre))
+            if 2 * abs(stry) < min(abs(spre), 3 * abs(sbis) - delta):
+                spre, scur = scur, stry
+            else:
+                spre, scur = sbis, sbis
+        else:
+            spre, scur = sbis, sbis
+        xpre, fpre = xcur, fcur
+        xcur += scur if abs(scur) > delta else math.copysign(delta, sbis)
+        fcur = starResidual(xcur, args)
+    return xcur
+
+
+@jit
+def integrateRarefaction(args, a, b, tolerance=1e-13, maxIntervals=64):
+    '''
+    Integral of rarefactionIntegrand(s, args) over [a, b] with Gauss-Kronrod 15 point rules on intervals which are
+    bisected until the difference to the embedded Gauss rule of each is below its share of the absolute tolerance
+    '''
+    total = 0.
+    if a == b:
+        return total
+    lower, upper, intervals = a, b, 1
+    # pending intervals as a stack of their upper ends, each one starting at the end of the previous
+    stack = [b]
+    stack.pop()
+    while True:
+        center, halfWidth = 0.5 * (lower + upper), 0.5 * (upper - lower)
+        fCenter = rarefactionIntegrand(center, args)
+        kronrod, gauss = KRONROD_WEIGHTS[7] * fCenter, GAUSS_WEIGHTS[3] * fCenter
+        for k in range(7):
+            pair = rarefactionIntegrand(center - halfWidth * KRONROD_NODES[k], args) + rarefactionIntegrand(
+                center + halfWidth * KRONROD_NODES[k], args)
+            kronrod += KRONROD_WEIGHTS[k] * pair
+            if k % 2 == 1:
+                gauss += GAUSS_WEIGHTS[k // 2] * pair
+        if abs(halfWidth * (kronrod - gauss)) <= tolerance * abs(upper - lower) / abs(b - a) or \
+                intervals >= maxIntervals:
+            total += halfWidth * kronrod
+            if len(stack) == 0:
+                return total
+            lower, upper = upper, stack.pop()
+        else:
+            stack.append(upper)
+            upper = center
+            intervals += 1
+
+
+@jit
+def relativeSpeed(speedL, speedR):
+    return (speedL - speedR) / (1 - speedL * speedR)
+
+
+@jit
+def solveTaubAdiabat(rhoA, pressureA, pressureB, sigma):
+    '''
+    Enthalpy behind a shock in an ideal gas, see IdealEquationOfState.solveTaubAdiabat
+    '''
+    hA = 1 + sigma * pressureA / rhoA
+    c_2 = 1 + (pressureA - pressureB) / (pressureB * sigma)
+    c_1 = -(pressureA - pressureB) / (pressureB * sigma)
+    c_0 = hA * (pressureA - pressureB) / rhoA - hA ** 2
+    if c_2 == 0:
+        return -c_0 / c_1
+    return (-c_1 + math.sqrt(c_1 * c_1 - 4 * c_2 * c_0)) / (2 * c_2)
+
+
+@jit
+def computeShockVxb(rhoA, vxA, vtA, pressureA, pressureB, gamma, sign):
+    '''
+    Normal velocity behind a shock in an ideal gas, see Shock.computeVxb
+    '''
+    dp = pressureB - pressureA
+    if dp == 0:
+        return vxA
+    sigma = gamma / (gamma - 1)
+    hA = 1 + sigma * pressureA / rhoA
+    if abs(dp) <= 1e-8 * pressureA:
+        cs_sqr = gamma * pressureA / (rhoA * hA)
+        J_sqr = rhoA ** 2 * cs_sqr / (1 - cs_sqr)
+    else:
+        hB = solveTaubAdiabat(rhoA, pressureA, pressureB, sigma)
+        J_sqr = dp / (hA / rhoA - (hB - 1) / (sigma * pressureB) * hB)
+    J = math.sqrt(abs(J_sqr))
+    WA = 1 / math.sqrt(1 - vxA ** 2 - vtA ** 2)
+    D = rhoA * WA
+    Vs = (D ** 2 * vxA + sign * J * math.sqrt(J ** 2 + D ** 2 * (1 - vxA ** 2))) / (D ** 2 + J ** 2)
+    Ws = 1 / math.sqrt(1 - Vs ** 2)
+    return (hA * WA * vxA + sign * Ws * dp / J) / (hA * WA + dp * (sign * Ws * vxA / J + 1 / D))
+
+
+@jit
+def rarefactionIntegrand(s, args):
+    '''
+    Integrand of Rarefaction.computeVxb in the coordinate s = sqrt(theta) along the isentrope of an ideal gas, where
+    dp = sigma rho ds^2 cancels the singularity at vacuum: 2 sigma sqrt(h / gamma) sqrt(h^2 + A^2 (1 - cs^2)) /
+    (h^2 + A^2)
+    '''
+    gamma, A = args
+    sigma = gamma / (gamma - 1)
+    h = 1 + sigma * s * s
+    cs_sqr = gamma * s * s / h
+    return 2 * sigma * math.sqrt(h / gamma) * math.sqrt(h * h + A * A * (1 - cs_sqr)) / (h * h + A * A)
+
+
+@jit
+def computeRarefactionVxb(rhoA, vxA, vtA, pressureA, pressureB, gamma, sign):
+    '''
+    Normal velocity behind a rarefaction in an ideal gas, see Rarefaction.computeVxb
+    '''
+    sigma = gamma / (gamma - 1)
+    hA = 1 + sigma * pressureA / rhoA
+    A = hA * vtA / math.sqrt(1 - vxA ** 2 - vtA ** 2)
+    # theta = p / rho on the isentrope p = K rho^gamma
+    thetaB = pressureA / rhoA * (pressureB / pressureA) ** ((gamma - 1) / gamma)
+    integral = integrateRarefaction((gamma, A), math.sqrt(pressureA / rhoA), math.sqrt(thetaB))
+    return math.tanh(math.atanh(vxA) + sign * integral)
+
+
+@jit
+def computeWaveVxb(rhoA, vxA, vtA, pressureA, pressureB, gamma, sign):
+    # shocks compress, rarefactions expand
+    if pressureB > pressureA:
+        return computeShockVxb(rhoA, vxA, vtA, pressureA, pressureB, gamma, sign)
+    return computeRarefactionVxb(rhoA, vxA, vtA, pressureA, pressureB, gamma, sign)
+
+
+@jit
+def starResidual(logp, args):
+    # arctanh(du(p*)) - arctanh(du_0) as in Solver.__solveStar
+    rho1, vx1, vt1, p1, rho6, vx6, vt6, p6, gamma, du_0 = args
+    pressure = math.exp(logp)
+    ux3 = computeWaveVxb(rho1, vx1, vt1, p1, pressure, gamma, -1.)
+    ux4 = computeWaveVxb(rho6, vx6, vt6, p6, pressure, gamma, 1.)
+    du = relativeSpeed(relativeSpeed(vx1, ux3), relativeSpeed(vx6, ux4))
+    return math.atanh(du) - math.atanh(du_0)
+
+
+@jit
+def solveStar(rho1, vx1, vt1, p1, rho6, vx6, vt6, p6, gamma):
+    '''
+    Wave pattern (0: RR*, 1: RR, 2: RS, 3: SS), p* and the normal velocities behind both waves of a Riemann problem
+    in an ideal gas, in the orientation of the Solver (p1 >= p6): p* is bracketed by stepping in log p from p6 and
+    found by Brent's method, with the velocities behind the waves from computeShockVxb and computeRarefactionVxb.
+    '''
+    du_0 = relativeSpeed(vx1, vx6)
+    ux3 = computeRarefactionVxb(rho1, vx1, vt1, p1, 0., gamma, -1.)
+    ux4 = computeRarefactionVxb(rho6, vx6, vt6, p6, 0., gamma, 1.)
+    # vacuum forms if the tails of rarefactions into vacuum separate
+    if ux3 <= ux4:
+        return 0, 0., ux3, ux4
+
+    args = (rho1, vx1, vt1, p1, rho6, vx6, vt6, p6, gamma, du_0)
+    a = math.log(p6)
+    fa = starResidual(a, args)
+    if fa > 0:
+        b, fb = a, fa
+        step = 1.
+        while fa > 0:
+            a -= step
+            step *= 2
+            fa = starResidual(a, args)
+    else:
+        b = math.log(p1) if p1 > p6 else a + 1
+        fb = starResidual(b, args)
+        step = 1.
+        while fb < 0:
+            a, fa = b, fb
+            b += step
+            step *= 2
+            fb = starResidual(b, args)
+    pressure = math.exp(findStarRoot(args, a, b, fa, fb))
+    # as the reference path, the contact moves with the velocity behind the wave of state 6 on both sides
+    ux_star = computeWaveVxb(rho6, vx6, vt6, p6, pressure, gamma, 1.)
+    pattern = 1 if pressure < p6 else 2 if pressure < p1 else 3
+    return pattern, pressure, ux_star, ux_star
@@ -1,13 +1,19 @@
 from .State import State
-from scipy import integrate, optimize
-from .EquationOfState import EntropyConservation, IdealEquationOfState
+from .StateArray import StateArray
+from .EquationOfState import EntropyConservation, EquationOfState
+from .IsentropeIntegral import IsentropeIntegral
+from .RootFinder import findRootBracketed
+from .SolverStats import recordCount, recordPhase
 
 from .Util import *
 
 
 class Rarefaction:
+    # Width of the panels (in the isentrope coordinate s) of the fan table used by computeRarefactionStates
+    fanPanelWidth = 0.25
+
     @classmethod
-    def fromStateAheadAndSpeedPressureBehind(cls, stateA, speedB, pressureB, eos: IdealEquationOfState, sign):
+    def fromStateAheadAndSpeedPressureBehind(cls, stateA, speedB, pressureB, eos: EquationOfState, sign):
         isentrope = EntropyConservation.fromState(stateA, eos)
 
         A = computeA(stateA, eos)
@@ -28,22 +34,65 @@ class Rarefaction:
         return (a - b * xi) / (a * xi - b)
 
     @staticmethod
-    def computeVxb(stateA, pressureB, isentrope: EntropyConservation, sign, A=None):
-        if A is None:
+    def computeEnthalpy(isentrope: EntropyConservation, pressure, rho):
+        '''
+        Specific enthalpy on the isentrope, 1 at the vacuum tail of a fan (rho = 0) as in StateArray.enthalpy
+        '''
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(rho > 0, isentrope.computeEnthalpy(pressure, rho=rho), 1.)
+
+    @staticmethod
+    def computeVxb(stateA, pressureB, isentrope: EntropyConservation, sign, A=None, integral: IsentropeIntegral = None):
+        '''
+        Normal velocity behind the rarefaction. If the precomputed isentrope integral of stateA is given it is used
+        instead of adaptive quadrature. For arrays of pressures such an integral table is built once up to the largest
+        pressure, so that whole wave curves are evaluated in one call. Single pressures without a table are integrated
+        by the adaptive quadrature of SciPy if it is installed, and with such a table otherwise.
+        '''
+        if integral is None and A is None:
             A = computeA(stateA, isentrope)
-        A_sqr = A ** 2
+        if integral is None and np.ndim(pressureB) == 0:
+            # (SciPy is only imported here, the solver always uses isentrope tables)
+            try:
+                from scipy import integrate
+            except ImportError:
+                integrate = None
+            if integrate is not None:
+                integral, _, info = integrate.quad(Rarefaction.computeIntegrand, stateA.pressure, pressureB,
+                                                   args=(isentrope, A), full_output=True)[:3]
+                recordCount('quadCalls')
+                recordCount('quadSubdivisions', info['last'])
+                B = 0.5 * np.log((1 + stateA.vx) / (1 - stateA.vx)) + sign * integral
+                return np.tanh(B)
+
+        if integral is None:
+            integral = IsentropeIntegral(isentrope, A, max(stateA.pressure, np.max(pressureB, initial=0)))
+        return np.tanh(np.arctanh(stateA.vx) + sign * integral.integrate(stateA.pressure, pressureB))
 
-        def integrand(_pressure):
-            rho = isentrope.computeRho(_pressure)
-            h = isentrope.computeEnthalpy(_pressure, rho=rho)
-            cs = isentrope.computeSpeedOfSound(_pressure, rho=rho, h=h)
-            h_sqr = h ** 2
-            cs_sqr = cs ** 2
-            return np.sqrt(h_sqr + A_sqr * (1 - cs_sqr)) / ((h_sqr + A_sqr) * rho * cs)
+    @staticmethod
+    def computeIntegrand(pressure, isentrope: EntropyConservation, A):
+        '''
+        Integrand of computeVxb, i.e. the derivative of the rapidity arctanh(vx) along the isentrope (times sign)
+        '''
+        rho = isentrope.computeRho(pressure)
+        h = isentrope.computeEnthalpy(pressure, rho=rho)
+        cs = isentrope.computeSpeedOfSound(pressure, rho=rho, h=h)
+        h_sqr = h ** 2
+        A_sqr = A ** 2
+        return np.sqrt(h_sqr + A_sqr * (1 - cs ** 2)) / ((h_sqr + A_sqr) * rho * cs)
 
-        B = 0.5 * np.log((1 + stateA.vx) / (1 - stateA.vx)) + sign * \
-            integrate.quad(integrand, stateA.pressure, pressureB)[0]
-        return np.tanh(B)
+    @staticmethod
+    def computeDVxbDp(stateA, pressureB, isentrope: EntropyConservation, sign, A=None, vxB=None,
+                      integral: IsentropeIntegral = None):
+        '''
+        Derivative of computeVxb with respect to pressureB, which is the integrand times 1 - vxB^2.
+        The velocity behind the rarefaction is computed if not given.
+        '''
+        if A is None:
+            A = computeA(stateA, isentrope)
+        if vxB is None:
+            vxB = Rarefaction.computeVxb(stateA, pressureB, isentrope, sign, A=A, integral=integral)
+        return sign * (1 - vxB ** 2) * Rarefaction.computeIntegrand(pressureB, isentrope, A)
 
     @staticmethod
     def xi_interface(state, isentrope: EntropyConservation, sign):
@@ -54,14 +103,15 @@ class Rarefaction:
                 + sign * cs * np.sqrt((1 - speed_sqr) * (1 - speed_sqr * cs_sqr - state.vx ** 2 * (1 - cs_sqr)))
                 ) / (1 - speed_sqr * cs_sqr)
 
-    def __init__(self, stateA, stateB, eos: IdealEquationOfState, sign):
+    def __init__(self, stateA, stateB, eos: EquationOfState, sign):
         self.stateA = stateA
         self.stateB = stateB
         self.eos = eos
 
         self.sign = sign
         self.isentrope = EntropyConservation.fromState(stateA, eos)
-        assert (np.abs(
+        # (a rarefaction into vacuum has no entropy behind it)
+        assert (stateB.pressure == 0 or np.abs(
             self.isentrope.isentropicConstant - EntropyConservation.fromState(stateB, eos).isentropicConstant)
                 < 1e-10 * self.isentrope.isentropicConstant)
 
@@ -69,23 +119,136 @@ class Rarefaction:
         self.speedTail = self.xi_interface(stateB, self.isentrope, sign)
 
         self.A = computeA(stateA, eos)
+        self.__integral = None
+        self.__fanTable = None
+
+    @property
+    def integral(self):
+        '''
+        Isentrope integral of stateA, only tabulated once states inside the fan are requested
+        '''
+        if self.__integral is None:
+            self.__integral = IsentropeIntegral(self.isentrope, self.A, self.stateA.pressure)
+        return self.__integral
 
     def computeRarefactionState(self, xi):
         pmin = min(self.stateA.pressure, self.stateB.pressure)
         pmax = max(self.stateA.pressure, self.stateB.pressure)
         state = State()
 
-        state.pressure = optimize.brentq(lambda pressure:
-                                         self.ux(xi, pressure, self.A, self.isentrope, self.sign) -
-                                         self.computeVxb(self.stateA, pressure, self.isentrope, self.sign, A=self.A),
-                                         pmin, pmax)
+        def residual(pressure):
+            recordCount('rarefactionIterations')
+            return self.ux(xi, pressure, self.A, self.isentrope, self.sign) - self.computeVxb(
+                self.stateA, pressure, self.isentrope, self.sign, A=self.A, integral=self.integral)
+
+        with recordPhase('rarefaction'):
+            state.pressure = float(findRootBracketed(residual, pmin, pmax))
 
         state.rho = self.isentrope.computeRho(state.pressure)
         state.vx = self.ux(xi, state.pressure, self.A, self.isentrope, self.sign)
-        h = self.isentrope.computeEnthalpy(state.pressure, rho=state.rho)
+        h = float(self.computeEnthalpy(self.isentrope, state.pressure, state.rho))
         state.vt = computeVt(self.A, state.vx, h)
         return state
 
+    @staticmethod
+    def xiCharacteristic(s, vx, A, eos: EquationOfState, sign):
+        '''
+        Inverse of ux: the self similar coordinate of the characteristic carrying (s, vx) in the isentrope coordinate s
+        '''
+        h, cs, _ = eos.computeCoordinateQuantities(s)
+        a = cs * h
+        b = sign * np.sqrt(A ** 2 * (1 - cs ** 2) + h ** 2)
+        return (a + b * vx) / (a * vx + b)
+
+    def __buildFanTable(self):
+        # Normal velocity and characteristic speed on a grid in s spanning the fan from tail to head
+        sTail = self.isentrope.computeCoordinate(self.stateB.pressure)
+        sHead = self.isentrope.computeCoordinate(self.stateA.pressure)
+        nPanels = max(1, int(np.ceil((sHead - sTail) / self.fanPanelWidth)))
+        sNodes = np.linspace(sTail, sHead, nPanels + 1)
+        vxNodes = self.__computeVxCoordinate(sNodes)
+        self.__fanTable = (sNodes, self.xiCharacteristic(sNodes, vxNodes, self.A, self.eos, self.sign))
+
+    def __computeVxCoordinate(self, s):
+        integral = self.integral.computeIntegralCoordinate(s) - self.integral.computeIntegral(self.stateA.pressure)
+        return np.tanh(np.arctanh(self.stateA.vx) + self.sign * integral)
+
+    def computeRarefactionStates(self, xis, xtol=1e-14, maxiter=100):
+        '''
+        Batched version of computeRarefactionState: solves for all xi simultaneously with a bracketed regula falsi
+        iteration in the isentrope coordinate against the isentrope integral, starting from a table of the fan
+        built once per rarefaction.
+        Values of xi outside of the fan are clamped to its head or tail.
+        '''
+        with recordPhase('rarefaction'):
+            return self.__computeRarefactionStates(xis, xtol, maxiter)
+
+    def __computeRarefactionStates(self, xis, xtol, maxiter):
+        if self.__fanTable is None:
+            self.__buildFanTable()
+        sNodes, xiNodes = self.__fanTable
+        nPanels = len(sNodes) - 1
+
+        xis = np.asarray(xis, dtype=float)
+        shape = xis.shape
+        xis = xis.ravel()
+
+        ascending = xiNodes[-1] >= xiNodes[0]
+        xiSorted = xiNodes if ascending else xiNodes[::-1]
+        xis = np.clip(xis, xiSorted[0], xiSorted[-1])
+        panel = np.clip(np.searchsorted(xiSorted, xis) - 1, 0, nPanels - 1)
+        if not ascending:
+            panel = nPanels - 1 - panel
+
+        def residual(s):
+            recordCount('rarefactionIterations')
+            return self.xiCharacteristic(s, self.__computeVxCoordinate(s), self.A, self.eos, self.sign) - xis
+
+        s = findRootBracketed(residual, sNodes[panel], sNodes[panel + 1], xiNodes[panel] - xis,
+                              xiNodes[panel + 1] - xis, xtol=xtol, maxiter=maxiter)
+
+        pressure = self.isentrope.computePressureFromCoordinate(s)
+        rho = self.isentrope.computeRho(pressure)
+        vx = self.ux(xis, pressure, self.A, self.isentrope, self.sign)
+        h = self.computeEnthalpy(self.isentrope, pressure, rho)
+        vt = computeVt(self.A, vx, h)
+        return StateArray(rho=rho.reshape(shape), vx=vx.reshape(shape), vt=vt.reshape(shape),
+                          pressure=pressure.reshape(shape))
+
+    @staticmethod
+    def computeFanStates(stateA, stateB, xis, eos: EquationOfState, sign, xtol=1e-14, maxiter=100):
+        '''
+        States inside a batch of rarefaction fans with one xi per fan, e.g. the states at the interfaces of a
+        finite-volume grid. The fans lead from the StateArray stateA (ahead) to stateB (behind), the isentrope integrals
+        of all fans are tabulated in one batch and the states are found with the iteration of computeRarefactionStates,
+        bracketed by the tail and the head of each fan. Values of xi outside of a fan are clamped to it.
+        '''
+        with recordPhase('rarefaction'):
+            isentrope = EntropyConservation.fromState(stateA, eos)
+            A = computeA(stateA, eos)
+            integral = IsentropeIntegral(isentrope, A, stateA.pressure)
+            sHead = isentrope.computeCoordinate(stateA.pressure)
+            sTail = isentrope.computeCoordinate(stateB.pressure)
+            integralHead = integral.computeIntegralCoordinate(sHead)
+
+            def computeVx(s):
+                return np.tanh(np.arctanh(stateA.vx) + sign * (integral.computeIntegralCoordinate(s) - integralHead))
+
+            def residual(s):
+                recordCount('rarefactionIterations')
+                return Rarefaction.xiCharacteristic(s, computeVx(s), A, eos, sign) - xis
+
+            xiTail = Rarefaction.xiCharacteristic(sTail, computeVx(sTail), A, eos, sign)
+            xiHead = Rarefaction.xiCharacteristic(sHead, stateA.vx, A, eos, sign)
+            xis = np.clip(xis, np.minimum(xiTail, xiHead), np.maximum(xiTail, xiHead))
+            s = findRootBracketed(residual, sTail, sHead, xiTail - xis, xiHead - xis, xtol=xtol, maxiter=maxiter)
+
+            pressure = isentrope.computePressureFromCoordinate(s)
+            rho = isentrope.computeRho(pressure)
+            vx = Rarefaction.ux(xis, pressure, A, isentrope, sign)
+            vt = computeVt(A, vx, Rarefaction.computeEnthalpy(isentrope, pressure, rho))
+        return StateArray(rho=rho, vx=vx, vt=vt, pressure=pressure)
+
     def __str__(self):
         return f'Rarefaction: vHead={self.speedHead:.3f}, vTail={self.speedTail:.3f}'
 
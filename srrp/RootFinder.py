@@ -0,0 +1,79 @@
+import numpy as np
+
+
+def findRootBracketed(function, a, b, fa=None, fb=None, xtol=1e-14, maxiter=100):
+    '''
+    Vectorised modified regula falsi iteration (with the Anderson-Bjorck weighting of the retained end point) for
+    independent roots of `function`, each bracketed by the corresponding entries of a and b. The function is always
+    evaluated on arrays of the full shape, entries which already converged are carried along unchanged.
+    '''
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    fa = function(a) if fa is None else fa
+    fb = function(b) if fb is None else fb
+    for _ in range(maxiter):
+        converged = (np.abs(b - a) <= xtol * (1 + np.abs(b))) | (fb == 0)
+        if np.all(converged):
+            break
+        denominator = np.where(fb != fa, fb - fa, 1)
+        c = np.where(converged | (fb == fa), b, (a * fb - b * fa) / denominator)
+        fc = np.where(converged, fb, function(c))
+        crossed = np.sign(fc) != np.sign(fb)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            m = 1 - fc / fb
+        m = np.where(m > 0, m, 0.5)
+        a, fa = np.where(crossed, b, a), np.where(crossed, fb, m * fa)
+        b, fb = c, fc
+    return b
+
+
+def findRootNewton(function, a, b, x, fa=None, xtol=1e-14, maxiter=100):
+    '''
+    Vectorised Newton iteration, safeguarded by the brackets [a, b] of the roots, starting from x inside them.
+    `function` returns the values and the derivatives. Every evaluation narrows the brackets, and steps which would
+    leave them (or have no usable derivative) are replaced by bisection, or by unit steps towards an infinite b.
+    An entry has converged once its step is below xtol (relative to 1 + |x|), or once it is below sqrt(xtol) and the
+    next step, extrapolated from the quadratic convergence of the last two steps, would be.
+    '''
+    a, b, x = [np.array(value, dtype=float) for value in np.broadcast_arrays(a, b, x)]
+    fa = function(a)[0] if fa is None else fa
+    converged = np.zeros(x.shape, dtype=bool)
+    lastStep = np.full(x.shape, np.inf)
+    for _ in range(maxiter):
+        f, df = function(x)
+        crossed = np.sign(f) != np.sign(fa)
+        a, fa = np.where(crossed, a, x), np.where(crossed, fa, f)
+        b = np.where(crossed, x, b)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xNew = x - f / df
+        isNewton = np.isfinite(xNew) & (xNew >= a) & (xNew <= b)
+        xNew = np.where(isNewton, xNew, np.where(np.isinf(b), x + 1, 0.5 * (a + b)))
+
+        step = np.abs(xNew - x)
+        tolerance = xtol * (1 + np.abs(x))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            extrapolated = step ** 3 / lastStep ** 2
+        stop = converged | (f == 0)
+        converged = stop | (step <= tolerance) | (isNewton & (step <= np.sqrt(tolerance)) & (extrapolated <= tolerance))
+        lastStep = np.where(isNewton, step, np.inf)
+        x = np.where(stop, x, xNew)
+        if np.all(converged):
+            break
+    return x
+
+
+def findRootNewtonUnbounded(function, x, xtol=1e-14, maxiter=50):
+    '''
+    Vectorised plain Newton iteration from x for roots of smooth monotone functions without known brackets, e.g.
+    inversions of equations of state. `function` returns the values and the derivatives. Entries with non-finite steps
+    are left as they are.
+    '''
+    x = np.array(x, dtype=float)
+    for _ in range(maxiter):
+        f, df = function(x)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = f / df
+        step = np.where(np.isfinite(step), step, 0)
+        x = x - step
+        if np.all(np.abs(step) <= xtol * (1 + np.abs(x))):
+            break
+    return x
@@ -1,12 +1,12 @@
 import numpy as np
-from .EquationOfState import IdealEquationOfState
+from .EquationOfState import EquationOfState
 from .Util import *
 from .State import State
 
 
 class Shock:
     @classmethod
-    def fromStateAheadAndSpeedPressureBehind(cls, stateA, speedB, pressureB, eos: IdealEquationOfState, sign):
+    def fromStateAheadAndSpeedPressureBehind(cls, stateA, speedB, pressureB, eos: EquationOfState, sign):
         hB = Shock.computeTaubAdiabat(stateA, pressureB, eos)
         A = computeA(stateA, eos)
 
@@ -18,53 +18,93 @@ class Shock:
         return cls(stateA, stateB, eos, sign)
 
     @staticmethod
-    def computeTaubAdiabat(stateA, pressureB, eos: IdealEquationOfState):
-        hA = eos.computeEnthalpy(stateA.pressure, stateA.rho)
-        c_2 = (1. + (stateA.pressure - pressureB) / (pressureB * eos.sigma))
-        c_1 = - (stateA.pressure - pressureB) / (pressureB * eos.sigma)
-        c_0 = hA * (stateA.pressure - pressureB) / stateA.rho - hA ** 2
-        if c_2 == 0:
-            hB = - c_0 / c_1
-        else:
-            hB = (-c_1 + np.sqrt(c_1 * c_1 - 4 * c_2 * c_0)) / (2 * c_2)
-        return hB
+    def computeTaubAdiabat(stateA, pressureB, eos: EquationOfState):
+        '''
+        Enthalpy behind the shock from the Taub adiabat, elementwise for pressure arrays
+        '''
+        return eos.computeTaubAdiabat(stateA, pressureB)
 
     @staticmethod
-    def computeJ(stateA, stateB, eos: IdealEquationOfState):
-        return np.sqrt((stateB.pressure - stateA.pressure) / (
-                eos.computeEnthalpy(stateA.pressure, stateA.rho) / stateA.rho
-                - eos.computeEnthalpy(stateB.pressure, stateB.rho) / stateB.rho))
+    def computeJ(stateA, stateB, eos: EquationOfState):
+        return np.sqrt(Shock.computeJ_sqr(stateA.pressure, stateB.pressure,
+                                          eos.computeEnthalpy(stateA.pressure, stateA.rho),
+                                          eos.computeEnthalpy(stateB.pressure, stateB.rho), eos))
 
     @staticmethod
     def computeShockSpeed(stateA, J, sign):
         D = stateA.rho * stateA.lorentz()
         return (D ** 2 * stateA.vx + sign * J * np.sqrt(J ** 2 + D ** 2 * (1 - stateA.vx ** 2))) / (D ** 2 + J ** 2)
 
-    # @staticmethod
-    # def computeJ_sqr(stateA, pressureB, eos: IdealEquationOfState):
-    #     hA = eos.computeEnthalpy(stateA.pressure, stateA.rho)
-    #     hB = Shock.computeTaubAdiabat(stateA, pressureB, eos)
-    #     return - eos.sigma * (stateA.pressure - pressureB) / (
-    #             hA * (hA - 1.) / stateA.pressure - hB * (hB - 1.) / pressureB)
-
     @staticmethod
-    def computeJ_sqr(pressureA, pressureB, hA, hB, eos: IdealEquationOfState):
-        return - eos.sigma * (pressureA - pressureB) / (
-                hA * (hA - 1.) / pressureA - hB * (hB - 1.) / pressureB)
+    def computeJ_sqr(pressureA, pressureB, hA, hB, eos: EquationOfState):
+        '''
+        Squared mass flux through the shock, elementwise for pressure arrays. For zero strength (pressureB = pressureA)
+        the limit rhoA^2 cs^2 / (1 - cs^2) is returned, also for relative strengths below 1e-8 where the difference of
+        hB / rhoB and hA / rhoA is lost to cancellation.
+        '''
+        dp = np.subtract(pressureB, pressureA)
+        rhoA = eos.computeRho(pressureA, hA)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            J_sqr = dp / (hA / rhoA - hB / eos.computeRho(pressureB, hB))
+            cs_sqr = eos.computeSpeedOfSound(pressureA, rhoA) ** 2
+            J_sqr = np.where(np.abs(dp) <= 1e-8 * np.abs(pressureA), rhoA ** 2 * cs_sqr / (1 - cs_sqr), J_sqr)
+        return J_sqr[()]
 
     @staticmethod
     def computeVxb(stateA, pressureB, eos, sign):
+        '''
+        Normal velocity behind the shock, elementwise for pressure arrays (zero strength shocks leave it unchanged)
+        '''
         hA = eos.computeEnthalpy(stateA.pressure, stateA.rho)
         hB = Shock.computeTaubAdiabat(stateA, pressureB, eos)
         J_sqr = Shock.computeJ_sqr(stateA.pressure, pressureB, hA, hB, eos)
         J = np.sqrt(np.abs(J_sqr))
         Vs = Shock.computeShockSpeed(stateA, J, sign)
         Ws = computeLorentz(Vs)
+        dp = np.subtract(pressureB, stateA.pressure)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vxB = (hA * stateA.lorentz() * stateA.vx + sign * Ws * dp / J) / (
+                    hA * stateA.lorentz() + dp * (sign * Ws * stateA.vx / J + 1 / (stateA.rho * stateA.lorentz())))
+        return np.where(dp == 0, stateA.vx, vxB)[()]
+
+    @staticmethod
+    def computeDVxbDp(stateA, pressureB, eos, sign):
+        '''
+        Derivative of computeVxb with respect to pressureB, by the chain rule through the Taub adiabat, the mass flux
+        and the shock speed. It is not finite for (nearly) zero strength shocks, which root finders treat as having no
+        usable derivative.
+        '''
         hA = eos.computeEnthalpy(stateA.pressure, stateA.rho)
+        WA = stateA.lorentz()
+        D = stateA.rho * WA
+        dp = pressureB - stateA.pressure
+
+        hB = Shock.computeTaubAdiabat(stateA, pressureB, eos)
+        dhB = eos.computeTaubAdiabatDerivative(stateA, pressureB, hB)
+        rhoB = eos.computeRho(pressureB, hB)
+        rhoP, rhoH = eos.computeRhoDerivatives(pressureB, hB)
+
+        # J^2 = dp / (hA / rhoA - hB / rhoB)
+        denominator = hA / stateA.rho - hB / rhoB
+        dDenominator = -dhB / rhoB + hB / rhoB ** 2 * (rhoP + rhoH * dhB)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            J_sqr = dp / denominator
+            dJ_sqr = (denominator - dp * dDenominator) / denominator ** 2
+            J = np.sqrt(np.abs(J_sqr))
+            dJ = np.sign(J_sqr) * dJ_sqr / (2 * J)
+
+            root = np.sqrt(J ** 2 + D ** 2 * (1 - stateA.vx ** 2))
+            Vs = (D ** 2 * stateA.vx + sign * J * root) / (D ** 2 + J ** 2)
+            dVs = (sign * (root + J ** 2 / root) - 2 * J * Vs) * dJ / (D ** 2 + J ** 2)
+            Ws = computeLorentz(Vs)
+            dWs = Ws ** 3 * Vs * dVs
 
-        return (hA * stateA.lorentz() * stateA.vx + sign * Ws * (pressureB - stateA.pressure) / J) / (
-                hA * stateA.lorentz() + (pressureB - stateA.pressure) * (
-                sign * Ws * stateA.vx / J + 1 / (stateA.rho * stateA.lorentz())))
+            T = sign * Ws * dp / J
+            dT = sign * ((dWs * dp + Ws) / J - Ws * dp * dJ / J ** 2)
+            numerator = hA * WA * stateA.vx + T
+            denominator = hA * WA + stateA.vx * T + dp / D
+            return (dT * denominator - numerator * (stateA.vx * dT + 1 / D)) / denominator ** 2
 
     def __init__(self, stateA, stateB, eos, sign):
         self.stateA = stateA
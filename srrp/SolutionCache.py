@@ -0,0 +1,81 @@
+import collections
+import math
+import threading
+
+from .Solver import Solver
+
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class SolutionCache:
+    '''
+    Opt-in memoization of Solver.solve with least recently used eviction:
+
+        cache = SolutionCache(maxsize=256)
+        solution = cache.solve(stateL, stateR, gamma)
+
+    Problems are keyed on the values of the left/right states and gamma. With a non-zero tolerance all values are
+    quantized to that relative resolution first, so nearly identical problems share an entry. At most maxsize
+    solutions are kept (None: unbounded). The cached Wavefans are shared between callers and must not be modified.
+    '''
+
+    def __init__(self, maxsize=128, tolerance=0):
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.hits = 0
+        self.misses = 0
+        self.__solutions = collections.OrderedDict()
+        self.__lock = threading.Lock()
+
+    def quantize(self, value):
+        value = float(value)
+        if self.tolerance == 0 or value == 0 or not math.isfinite(value):
+            return value
+        mantissa, exponent = math.frexp(value)
+        return exponent, round(mantissa / self.tolerance)
+
+    def key(self, stateL, stateR, gamma):
+        return tuple(self.quantize(value) for value in [
+            stateL.rho, stateL.vx, stateL.vt, stateL.pressure,
+            stateR.rho, stateR.vx, stateR.vt, stateR.pressure, gamma])
+
+    def solve(self, stateL, stateR, gamma):
+        key = self.key(stateL, stateR, gamma)
+        with self.__lock:
+            solution = self.__solutions.get(key)
+            if solution is not None:
+                self.__solutions.move_to_end(key)
+                self.hits += 1
+                return solution
+            self.misses += 1
+
+        solution = Solver().solve(stateL, stateR, gamma)
+
+        with self.__lock:
+            self.__solutions[key] = solution
+            self.__solutions.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self.__solutions) > self.maxsize:
+                    self.__solutions.popitem(last=False)
+        return solution
+
+    def __contains__(self, problem):
+        return self.key(*problem) in self.__solutions
+
+    def __len__(self):
+        return len(self.__solutions)
+
+    def cacheInfo(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.__solutions))
+
+    def clear(self):
+        with self.__lock:
+            self.__solutions.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __str__(self):
+        return f'SolutionCache: hits={self.hits}, misses={self.misses}, size={len(self)}/{self.maxsize}'
+
+    def __repr__(self):
+        return str(self)
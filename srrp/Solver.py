@@ -1,19 +1,23 @@
-import scipy.optimize as opt
-import scipy.integrate as integrate
 import numpy as np
 import copy
 
 from .Shock import Shock
 from .Rarefaction import Rarefaction
-from .EquationOfState import IdealEquationOfState, EntropyConservation
+from .EquationOfState import EquationOfState, IdealEquationOfState, getEquationOfState
+from .IsentropeIntegral import IsentropeIntegral
+from .RootFinder import findRootNewton
+from .BatchSolution import BatchSolution
+from .StarSolution import StarSolution
+from .SolverStats import SolverStats, recordCount, recordPhase
 from .Util import *
 
 from .ContactDiscontinuity import ContactDiscontinuity
 from .State import State
+from .StateArray import StateArray
 from .Wavefan import Wavefan
 
 
-def getWavefan(state1: State, state6: State, cdSpeed, cdPressure, eos: IdealEquationOfState, waveLType, waveRtype,
+def getWavefan(state1: State, state6: State, cdSpeed, cdPressure, eos: EquationOfState, waveLType, waveRtype,
                reversed=False):
     waveL = waveLType.fromStateAheadAndSpeedPressureBehind(state1, cdSpeed, cdPressure, eos, sign=-1)
     state3 = waveL.stateB
@@ -26,6 +30,95 @@ def getWavefan(state1: State, state6: State, cdSpeed, cdPressure, eos: IdealEqua
     return Wavefan(states, waves, reversed)
 
 
+def getVacuumWavefan(state1: State, state6: State, vx3, vx6, eos: EquationOfState, reversed=False):
+    '''
+    Two rarefactions into vacuum, whose tails move with the normal velocities vx3 and vx6. The vacuum in between is
+    split by a zero pressure contact discontinuity.
+    '''
+    waveL = Rarefaction.fromStateAheadAndSpeedPressureBehind(state1, vx3, 0., eos, sign=-1)
+    waveR = Rarefaction.fromStateAheadAndSpeedPressureBehind(state6, vx6, 0., eos, sign=+1)
+    cd = ContactDiscontinuity(0.5 * (vx3 + vx6), 0.)
+    states = [state1, waveL.stateB, waveR.stateB, state6]
+    waves = [waveL, cd, waveR]
+
+    return Wavefan(states, waves, reversed)
+
+
+def broadcastStates(statesL, statesR):
+    '''
+    Flat StateArrays of left and right states with array (or scalar) attributes, broadcast together
+    '''
+    arrays = np.broadcast_arrays(*[np.asarray(getattr(states, var), dtype=float)
+                                   for states in [statesL, statesR] for var in StateArray.variables])
+    arrays = [array.ravel() for array in arrays]
+    return StateArray(*arrays[:4]), StateArray(*arrays[4:])
+
+
+def findInvalidStates(stateL, stateR):
+    '''
+    Indices of the problems (of flat StateArrays) with a non-positive or non-finite density or pressure, or a speed not
+    below the speed of light
+    '''
+    invalid = np.zeros(len(stateL.pressure), dtype=bool)
+    for state in [stateL, stateR]:
+        with np.errstate(invalid='ignore'):
+            invalid |= ~((state.rho > 0) & (state.pressure > 0) & np.isfinite(state.rho) & np.isfinite(state.pressure)
+                         & (state.vx ** 2 + state.vt ** 2 < 1))
+    return np.flatnonzero(invalid)
+
+
+def orientStates(stateA, stateB, reversed):
+    '''
+    Swap the StateArrays stateA and stateB and mirror their normal velocities where reversed
+    '''
+
+    def orient(first, second):
+        return StateArray(rho=np.where(reversed, second.rho, first.rho),
+                          vx=np.where(reversed, -second.vx, first.vx), vt=np.where(reversed, second.vt, first.vt),
+                          pressure=np.where(reversed, second.pressure, first.pressure))
+
+    return orient(stateA, stateB), orient(stateB, stateA)
+
+
+def computeWavesBatch(stateA, pressureB, vxB, isShock, isentrope, eos, sign):
+    '''
+    State behind and outer/inner edge speeds of a batch of shocks or rarefactions
+    '''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hShock = Shock.computeTaubAdiabat(stateA, pressureB, eos)
+        h = np.where(isShock, hShock, isentrope.computeEnthalpy(pressureB))
+        stateB = State()
+        stateB.rho = np.where(isShock, eos.computeRho(pressureB, hShock), isentrope.computeRho(pressureB))
+        stateB.vx = vxB
+        stateB.vt = computeVt(computeA(stateA, eos), vxB, h)
+        stateB.pressure = pressureB
+
+        shockSpeed = Shock.computeShockSpeed(stateA, Shock.computeJ(stateA, stateB, eos), sign)
+        head = Rarefaction.xi_interface(stateA, isentrope, sign)
+        tail = np.where(pressureB > 0, Rarefaction.xi_interface(stateB, isentrope, sign), vxB)
+    return stateB, np.where(isShock, shockSpeed, head), np.where(isShock, shockSpeed, tail)
+
+
+def getBatchSolution(state1, state6, reversed, solutionType, p_star, ux3, ux4, isentrope1, isentrope6, eos):
+    '''
+    BatchSolution of problems in the orientation of the solver (state1 has the higher pressure, see reversed), given
+    their wave patterns, p* and the normal velocities behind both waves
+    '''
+    isShock1 = solutionType == 'SS'
+    isShock6 = isShock1 | (solutionType == 'RS')
+    state3, outer1, inner1 = computeWavesBatch(state1, p_star, ux3, isShock1, isentrope1, eos, sign=-1)
+    state4, outer6, inner6 = computeWavesBatch(state6, p_star, ux4, isShock6, isentrope6, eos, sign=+1)
+    contactSpeed = np.where(solutionType == 'RR*', np.nan, ux4)
+    waveSpeeds = np.stack([outer1, inner1, contactSpeed, inner6, outer6], axis=-1)
+
+    stateL, stateR = orientStates(state1, state6, reversed)
+    stateL_prime, stateR_prime = orientStates(state3, state4, reversed)
+    return BatchSolution(solutionType, reversed, p_star, np.where(reversed, -contactSpeed, contactSpeed),
+                         [stateL, stateL_prime, stateR_prime, stateR],
+                         np.where(reversed[:, np.newaxis], -waveSpeeds[:, ::-1], waveSpeeds),
+                         np.where(reversed, isShock6, isShock1), np.where(reversed, isShock1, isShock6), eos=eos)
+
+
 class Solver:
     '''
     Solve SRHD Riemann Problem with non-zero tangential velocity:
@@ -35,7 +128,26 @@ class Solver:
     see paper
         Rezzolla_Zanotti_2003_Fluid_Mech_479
         DOI: 10.1017/S0022112002003506
+
+    The gas is given by the adiabatic index gamma of an ideal gas or by an EquationOfState, e.g.
+    TaubMathewsEquationOfState() or a TabulatedEquationOfState.
+    Pass a SolverStats object to record timings and evaluation counts of the solves.
+
+    backend selects how solve and solve_star find the star region of ideal gases: 'numpy' (the default) tabulates the
+    isentrope integrals of both states (IsentropeIntegral) and iterates on them, 'kernels' calls the scalar
+    Kernels.solveStar with Brent's method and Gauss-Kronrod quadrature, which is compiled if Numba is installed (and
+    imported on the first solve). Both agree to about 1e-12 in p*, also for p* close to vacuum. Other equations of
+    state and solve_many always use 'numpy', and the inspection of the reference path (get_du*, predict_p_star,
+    iterations) is only available after solves with 'numpy'. The kernels are therefore not selected automatically when
+    Numba is installed, so that Solver() supports the inspection either way and importing srrp does not import Numba.
     '''
+    backends = ['numpy', 'kernels']
+
+    def __init__(self, stats: SolverStats = None, backend='numpy'):
+        if backend not in self.backends:
+            raise ValueError(f'unknown backend {backend}, choose from {self.backends}')
+        self.stats = stats
+        self.backend = backend
 
     def get_du_SS(self, p_star):
         ux3 = Shock.computeVxb(self.state1, p_star, self.eos, sign=-1)
@@ -46,22 +158,50 @@ class Solver:
         return relativeSpeed(v13, v64)
 
     def get_du_RS(self, p_star):
-        isentrope1 = EntropyConservation.fromState(self.state1, self.eos)
-        ux3 = Rarefaction.computeVxb(self.state1, p_star, isentrope1, sign=-1)
+        ux3 = Rarefaction.computeVxb(self.state1, p_star, self.integral1.isentrope, sign=-1, integral=self.integral1)
         ux4 = Shock.computeVxb(self.state6, p_star, self.eos, sign=+1)
         v13 = relativeSpeed(self.state1.vx, ux3)
         v64 = relativeSpeed(self.state6.vx, ux4)
         return relativeSpeed(v13, v64)
 
     def get_du_RR(self, p_star):
-        isentrope1 = EntropyConservation.fromState(self.state1, self.eos)
-        isentrope6 = EntropyConservation.fromState(self.state6, self.eos)
-        ux3 = Rarefaction.computeVxb(self.state1, p_star, isentrope1, sign=-1)
-        ux4 = Rarefaction.computeVxb(self.state6, p_star, isentrope6, sign=+1)
+        ux3 = Rarefaction.computeVxb(self.state1, p_star, self.integral1.isentrope, sign=-1, integral=self.integral1)
+        ux4 = Rarefaction.computeVxb(self.state6, p_star, self.integral6.isentrope, sign=+1, integral=self.integral6)
         v13 = relativeSpeed(self.state1.vx, ux3)
         v64 = relativeSpeed(self.state6.vx, ux4)
         return relativeSpeed(v13, v64)
 
+    def get_du(self, p_star):
+        '''
+        Velocity jump for any p* (scalar or array): du_RR below p_6, du_RS between p_6 and p_1 and du_SS above p_1,
+        see Figure 2 in Paper
+        '''
+        p_star = np.asarray(p_star, dtype=float)
+        p1, p6 = self.state1.pressure, self.state6.pressure
+        return np.piecewise(p_star, [p_star < p6, (p6 <= p_star) & (p_star < p1), p1 <= p_star],
+                            [self.get_du_RR, self.get_du_RS, self.get_du_SS])[()]
+
+    def get_du_and_derivative(self, pattern, p_star):
+        '''
+        Velocity jump du(p*) of the wave pattern 'RR', 'RS' or 'SS' and its derivative with respect to p*. With the
+        rapidities phi = arctanh(vx), arctanh(du) = phi_1 - phi_6 + phi_4 - phi_3 where only phi_3 and phi_4 depend
+        on p*, so the derivative follows from the derivatives of the wave curves.
+        '''
+        velocities = []
+        for state, integral, sign, isShock in [(self.state1, self.integral1, -1, pattern == 'SS'),
+                                               (self.state6, self.integral6, +1, pattern != 'RR')]:
+            if isShock:
+                ux = Shock.computeVxb(state, p_star, self.eos, sign)
+                dux = Shock.computeDVxbDp(state, p_star, self.eos, sign)
+            else:
+                ux = Rarefaction.computeVxb(state, p_star, integral.isentrope, sign, integral=integral)
+                dux = Rarefaction.computeDVxbDp(state, p_star, integral.isentrope, sign, A=integral.A, vxB=ux)
+            velocities.append((ux, dux))
+        (ux3, dux3), (ux4, dux4) = velocities
+
+        du = relativeSpeed(relativeSpeed(self.state1.vx, ux3), relativeSpeed(self.state6.vx, ux4))
+        return du, (1 - du ** 2) * (dux4 / (1 - ux4 ** 2) - dux3 / (1 - ux3 ** 2))
+
     def get_Vs_lim(self):
         '''
         see Appendix C in Paper
@@ -86,48 +226,84 @@ class Solver:
         )
 
     def get_du_limit_RS(self):
-        A1_sqr = computeA(self.state1, self.eos) ** 2
-        isentrope1 = EntropyConservation.fromState(self.state1, self.eos)
-
-        def integrand(_pressure):
-            rho = isentrope1.computeRho(_pressure)
-            h = isentrope1.computeEnthalpy(_pressure, rho=rho)
-            cs = isentrope1.computeSpeedOfSound(_pressure, rho=rho, h=h)
-            h_sqr = h ** 2
-            cs_sqr = cs ** 2
-            return np.sqrt(h_sqr + A1_sqr * (1 - cs_sqr)) / ((h_sqr + A1_sqr) * rho * cs)
-
-        return np.tanh(
-            integrate.quad(integrand, self.state1.pressure, self.state6.pressure)[0]
-        )
+        return np.tanh(self.integral1.integrate(self.state1.pressure, self.state6.pressure))
 
     def get_du_limit_RR(self):
-        A1_sqr = computeA(self.state1, self.eos) ** 2
-        A6_sqr = computeA(self.state6, self.eos) ** 2
-        isentrope1 = EntropyConservation.fromState(self.state1, self.eos)
-        isentrope6 = EntropyConservation.fromState(self.state6, self.eos)
-
-        def integrand1(_pressure):
-            rho = isentrope1.computeRho(_pressure)
-            h = isentrope1.computeEnthalpy(_pressure, rho=rho)
-            cs = isentrope1.computeSpeedOfSound(_pressure, rho=rho, h=h)
-            h_sqr = h ** 2
-            cs_sqr = cs ** 2
-            return np.sqrt(h_sqr + A1_sqr * (1 - cs_sqr)) / ((h_sqr + A1_sqr) * rho * cs)
-
-        def integrand6(_pressure):
-            rho = isentrope6.computeRho(_pressure)
-            h = isentrope6.computeEnthalpy(_pressure, rho=rho)
-            cs = isentrope6.computeSpeedOfSound(_pressure, rho=rho, h=h)
-            h_sqr = h ** 2
-            cs_sqr = cs ** 2
-            return np.sqrt(h_sqr + A6_sqr * (1 - cs_sqr)) / ((h_sqr + A6_sqr) * rho * cs)
-
-        v1c = np.tanh(integrate.quad(integrand1, self.state1.pressure, 0))[0]
-        v6c = np.tanh(integrate.quad(integrand6, 0, self.state6.pressure))[0]
+        v1c = np.tanh(self.integral1.integrate(self.state1.pressure, 0))
+        v6c = np.tanh(self.integral6.integrate(0, self.state6.pressure))
         return relativeSpeed(v1c, v6c)
 
+    def predict_p_star(self, du_0):
+        '''
+        Non-iterative estimate of p* from a two-rarefaction approximation. Across a rarefaction the rapidity
+        arctanh(vx) changes by the integral B of Rarefaction.computeVxb, so if both waves were rarefactions
+
+            arctanh(du_0) = B_1(p_1) - B_1(p*) + B_6(p_6) - B_6(p*)
+
+        With B_i(p) ~ B_i(p_i) (p / p_i)^z this is solved in closed form, where z is the mean of the local exponents
+        d ln B_i / d ln p at p_i weighted by B_i(p_i). The estimate is exact for two rarefactions in cold ideal gas
+        without tangential velocities (z = (gamma - 1) / (2 gamma)) and only used to seed the root finder. Returns 0
+        for vacuum.
+        '''
+        exponents = []
+        for state, integral in [(self.state1, self.integral1), (self.state6, self.integral6)]:
+            B = integral.computeIntegral(state.pressure)
+            dBdp = Rarefaction.computeIntegrand(state.pressure, integral.isentrope, integral.A)
+            exponents.append((B, state.pressure * dBdp / B))
+        (B1, z1), (B6, z6) = exponents
+        z = (B1 * z1 + B6 * z6) / (B1 + B6)
+        p_star_z = (B1 + B6 + np.arctanh(du_0)) / (B1 / self.state1.pressure ** z + B6 / self.state6.pressure ** z)
+        return np.maximum(p_star_z, 0) ** (1 / z)
+
     def solve(self, stateL, stateR, gamma):
+        self.__setup(stateL, stateR, gamma)
+        with SolverStats.recording(self.stats):
+            recordCount('solves')
+            if self.__usesKernels():
+                p_star, ux3, ux4 = self.__solveStarKernels()
+                with recordPhase('wavefan'):
+                    return Solver.__buildWavefan(self.state1, self.state6, self.eos, self.solution_type, p_star, ux3,
+                                                 ux4, self.reversed)
+            with recordPhase('integrals'):
+                self.__buildIntegrals()
+            self.iterations = 0
+            return self.determine_wave_pattern()
+
+    def solve_star(self, stateL, stateR, gamma):
+        '''
+        Pressure and velocities of the star region only, as a StarSolution. Waves, states and rarefaction fans of the
+        full Wavefan are built when they are first accessed.
+        '''
+        self.__setup(stateL, stateR, gamma)
+        with SolverStats.recording(self.stats):
+            recordCount('solves')
+            if self.__usesKernels():
+                p_star, ux3, ux4 = self.__solveStarKernels()
+            else:
+                with recordPhase('integrals'):
+                    self.__buildIntegrals()
+                self.iterations = 0
+                du_0, du_limits = self.__classify()
+                with recordPhase('root'):
+                    p_star, ux3, ux4 = self.__solveStar(self.solution_type, du_0, du_limits)
+
+        p_star, ux3, ux4 = float(p_star), float(ux3), float(ux4)
+        contactSpeed = np.nan if self.solution_type == 'RR*' else ux4
+        vxLPrime, vxRPrime = (-ux4, -ux3) if self.reversed else (ux3, ux4)
+        if self.reversed:
+            contactSpeed = -contactSpeed
+
+        # the solver may be reused before the wavefan is built, so its current problem is bound here
+        arguments = (self.state1, self.state6, self.eos, self.solution_type, p_star, ux3, ux4, self.reversed)
+        stats = self.stats
+
+        def buildWavefan():
+            with SolverStats.recording(stats), recordPhase('wavefan'):
+                return Solver.__buildWavefan(*arguments)
+
+        return StarSolution(self.solution_type, self.reversed, p_star, contactSpeed, vxLPrime, vxRPrime, buildWavefan)
+
+    def __setup(self, stateL, stateR, gamma):
         if stateL.pressure >= stateR.pressure:
             self.reversed = False
             self.state1 = copy.copy(stateL)
@@ -138,49 +314,170 @@ class Solver:
             self.state6 = copy.copy(stateL)
             self.state1.vx *= -1
             self.state6.vx *= -1
+        self.eos = getEquationOfState(gamma)
 
-        self.eos = IdealEquationOfState(gamma)
+    def __usesKernels(self):
+        return self.backend == 'kernels' and isinstance(self.eos, IdealEquationOfState)
 
-        return self.determine_wave_pattern()
+    def __solveStarKernels(self):
+        # (imported here, so that Numba is only loaded by solves with the kernels)
+        from . import Kernels
+        with recordPhase('root'):
+            pattern, p_star, ux3, ux4 = Kernels.solveStar(
+                *[float(getattr(state, var)) for state in [self.state1, self.state6] for var in StateArray.variables],
+                float(self.eos.gamma))
+        self.solution_type = ['RR*', 'RR', 'RS', 'SS'][pattern]
+        return p_star, ux3, ux4
 
-    def determine_wave_pattern(self):
-        du_0 = relativeSpeed(self.state1.vx, self.state6.vx)
+    def __buildIntegrals(self):
+        self.integral1 = IsentropeIntegral.fromState(self.state1, self.eos)
+        self.integral6 = IsentropeIntegral.fromState(self.state6, self.eos)
+
+    def solve_many(self, statesL, statesR, gamma, chunkSize=4096):
+        '''
+        Solve many independent Riemann problems. The left and right states are given as struct of arrays, e.g.
+        State objects with array attributes (which are broadcast against each other).
+        The problems are processed in chunks of chunkSize: the wave patterns of a chunk are classified with vectorised
+        get_du_limit_* evaluations and p* is found for all problems of a pattern in lockstep.
+        The solver itself is not modified, see BatchSolution for the result. Invalid states raise a ValueError, see
+        findInvalidStates.
+        '''
+        eos = getEquationOfState(gamma)
+        stateL, stateR = broadcastStates(statesL, statesR)
+        invalid = findInvalidStates(stateL, stateR)
+        if len(invalid):
+            raise ValueError(f'invalid states (rho and pressure must be positive and finite, vx^2 + vt^2 < 1) in '
+                             f'{len(invalid)} problems, e.g. rows {invalid[:10].tolist()}')
+
+        batches = []
+        with SolverStats.recording(self.stats):
+            recordCount('solves', len(stateL.pressure))
+            for start in range(0, max(len(stateL.pressure), 1), chunkSize):
+                chunk = slice(start, start + chunkSize)
+                batches.append(Solver.__solveBatch(stateL[chunk], stateR[chunk], eos))
+        return BatchSolution.concatenate(batches)
+
+    @staticmethod
+    def __solveBatch(stateL, stateR, eos):
+        solver = Solver()
+        solver.reversed = stateL.pressure < stateR.pressure
+        solver.state1, solver.state6 = orientStates(stateL, stateR, solver.reversed)
+        solver.eos = eos
+        with recordPhase('integrals'):
+            solver.__buildIntegrals()
+        state1, state6 = solver.state1, solver.state6
+
+        du_0 = relativeSpeed(state1.vx, state6.vx)
+        with recordPhase('classification'), np.errstate(divide='ignore', invalid='ignore'):
+            du_limits = np.stack([solver.get_du_limit_RR(), solver.get_du_limit_RS(), solver.get_du_limit_SS()],
+                                 axis=-1)
+            solutionType = np.select([du_0 <= du_limits[:, 0], du_0 <= du_limits[:, 1], du_0 <= du_limits[:, 2]],
+                                     ['RR*', 'RR', 'RS'], 'SS')
+
+        p_star = np.zeros_like(du_0)
+        ux3 = np.zeros_like(du_0)
+        ux4 = np.zeros_like(du_0)
+        for pattern in ['RR*', 'RR', 'RS', 'SS']:
+            mask = solutionType == pattern
+            if np.any(mask):
+                with recordPhase('root'):
+                    p_star[mask], ux3[mask], ux4[mask] = solver.__subset(mask).__solveStar(
+                        pattern, du_0[mask], du_limits[mask])
+
+        with recordPhase('wavefan'):
+            return getBatchSolution(state1, state6, solver.reversed, solutionType, p_star, ux3, ux4,
+                                    solver.integral1.isentrope, solver.integral6.isentrope, eos)
+
+    def __subset(self, mask):
+        solver = Solver()
+        solver.state1 = self.state1[mask]
+        solver.state6 = self.state6[mask]
+        solver.eos = self.eos
+        solver.integral1 = self.integral1.take(mask)
+        solver.integral6 = self.integral6.take(mask)
+        solver.iterations = 0
+        return solver
+
+    def __solveStar(self, pattern, du_0, du_limits):
+        # p* and the normal velocities behind both waves for problems sharing one wave pattern (scalars or batches).
+        # The velocity jumps at p_6 and p_1 are the limits du_RS and du_SS, which are used as bracket values instead of
+        # evaluating the degenerate zero strength shocks there. The bracket is narrowed to one side of the predicted
+        # p*, then the root is found in log p.
         eps = 1e-15
+        if pattern == 'RR*':
+            p_star = np.zeros_like(du_0)
+            ux3 = Rarefaction.computeVxb(self.state1, p_star, None, sign=-1, integral=self.integral1)
+            ux4 = Rarefaction.computeVxb(self.state6, p_star, None, sign=+1, integral=self.integral6)
+            return p_star, ux3, ux4
 
-        if du_0 <= self.get_du_limit_RR():
-            self.solution_type = 'RR*'
-            p_star = 0
-            ux_star = 0
-            solution = getWavefan(self.state1, self.state6, ux_star, p_star, Rarefaction, Rarefaction,
-                                  reversed=self.reversed)
-
-        elif du_0 <= self.get_du_limit_RS():
-            self.solution_type = 'RR'
-            p_min = (self.state6.pressure + eps) * eps
-            p_max = self.state1.pressure
-            assert (p_min < p_max)
-            p_star = opt.brentq(lambda p: self.get_du_RR(p) - du_0, p_min, p_max)
-            isentrope = EntropyConservation.fromState(self.state6, self.eos)
-            ux_star = Rarefaction.computeVxb(self.state6, p_star, isentrope, sign=+1)
-            solution = getWavefan(self.state1, self.state6, ux_star, p_star, self.eos, Rarefaction, Rarefaction,
-                                  reversed=self.reversed)
-
-        elif du_0 <= self.get_du_limit_SS():
-            self.solution_type = 'RS'
-            p_min = self.state6.pressure + eps
-            p_max = self.state1.pressure
-            assert (p_min < p_max)
-            p_star = opt.brentq(lambda p: self.get_du_RS(p) - du_0, p_min, p_max)
-            ux_star = Shock.computeVxb(self.state6, p_star, self.eos, sign=+1)
-            solution = getWavefan(self.state1, self.state6, ux_star, p_star, self.eos, Rarefaction, Shock,
-                                  reversed=self.reversed)
+        def f(logp):
+            # arctanh(du) - arctanh(du_0) = phi_4 - phi_3, which is closer to linear in log p than du itself
+            self.iterations += 1
+            recordCount('rootIterations')
+            p_star = np.exp(logp)
+            du, ddu = self.get_du_and_derivative(pattern, p_star)
+            return np.arctanh(du) - np.arctanh(du_0), ddu / (1 - du ** 2) * p_star
+
+        guess = np.log(self.predict_p_star(du_0))
+        if pattern == 'RR':
+            a, b = np.log((self.state6.pressure + eps) * eps), np.log(self.state6.pressure)
+            fa = f(a)[0]
+            # near vacuum the lower bracket is stepped down in log p until the residual changes sign, as in
+            # Kernels.solveStar, only p* below the smallest normal float is returned as that pressure
+            minLogp = np.log(np.finfo(float).tiny)
+            step = 1.
+            below = (fa > 0) & (a > minLogp)
+            while np.any(below):
+                b = np.where(below, a, b)
+                a = np.where(below, np.maximum(a - step, minLogp), a)
+                fa = np.where(below, f(a)[0], fa)
+                step *= 2
+                below = (fa > 0) & (a > minLogp)
+            b = np.where(fa > 0, a, b)
+        elif pattern == 'RS':
+            a, fa = np.log(self.state6.pressure), np.arctanh(du_limits[..., 1]) - np.arctanh(du_0)
+            b = np.log(self.state1.pressure)
+        else:
+            # no upper bound, the root finder steps up from p_1 if needed
+            a, fa = np.log(self.state1.pressure), np.arctanh(du_limits[..., 2]) - np.arctanh(du_0)
+            b = np.full_like(a, np.inf)
 
+        inside = (a < guess) & (guess < b)
+        start = np.where(inside, guess, np.where(np.isinf(b), a + 1, 0.5 * (a + b)))
+        p_star = np.exp(findRootNewton(f, a, b, start, fa))
+        if pattern == 'RR':
+            ux_star = Rarefaction.computeVxb(self.state6, p_star, None, sign=+1, integral=self.integral6)
         else:
-            self.solution_type = 'SS'
-            p_star_guess = 1.1 * self.state1.pressure
-            p_star = opt.root(lambda p: self.get_du_SS(p) - du_0, p_star_guess).x[0]
             ux_star = Shock.computeVxb(self.state6, p_star, self.eos, sign=+1)
-            solution = getWavefan(self.state1, self.state6, ux_star, p_star, self.eos, Shock, Shock,
-                                  reversed=self.reversed)
+        return p_star, ux_star, ux_star
+
+    def determine_wave_pattern(self):
+        du_0, du_limits = self.__classify()
+        with recordPhase('root'):
+            p_star, ux3, ux4 = self.__solveStar(self.solution_type, du_0, du_limits)
+        with recordPhase('wavefan'):
+            return Solver.__buildWavefan(self.state1, self.state6, self.eos, self.solution_type, float(p_star),
+                                         float(ux3), float(ux4), self.reversed)
+
+    def __classify(self):
+        # Wave pattern from the relative normal velocity. The limits are only evaluated as far as needed, du_SS is
+        # degenerate for p_1 = p_6
+        du_0 = relativeSpeed(self.state1.vx, self.state6.vx)
+        du_limits = np.full(3, np.nan)
+        self.solution_type = 'SS'
+        with recordPhase('classification'):
+            for idx, (pattern, get_du_limit) in enumerate(zip(['RR*', 'RR', 'RS'], [
+                    self.get_du_limit_RR, self.get_du_limit_RS, self.get_du_limit_SS])):
+                du_limits[idx] = get_du_limit()
+                if du_0 <= du_limits[idx]:
+                    self.solution_type = pattern
+                    break
+        return du_0, du_limits
 
-        return solution
+    @staticmethod
+    def __buildWavefan(state1, state6, eos, solutionType, p_star, ux3, ux4, reversed):
+        if solutionType == 'RR*':
+            return getVacuumWavefan(state1, state6, ux3, ux4, eos, reversed=reversed)
+        waveLType = Shock if solutionType == 'SS' else Rarefaction
+        waveRType = Rarefaction if solutionType == 'RR' else Shock
+        return getWavefan(state1, state6, ux4, p_star, eos, waveLType, waveRType, reversed=reversed)
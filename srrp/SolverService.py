@@ -0,0 +1,354 @@
+import collections
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .BatchSolution import BatchSolution
+from .EquationOfState import getEquationOfState
+from .SolutionCache import CacheInfo
+from .Solver import Solver, broadcastStates, findInvalidStates
+from .StateArray import StateArray
+
+OP_SOLVE = 1
+OP_GET_STATE = 2
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# request header: operation, gamma, number of problems, number of xis; followed by the problems as (n, 8) rows of
+# [rhoL, vxL, vtL, pL, rhoR, vxR, vtR, pR] and the xis, all little endian float64
+REQUEST = struct.Struct('<BdII')
+# response header: status, rows, columns; followed by the rows as float64 (or an utf-8 error message)
+RESPONSE = struct.Struct('<BII')
+
+PATTERNS = ['SS', 'RS', 'RR', 'RR*']
+# columns of an encoded BatchSolution, the states are [stateL, stateL', stateR', stateR]
+SOLUTION_COLUMNS = (['pattern', 'reversed', 'pressure', 'contactSpeed']
+                    + [f'{var}{idx}' for idx in range(4) for var in StateArray.variables]
+                    + [f'waveSpeed{idx}' for idx in range(5)] + ['isShockL', 'isShockR'])
+
+
+class SolverServiceError(RuntimeError):
+    pass
+
+
+def encodeBatchSolution(batch: BatchSolution):
+    '''
+    BatchSolution as (n, len(SOLUTION_COLUMNS)) float64 rows, see SOLUTION_COLUMNS
+    '''
+    pattern = np.select([batch.solutionType == name for name in PATTERNS], range(len(PATTERNS)))
+    return np.column_stack([pattern, batch.reversed, batch.pressure, batch.contactSpeed]
+                           + [getattr(states, var) for states in batch.states for var in StateArray.variables]
+                           + [batch.waveSpeeds, batch.isShockL, batch.isShockR]).astype('<f8')
+
+
+def decodeBatchSolution(rows, gamma):
+    '''
+    BatchSolution of rows encoded by encodeBatchSolution
+    '''
+    columns = rows.T
+    states = [StateArray(*columns[4 + 4 * idx:8 + 4 * idx]) for idx in range(4)]
+    return BatchSolution(np.array(PATTERNS)[columns[0].astype(int)], columns[1] != 0, columns[2], columns[3], states,
+                         rows[:, 20:25], columns[25] != 0, columns[26] != 0, eos=getEquationOfState(gamma))
+
+
+def readExactly(file, size):
+    data = file.read(size)
+    if len(data) < size:
+        raise EOFError('connection closed')
+    return data
+
+
+class ServiceRequest:
+    '''
+    Request of one connection waiting for its batch to be processed
+    '''
+
+    def __init__(self, op, gamma, problems, xis):
+        self.op = op
+        self.gamma = gamma
+        self.problems = problems
+        self.xis = xis
+        self.rows = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class SolverRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                op, gamma, nProblems, nXis = REQUEST.unpack(readExactly(self.rfile, REQUEST.size))
+                problems = np.frombuffer(readExactly(self.rfile, 64 * nProblems), dtype='<f8').reshape(nProblems, 8)
+                xis = np.frombuffer(readExactly(self.rfile, 8 * nXis), dtype='<f8')
+            except EOFError:
+                return
+            request = ServiceRequest(op, gamma, problems, xis)
+            self.server.service.submit(request)
+            request.done.wait()
+            if request.error is not None:
+                message = request.error.encode()
+                self.wfile.write(RESPONSE.pack(STATUS_ERROR, len(message), 0) + message)
+            else:
+                self.wfile.write(RESPONSE.pack(STATUS_OK, *request.rows.shape) + request.rows.tobytes())
+
+
+class SolverServer:
+    '''
+    Long-lived local solver service for several processes of one node, using only the standard library (and numpy):
+
+        with SolverServer('/tmp/srrp.sock') as server:  # or ('localhost', port), port 0 picks a free one
+            ...
+        # elsewhere
+        with SolverClient('/tmp/srrp.sock') as client:
+            batch = client.solve(statesL, statesR, gamma)   # BatchSolution
+            states = client.getState(stateL, stateR, gamma, xis)   # StateArray of shape (problems, len(xis))
+
+    Every connection is served by its own thread, which hands its requests to a single batching thread. That thread
+    waits up to batchWindow seconds (or until maxBatch problems are pending) for concurrent requests and solves the
+    problems of all of them not found in the cache with one Solver.solve_many call per adiabatic index, the states of
+    all getState requests are then sampled with one BatchSolution.getState call. Solutions are kept in a least recently
+    used cache of cacheSize problems, keyed on the exact values of the problem. Only ideal gases are supported.
+    Requests with invalid states are rejected with an error before they are batched, and if a batch fails nonetheless
+    its requests are retried one by one, so a bad request only fails itself.
+
+    Solutions are sent as rows of float64 (see SOLUTION_COLUMNS) and decoded to BatchSolutions by the client, states as
+    the StateArray variables of all problems and xis.
+    '''
+
+    def __init__(self, address, maxBatch=8192, batchWindow=1e-3, cacheSize=2 ** 16):
+        self.maxBatch = maxBatch
+        self.batchWindow = batchWindow
+        self.cacheSize = cacheSize
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.requests = 0
+        self.__cache = collections.OrderedDict()
+        self.__queue = queue.Queue()
+        self.__batcher = None
+
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)
+            self.server = socketserver.ThreadingUnixStreamServer(address, SolverRequestHandler, bind_and_activate=False)
+        else:
+            self.server = socketserver.ThreadingTCPServer(address, SolverRequestHandler, bind_and_activate=False)
+            self.server.allow_reuse_address = True
+        self.server.daemon_threads = True
+        self.server.server_bind()
+        self.server.server_activate()
+        self.server.service = self
+        self.address = self.server.server_address
+
+    def start(self):
+        '''
+        Serve in background threads
+        '''
+        self.__startBatcher()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        self.__startBatcher()
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.__batcher is not None:
+            self.__queue.put(None)
+            self.__batcher.join()
+            self.__batcher = None
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def submit(self, request: ServiceRequest):
+        self.__queue.put(request)
+
+    def cacheInfo(self):
+        return CacheInfo(self.hits, self.misses, self.cacheSize, len(self.__cache))
+
+    def __startBatcher(self):
+        self.__batcher = threading.Thread(target=self.__runBatcher, daemon=True)
+        self.__batcher.start()
+
+    def __runBatcher(self):
+        while True:
+            request = self.__queue.get()
+            if request is None:
+                return
+            pending = [request]
+            size = len(request.problems)
+            deadline = time.perf_counter() + self.batchWindow
+            while size < self.maxBatch:
+                try:
+                    request = self.__queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if request is None:
+                    self.__queue.put(None)
+                    break
+                pending.append(request)
+                size += len(request.problems)
+            self.__process(pending)
+
+    def __process(self, pending):
+        self.batches += 1
+        self.requests += len(pending)
+        byGamma = collections.defaultdict(list)
+        for request in pending:
+            # invalid requests are rejected on their own, so they do not fail the batch of the others
+            request.error = self.__validate(request)
+            if request.error is None:
+                byGamma[request.gamma].append(request)
+        for gamma, requests in byGamma.items():
+            try:
+                self.__processGamma(gamma, requests)
+            except Exception:
+                # retry the requests one by one, so only the ones that fail themselves get the error
+                for request in requests:
+                    try:
+                        self.__processGamma(gamma, [request])
+                    except Exception as error:
+                        request.error = f'{type(error).__name__}: {error}'
+        for request in pending:
+            request.done.set()
+
+    @staticmethod
+    def __validate(request):
+        # error message for a request that cannot be solved, None otherwise
+        if request.op not in [OP_SOLVE, OP_GET_STATE]:
+            return f'unknown operation {request.op}'
+        if not (np.isfinite(request.gamma) and request.gamma > 1):
+            return f'the adiabatic index must be finite and above 1, got {request.gamma}'
+        invalid = findInvalidStates(StateArray(*request.problems[:, :4].T), StateArray(*request.problems[:, 4:].T))
+        if len(invalid):
+            return (f'invalid states (rho and pressure must be positive and finite, vx^2 + vt^2 < 1) in {len(invalid)} '
+                    f'problems, e.g. rows {invalid[:10].tolist()}')
+        if not np.all(np.isfinite(request.xis)):
+            return 'the self similar coordinates must be finite'
+        return None
+
+    def __processGamma(self, gamma, requests):
+        problems = np.concatenate([request.problems for request in requests])
+        rows = self.__solve(problems, gamma)
+
+        offsets = np.cumsum([0] + [len(request.problems) for request in requests])
+        sampled = [(request, offset) for request, offset in zip(requests, offsets) if request.op == OP_GET_STATE]
+        if sampled:
+            # one xi per problem and point of all getState requests
+            index = np.concatenate([np.repeat(np.arange(offset, offset + len(request.problems)), len(request.xis))
+                                    for request, offset in sampled])
+            xis = np.concatenate([np.tile(request.xis, len(request.problems)) for request, _ in sampled])
+            states = decodeBatchSolution(rows[index], gamma).getState(xis)
+            states = np.stack([getattr(states, var) for var in StateArray.variables]).astype('<f8')
+        start = 0
+        for request, offset in zip(requests, offsets):
+            if request.op == OP_SOLVE:
+                request.rows = rows[offset:offset + len(request.problems)]
+            else:
+                size = len(request.problems) * len(request.xis)
+                request.rows = np.ascontiguousarray(states[:, start:start + size])
+                start += size
+
+    def __solve(self, problems, gamma):
+        # encoded solutions of the problems, from the cache or solved in one batch
+        rows = np.empty((len(problems), len(SOLUTION_COLUMNS)))
+        keys = [(gamma, problem.tobytes()) for problem in problems]
+        missing = {}
+        for idx, key in enumerate(keys):
+            row = self.__cache.get(key)
+            if row is not None:
+                self.__cache.move_to_end(key)
+                rows[idx] = row
+                self.hits += 1
+            else:
+                missing.setdefault(key, []).append(idx)
+        self.misses += len(missing)
+        if missing:
+            unique = problems[[indices[0] for indices in missing.values()]]
+            solved = encodeBatchSolution(Solver().solve_many(StateArray(*unique[:, :4].T), StateArray(*unique[:, 4:].T),
+                                                             gamma))
+            for (key, indices), row in zip(missing.items(), solved):
+                rows[indices] = row
+                self.__cache[key] = row
+            while len(self.__cache) > self.cacheSize:
+                self.__cache.popitem(last=False)
+        return rows
+
+    def __str__(self):
+        return (f'SolverServer: {self.address}, requests={self.requests}, batches={self.batches}, '
+                f'hits={self.hits}, misses={self.misses}')
+
+    def __repr__(self):
+        return str(self)
+
+
+class SolverClient:
+    '''
+    Client of a SolverServer at the given address (a Unix socket path or a (host, port) tuple). Requests of one client
+    are sent one after the other, concurrent callers should use a client each.
+    '''
+
+    def __init__(self, address):
+        if isinstance(address, str):
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(address)
+        else:
+            self.socket = socket.create_connection(address)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.socket.makefile('rb')
+        self.__lock = threading.Lock()
+
+    def solve(self, statesL, statesR, gamma):
+        '''
+        BatchSolution of the Riemann problems given as struct of arrays (or single States), see Solver.solve_many
+        '''
+        rows = self.__request(OP_SOLVE, gamma, self.__toProblems(statesL, statesR), np.empty(0))
+        return decodeBatchSolution(rows, gamma)
+
+    def getState(self, statesL, statesR, gamma, xis):
+        '''
+        States of the Riemann problems at the self similar coordinates xis (the same for all problems) as a StateArray
+        of shape (problems, len(xis)), see Wavefan.getState
+        '''
+        problems = self.__toProblems(statesL, statesR)
+        xis = np.atleast_1d(np.asarray(xis, dtype='<f8'))
+        rows = self.__request(OP_GET_STATE, gamma, problems, xis)
+        return StateArray(*[row.reshape(len(problems), len(xis)) for row in rows])
+
+    @staticmethod
+    def __toProblems(statesL, statesR):
+        stateL, stateR = broadcastStates(statesL, statesR)
+        return np.column_stack([getattr(state, var) for state in [stateL, stateR]
+                                for var in StateArray.variables]).astype('<f8')
+
+    def __request(self, op, gamma, problems, xis):
+        with self.__lock:
+            self.socket.sendall(REQUEST.pack(op, gamma, len(problems), len(xis)) + problems.tobytes() + xis.tobytes())
+            status, nRows, nColumns = RESPONSE.unpack(readExactly(self.file, RESPONSE.size))
+            if status != STATUS_OK:
+                raise SolverServiceError(readExactly(self.file, nRows).decode())
+            return np.frombuffer(readExactly(self.file, 8 * nRows * nColumns), dtype='<f8').reshape(nRows, nColumns)
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,107 @@
+import collections
+import contextlib
+import threading
+import time
+
+_active = threading.local()
+
+
+class SolverStats:
+    '''
+    Instrumentation of the solver: wall time per phase and event counters, recorded while the stats are active
+
+        stats = SolverStats()
+        with stats:
+            solution = Solver().solve(stateL, stateR, gamma)
+            solution.getState(xis)
+        print(stats)
+
+    Solver(stats=stats) records its solves in the same way. Phases (seconds in `times`):
+        - integrals: building the isentrope integral tables of the initial states
+        - classification: wave pattern from the limits du_RR, du_RS and du_SS
+        - root: finding p*
+        - wavefan: waves and states of the solution
+        - rarefaction: states inside rarefaction fans
+        - cells: fitting the local cell polynomials of a StarSurrogate
+        - lookup: interpolation of StarSurrogate tables
+    Counters (in `counts`):
+        - solves: Riemann problems solved
+        - rootIterations: evaluations of du(p*) (with its derivative), one per lockstep iteration for solve_many
+        - tableBuilds, tablePanels: IsentropeIntegral tables and their total number of panels
+        - quadCalls, quadSubdivisions: adaptive quadratures (scipy.integrate.quad) and their subintervals
+        - rarefactionIterations: root finder evaluations for states inside rarefaction fans
+        - surrogateLookups, surrogateRefinements: problems passed to StarSurrogate.solve and those solved exactly
+        - surrogateCells: cells of the local polynomials fitted by StarSurrogate
+    Stats of several runs, e.g. the chunks of a sweep, are aggregated with `+` or merge.
+    '''
+
+    def __init__(self):
+        self.times = collections.defaultdict(float)
+        self.counts = collections.Counter()
+
+    @staticmethod
+    def active():
+        stack = getattr(_active, 'stack', None)
+        return stack[-1] if stack else None
+
+    @staticmethod
+    @contextlib.contextmanager
+    def recording(stats):
+        '''
+        Activate stats (if not None) for the duration of the context
+        '''
+        if stats is None:
+            yield None
+        else:
+            with stats:
+                yield stats
+
+    def __enter__(self):
+        if not hasattr(_active, 'stack'):
+            _active.stack = []
+        _active.stack.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _active.stack.pop()
+
+    def merge(self, other):
+        for phase, seconds in other.times.items():
+            self.times[phase] += seconds
+        self.counts.update(other.counts)
+        return self
+
+    def __add__(self, other):
+        return SolverStats().merge(self).merge(other)
+
+    def asDict(self):
+        return {'times': dict(self.times), 'counts': dict(self.counts)}
+
+    def __str__(self):
+        string = 'SolverStats:'
+        tmp = [''] + [f'{phase}: {seconds * 1e3:.3f} ms' for phase, seconds in self.times.items()]
+        tmp += [f'{name}: {count}' for name, count in self.counts.items()]
+        string += '\n  - '.join(tmp)
+        return string
+
+    def __repr__(self):
+        return str(self)
+
+
+def recordCount(name, n=1):
+    stats = SolverStats.active()
+    if stats is not None:
+        stats.counts[name] += int(n)
+
+
+@contextlib.contextmanager
+def recordPhase(name):
+    stats = SolverStats.active()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.times[name] += time.perf_counter() - start
@@ -0,0 +1,44 @@
+class StarSolution:
+    '''
+    Star region of a Riemann problem, see Solver.solve_star. Given in the frame of the original left and right states:
+        - pressure: pressure p* at the contact discontinuity (0 for the vacuum pattern RR*)
+        - contactSpeed: speed of the contact discontinuity (nan for the vacuum pattern RR*)
+        - vxLPrime, vxRPrime: normal velocities behind the left and right waves (they differ only for RR*)
+        - solutionType: wave pattern as classified by the solver ('SS', 'RS', 'RR', 'RR*')
+    The full Wavefan (waves, states and rarefaction fans) is only built on first access of `wavefan`. Attributes of the
+    Wavefan, e.g. states, waves or getState, are forwarded to it, so a StarSolution can be used in place of one.
+    '''
+
+    def __init__(self, solutionType, reversed, pressure, contactSpeed, vxLPrime, vxRPrime, buildWavefan):
+        self.solutionType = solutionType
+        self.reversed = reversed
+        self.pressure = pressure
+        self.contactSpeed = contactSpeed
+        self.vxLPrime = vxLPrime
+        self.vxRPrime = vxRPrime
+        self.__buildWavefan = buildWavefan
+        self.__wavefan = None
+
+    @property
+    def wavefan(self):
+        if self.__wavefan is None:
+            self.__wavefan = self.__buildWavefan()
+            self.__buildWavefan = None
+        return self.__wavefan
+
+    @property
+    def isMaterialized(self):
+        return self.__wavefan is not None
+
+    def __getattr__(self, name):
+        # only called for attributes not found on the StarSolution itself
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.wavefan, name)
+
+    def __str__(self):
+        return (f'StarSolution ({self.solutionType}): pressure={self.pressure:.3f}, '
+                f'contactSpeed={self.contactSpeed:.3f}')
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,265 @@
+import numpy as np
+from numpy.polynomial import chebyshev
+
+from .BatchSolution import BatchSolution
+from .EquationOfState import IdealEquationOfState, EntropyConservation
+from .Solver import Solver, broadcastStates, orientStates, getBatchSolution
+from .SolverStats import SolverStats, recordCount, recordPhase
+from .StateArray import StateArray
+
+
+def outerProduct(bases, size):
+    # row-wise tensor product of the rows of the bases (of size rows each), flattened in C order; combined pairwise,
+    # which keeps the intermediate products small
+    if len(bases) == 0:
+        return np.ones((size, 1))
+    if len(bases) == 1:
+        return bases[0]
+    half = len(bases) // 2
+    first, second = outerProduct(bases[:half], size), outerProduct(bases[half:], size)
+    return (first[:, :, np.newaxis] * second[:, np.newaxis, :]).reshape(size, -1)
+
+
+class StarSurrogate:
+    '''
+    Precomputed interpolation table of the star region of Riemann problems in an ideal gas with fixed gamma, for
+    repeated solves of problems from a bounded range:
+
+        surrogate = StarSurrogate(5 / 3, pressureRatio=(1e-2, 1), theta=(0.1, 10), normalVelocity=(-0.5, 0.5))
+        solution = surrogate.solve(statesL, statesR, tolerance=1e-4)
+
+    A Riemann problem does not change under rescaling rho and p by a common factor nor under boosts along x, so with 1
+    the state of higher pressure and 6 the other one, p* / p_1 and the contact rapidity relative to the mean rapidity
+    of the states, (arctanh(vx_1) + arctanh(vx_6)) / 2, only depend on
+        - the pressure ratio p_6 / p_1, in pressureRatio
+        - theta = p / rho of both states, in theta
+        - the relative normal velocity relativeSpeed(vxL, vxR), in normalVelocity
+        - the tangential invariants W |vt| of both states, in tangential
+    Their ranges span the table, whose axes are the logarithms of the pressure ratio and theta, the normal rapidity
+    and the tangential invariants. (p* / p_1)^z with z = (gamma - 1) / (2 gamma), which is smooth also for strong
+    rarefactions, and the contact rapidity are interpolated by tensor product Chebyshev polynomials on `nodes` points
+    per axis (one number or one per axis: pressure ratio, theta_1, theta_6, normal rapidity, W |vt| of 1 and 6). Axes
+    with an empty range are dropped, so building the table costs one Solver.solve_many of the product of the node
+    counts of the remaining axes. As p* is only twice continuously differentiable across the transitions between wave
+    patterns, the interpolation error decreases algebraically with the number of nodes and with the size of the ranges,
+    e.g. to about 1e-6 with 12 nodes on four axes spanning two decades of theta.
+
+    Evaluating the global polynomials would cost the product of the node counts per problem, so the interpolant is
+    resampled to local polynomials of `order` modes per axis on `cells` uniform cells per axis (cells^d order^d
+    coefficients for d active axes). By default the number of cells is the largest one (up to 64) within
+    maxCoefficients, e.g. 8 cells for four axes (17 MB). A lookup gathers the coefficients of one cell
+    and contracts them with the tensor product of the local Chebyshev polynomials, a few microseconds per problem for
+    batches (single problems are dominated by the overhead of numpy). The error estimate of every cell is computed
+    when the table is built: the largest deviation of the local from the global polynomials plus the magnitude of the
+    contributions of the two highest global modes of every axis, summed over the axes, at the sampling points and the
+    extrema of the local modes of the cell. It is the relative error of p* or the absolute error of the contact
+    rapidity (whichever is larger), and no strict bound.
+
+    lookup returns the interpolant (in chunks of chunkSize problems) together with the error estimate. solve refines
+    problems outside the table or with an estimate above its tolerance by exact solves, so its tolerance should not be
+    below the estimates of the table, otherwise all problems are refined. The interpolant is only smooth away from
+    vacuum (RR*), so the ranges should exclude problems forming vacuum (see vacuumNodes), which are only resolved by
+    exact solves.
+    '''
+
+    # Number of coefficients of the local polynomials, which bounds the number of cells if it is not given
+    maxCoefficients = 2 ** 21
+
+    def __init__(self, gamma, pressureRatio=(1e-2, 1.), theta=(1e-2, 1e2), normalVelocity=(-0.5, 0.5),
+                 tangential=(0., 0.), nodes=12, cells=None, order=4, chunkSize=1024, stats: SolverStats = None):
+        assert 0 < pressureRatio[0] <= pressureRatio[1] <= 1 and 0 < theta[0] <= theta[1]
+        assert -1 < normalVelocity[0] <= normalVelocity[1] < 1 and 0 <= tangential[0] <= tangential[1]
+        self.eos = IdealEquationOfState(gamma)
+        self.z = (gamma - 1) / (2 * gamma)
+        self.chunkSize = chunkSize
+        self.stats = stats
+        self.lookups = 0
+        self.refinements = 0
+
+        self.lower = np.array([np.log(pressureRatio[0]), np.log(theta[0]), np.log(theta[0]),
+                               np.arctanh(normalVelocity[0]), tangential[0], tangential[0]])
+        self.upper = np.array([np.log(pressureRatio[1]), np.log(theta[1]), np.log(theta[1]),
+                               np.arctanh(normalVelocity[1]), tangential[1], tangential[1]])
+        self.nodes = np.where(self.upper > self.lower, np.broadcast_to(nodes, self.lower.shape), 1)
+        assert np.all(self.nodes[self.upper > self.lower] >= 2)
+
+        # Chebyshev points of the first kind on every axis, mapped from [-1, 1] to the range of the axis
+        points = [chebyshev.chebpts1(n) if n > 1 else np.zeros(1) for n in self.nodes]
+        axes = [lower + 0.5 * (upper - lower) * (x + 1) for x, lower, upper in zip(points, self.lower, self.upper)]
+        coordinates = np.stack([grid.ravel() for grid in np.meshgrid(*axes, indexing='ij')], axis=-1)
+
+        # coefficients of the interpolants over the axes with a non-empty range
+        self.active = self.nodes > 1
+        values = self.__solveNodes(coordinates).reshape(tuple(self.nodes[self.active]) + (2,))
+        for axis, n in enumerate(self.nodes[self.active]):
+            transform = np.linalg.inv(chebyshev.chebvander(chebyshev.chebpts1(n), n - 1))
+            values = np.moveaxis(np.tensordot(transform, values, axes=(1, axis)), 0, axis)
+        self.coefficients = np.ascontiguousarray(values)
+
+        # by default as many cells as fit into maxCoefficients
+        nAxes = int(np.count_nonzero(self.active))
+        if cells is None:
+            cells = 1
+            while cells < 64 and 2 * ((cells + 1) * order) ** nAxes <= self.maxCoefficients:
+                cells += 1
+        self.cells = cells
+        self.order = order
+        with SolverStats.recording(self.stats), recordPhase('cells'):
+            self.__buildCells()
+
+    def __solveNodes(self, coordinates):
+        # (p* / p_1)^z and the contact rapidity at the nodes, solved in the frame of vanishing mean normal rapidity
+        # with p_1 = 1
+        ratio, theta1, theta6 = np.exp(coordinates[:, 0]), np.exp(coordinates[:, 1]), np.exp(coordinates[:, 2])
+        vx1 = np.tanh(0.5 * coordinates[:, 3])
+        tangential1, tangential6 = coordinates[:, 4], coordinates[:, 5]
+        state1 = StateArray(rho=1 / theta1, vx=vx1, vt=tangential1 * np.sqrt((1 - vx1 ** 2) / (1 + tangential1 ** 2)),
+                            pressure=1.)
+        state6 = StateArray(rho=ratio / theta6, vx=-vx1,
+                            vt=tangential6 * np.sqrt((1 - vx1 ** 2) / (1 + tangential6 ** 2)), pressure=ratio)
+        solution = Solver(self.stats).solve_many(state1, state6, self.eos)
+
+        vacuum = solution.solutionType == 'RR*'
+        self.vacuumNodes = int(np.count_nonzero(vacuum))
+        contactSpeed = np.where(vacuum, 0.5 * (solution.states[1].vx + solution.states[2].vx), solution.contactSpeed)
+        return np.stack([solution.pressure ** self.z, np.arctanh(contactSpeed)], axis=-1)
+
+    def __buildCells(self):
+        # Local polynomials of `order` Chebyshev modes per axis on a uniform grid of `cells` cells per active axis,
+        # fitted to the global interpolant at the Chebyshev points of each cell. The error estimate of a cell is the
+        # largest deviation of its polynomial from the global interpolant plus the estimate of the latter (the
+        # contributions of its two highest modes of every axis, summed over the axes), taken over the sampling points
+        # and the extrema (including the edges) of the local modes.
+        nAxes = int(np.count_nonzero(self.active))
+        pointAxes = tuple(range(nAxes, 2 * nAxes))
+        values, globalError = self.__sampleCells(chebyshev.chebpts1(self.order))
+        for axis in pointAxes:
+            transform = np.linalg.inv(chebyshev.chebvander(chebyshev.chebpts1(self.order), self.order - 1))
+            values = np.moveaxis(np.tensordot(transform, values, axes=(1, axis)), 0, axis)
+        coefficients = values
+
+        checkPoints = np.cos(np.pi * np.arange(self.order + 1) / self.order)
+        checkValues, checkError = self.__sampleCells(checkPoints)
+        for axis in pointAxes:
+            values = np.moveaxis(np.tensordot(chebyshev.chebvander(checkPoints, self.order - 1), values,
+                                              axes=(1, axis)), 0, axis)
+        cellErrors = np.maximum(np.max(globalError, axis=pointAxes),
+                                np.max(np.abs(values - checkValues) + checkError, axis=pointAxes))
+
+        nCells = self.cells ** nAxes
+        self.cellCoefficients = np.ascontiguousarray(coefficients.reshape((nCells, self.order ** nAxes, 2)))
+        self.cellErrors = cellErrors.reshape(nCells, 2)
+        recordCount('surrogateCells', nCells)
+
+    def __sampleCells(self, local):
+        # Global interpolant and its error estimate at the points `local` (in [-1, 1]) of every cell and active axis,
+        # with the axes ordered as (cell of every axis, point of every axis, value)
+        nAxes = int(np.count_nonzero(self.active))
+        x = ((np.arange(self.cells)[:, np.newaxis] + 0.5 * (local + 1)) * 2 / self.cells - 1).ravel()
+        values, highest = self.coefficients, []
+        for axis, n in enumerate(self.coefficients.shape[:-1]):
+            basis = chebyshev.chebvander(x, n - 1)
+            highest = [np.moveaxis(np.tensordot(basis, partial, axes=(1, axis)), 0, axis) for partial in highest]
+            highest.append(np.moveaxis(np.tensordot(np.where(np.arange(n) >= n - 2, basis, 0), values,
+                                                    axes=(1, axis)), 0, axis))
+            values = np.moveaxis(np.tensordot(basis, values, axes=(1, axis)), 0, axis)
+        globalError = sum(np.abs(partial) for partial in highest) + np.zeros(values.shape)
+
+        cellShape = (self.cells, len(local)) * nAxes + (2,)
+        order = list(range(0, 2 * nAxes, 2)) + list(range(1, 2 * nAxes, 2)) + [2 * nAxes]
+        return values.reshape(cellShape).transpose(order), globalError.reshape(cellShape).transpose(order)
+
+    def __evaluate(self, state1, state6):
+        # interpolated (p* / p_1)^z, contact rapidity relative to the mean rapidity and their error estimates
+        with np.errstate(divide='ignore', invalid='ignore'):
+            coordinates = np.stack([np.log(state6.pressure / state1.pressure), np.log(state1.pressure / state1.rho),
+                                    np.log(state6.pressure / state6.rho),
+                                    np.arctanh(state1.vx) - np.arctanh(state6.vx),
+                                    state1.lorentz() * np.abs(state1.vt), state6.lorentz() * np.abs(state6.vt)],
+                                   axis=-1)
+            margin = 1e-12 * np.maximum(1, np.maximum(np.abs(self.lower), np.abs(self.upper)))
+            inside = np.all((coordinates >= self.lower - margin) & (coordinates <= self.upper + margin), axis=-1)
+            x = np.where(self.upper > self.lower, 2 * (coordinates - self.lower) / (self.upper - self.lower) - 1, 0)
+
+        values, errors = [], []
+        for start in range(0, len(x), self.chunkSize):
+            chunk = self.__interpolate(np.clip(x[start:start + self.chunkSize, self.active], -1, 1))
+            values.append(chunk[0])
+            errors.append(chunk[1])
+        (q, rapidity), (dq, dRapidity) = np.concatenate(values).T, np.concatenate(errors).T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            errorEstimate = np.where(inside & (q > 0), np.maximum(dq / (self.z * q), dRapidity), np.inf)
+        return q, rapidity, errorEstimate
+
+    def __interpolate(self, x):
+        # Values of the local polynomials of the cells containing x (in [-1, 1] on every active axis) and the error
+        # estimates of these cells
+        t = 0.5 * (x + 1) * self.cells
+        cell = np.minimum(t.astype(int), self.cells - 1)
+        # Chebyshev polynomials T_k(u) = cos(k arccos(u)) in the local coordinate u of the cell, as tensor product
+        u = np.clip(2 * (t - cell) - 1, -1, 1)
+        bases = np.cos(np.arange(self.order) * np.arccos(u)[..., np.newaxis])
+        flatCell = np.zeros(len(x), dtype=int)
+        for axis in range(x.shape[1]):
+            flatCell = flatCell * self.cells + cell[:, axis]
+        basis = outerProduct([bases[:, axis] for axis in range(x.shape[1])], len(x))
+        values = np.matmul(basis[:, np.newaxis, :], self.cellCoefficients[flatCell])[:, 0]
+        return values, self.cellErrors[flatCell]
+
+    def __orient(self, statesL, statesR):
+        stateL, stateR = broadcastStates(statesL, statesR)
+        reversed = stateL.pressure < stateR.pressure
+        state1, state6 = orientStates(stateL, stateR, reversed)
+        return stateL, stateR, reversed, state1, state6
+
+    def __starRegion(self, state1, state6, q, rapidity):
+        # p* and the contact speed in the orientation of the solver
+        p_star = state1.pressure * np.maximum(q, 0) ** (1 / self.z)
+        contactSpeed = np.tanh(0.5 * (np.arctanh(state1.vx) + np.arctanh(state6.vx)) + rapidity)
+        return p_star, contactSpeed
+
+    def lookup(self, statesL, statesR):
+        '''
+        Interpolated p*, contact speed and error estimate (inf outside the table or for vacuum) of the problems
+        '''
+        _, _, reversed, state1, state6 = self.__orient(statesL, statesR)
+        q, rapidity, errorEstimate = self.__evaluate(state1, state6)
+        p_star, contactSpeed = self.__starRegion(state1, state6, q, rapidity)
+        return p_star, np.where(reversed, -contactSpeed, contactSpeed), errorEstimate
+
+    def solve(self, statesL, statesR, tolerance=1e-4):
+        '''
+        BatchSolution of the problems, where p* and the contact speed are interpolated if their error estimate is
+        below tolerance and solved exactly with Solver.solve_many otherwise
+        '''
+        stateL, stateR, reversed, state1, state6 = self.__orient(statesL, statesR)
+        with SolverStats.recording(self.stats):
+            with recordPhase('lookup'):
+                q, rapidity, errorEstimate = self.__evaluate(state1, state6)
+            accepted = errorEstimate <= tolerance
+            refined = np.flatnonzero(~accepted)
+            recordCount('surrogateLookups', len(accepted))
+            recordCount('surrogateRefinements', len(refined))
+        self.lookups += len(accepted)
+        self.refinements += len(refined)
+
+        batches = []
+        if np.any(accepted):
+            state1, state6 = state1[accepted], state6[accepted]
+            p_star, contactSpeed = self.__starRegion(state1, state6, q[accepted], rapidity[accepted])
+            solutionType = np.select([p_star < state6.pressure, p_star < state1.pressure], ['RR', 'RS'], 'SS')
+            with SolverStats.recording(self.stats), recordPhase('wavefan'):
+                batches.append(getBatchSolution(state1, state6, reversed[accepted], solutionType, p_star, contactSpeed,
+                                                contactSpeed, EntropyConservation.fromState(state1, self.eos),
+                                                EntropyConservation.fromState(state6, self.eos), self.eos))
+        if len(refined):
+            batches.append(Solver(self.stats).solve_many(stateL[refined], stateR[refined], self.eos))
+        order = np.concatenate([np.flatnonzero(accepted), refined])
+        return BatchSolution.concatenate(batches).take(np.argsort(order))
+
+    def __str__(self):
+        return (f'StarSurrogate: nodes={"x".join(str(n) for n in self.nodes if n > 1)}, lookups={self.lookups}, '
+                f'refinements={self.refinements}')
+
+    def __repr__(self):
+        return str(self)
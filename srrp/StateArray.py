@@ -0,0 +1,70 @@
+import numpy as np
+from .State import State
+
+
+class StateArray(State):
+    '''
+    Struct of arrays of states: rho, vx, vt and pressure are NumPy arrays of a common shape.
+    Indexing returns a StateArray of the selected entries (following NumPy view/copy semantics), assigning a State or
+    StateArray fills them.
+    '''
+    variables = ['rho', 'vx', 'vt', 'pressure']
+
+    @classmethod
+    def empty(cls, shape):
+        return cls(*[np.empty(shape) for _ in cls.variables])
+
+    @classmethod
+    def fromStates(cls, states):
+        return cls(*[np.array([getattr(state, var) for state in states], dtype=float) for var in cls.variables])
+
+    @classmethod
+    def concatenate(cls, stateArrays):
+        return cls(*[np.concatenate([getattr(states, var) for states in stateArrays]) for var in cls.variables])
+
+    def __init__(self, rho=0, vx=0, vt=0, pressure=0):
+        values = [np.asarray(value, dtype=float) for value in [rho, vx, vt, pressure]]
+        shape = np.broadcast(*values).shape
+        rho, vx, vt, pressure = [value if value.shape == shape else np.broadcast_to(value, shape).copy()
+                                 for value in values]
+        super().__init__(rho=rho, vx=vx, vt=vt, pressure=pressure)
+
+    @property
+    def shape(self):
+        return self.rho.shape
+
+    def __len__(self):
+        return len(self.rho)
+
+    def __getitem__(self, idx):
+        return StateArray(*[getattr(self, var)[idx] for var in self.variables])
+
+    def __setitem__(self, idx, states):
+        for var in self.variables:
+            getattr(self, var)[idx] = getattr(states, var)
+
+    def enthalpy(self, eos):
+        '''
+        Specific enthalpy, 1 in vacuum (rho = 0)
+        '''
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.rho > 0, eos.computeEnthalpy(self.pressure, self.rho), 1.)
+
+    def conserved(self, eos):
+        '''
+        Conserved variables (D, S_x, S_t, tau) = (rho W, rho h W^2 v_x, rho h W^2 v_t, rho h W^2 - p - D)
+        '''
+        lorentz = self.lorentz()
+        D = self.rho * lorentz
+        rhohW_sqr = self.rho * self.enthalpy(eos) * lorentz ** 2
+        return D, rhohW_sqr * self.vx, rhohW_sqr * self.vt, rhohW_sqr - self.pressure - D
+
+    def fluxes(self, eos):
+        '''
+        Fluxes of the conserved variables in x direction, (D v_x, S_x v_x + p, S_t v_x, S_x - D v_x)
+        '''
+        D, S_x, S_t, tau = self.conserved(eos)
+        return D * self.vx, S_x * self.vx + self.pressure, S_t * self.vx, S_x - D * self.vx
+
+    def __str__(self):
+        return f'StateArray: shape={self.shape}'
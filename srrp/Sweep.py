@@ -0,0 +1,53 @@
+import concurrent.futures
+import os
+
+from .BatchSolution import BatchSolution
+from .Solver import Solver, broadcastStates
+from .SolverStats import SolverStats
+
+
+def solveChunk(statesL, statesR, gamma, record=False):
+    stats = SolverStats() if record else None
+    return Solver(stats).solve_many(statesL, statesR, gamma), stats
+
+
+def sweep(statesL, statesR, gamma, workers=None, chunkSize=2048, progress=None, stats: SolverStats = None):
+    '''
+    Solve a parameter sweep of Riemann problems on a process pool.
+    The left and right states are given as struct of arrays (see Solver.solve_many) and are split into chunks of
+    chunkSize problems, each solved with solve_many by one of `workers` processes (default: all cores, 1 solves in
+    this process). The result is a BatchSolution in the order of the input, independent of the number of workers.
+    If given, progress(solved, total) is called whenever a chunk is finished, and the SolverStats of all chunks are
+    merged into stats.
+    '''
+    stateL, stateR = broadcastStates(statesL, statesR)
+    total = len(stateL.pressure)
+    chunks = [slice(start, start + chunkSize) for start in range(0, max(total, 1), chunkSize)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(chunks))
+
+    results = [None] * len(chunks)
+    solved = 0
+
+    def finish(idx, result):
+        nonlocal solved
+        results[idx], chunkStats = result
+        if stats is not None:
+            stats.merge(chunkStats)
+        solved += len(results[idx])
+        if progress is not None:
+            progress(solved, total)
+
+    record = stats is not None
+    if workers <= 1:
+        for idx, chunk in enumerate(chunks):
+            finish(idx, solveChunk(stateL[chunk], stateR[chunk], gamma, record))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(solveChunk, stateL[chunk], stateR[chunk], gamma, record): idx
+                       for idx, chunk in enumerate(chunks)}
+            for future in concurrent.futures.as_completed(futures):
+                finish(futures[future], future.result())
+
+    return BatchSolution.concatenate(results)
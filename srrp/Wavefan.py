@@ -1,8 +1,15 @@
 from .ContactDiscontinuity import ContactDiscontinuity
+import collections
 import numpy as np
 from .Rarefaction import Rarefaction
 from .Shock import Shock
 from .State import State
+from .StateArray import StateArray
+
+# Wave edge at the self similar coordinate xi, kind is 'shock', 'contact', 'head' or 'tail' (of a rarefaction fan)
+Edge = collections.namedtuple('Edge', ['xi', 'kind'])
+# Region of a Wavefan between two edges: constant ones hold their state, fans the states at the nodes xis
+Segment = collections.namedtuple('Segment', ['xiLower', 'xiUpper', 'isFan', 'xis', 'states'])
 
 
 class Wavefan:
@@ -15,7 +22,11 @@ class Wavefan:
             self.states = Wavefan.__reverseStates(states)
             self.waves = Wavefan.__reverseWaves(waves)
 
-        self.regionBoundaries, self.regionStates = Wavefan.__build(self.states, self.waves)
+        self.regionBoundaries, self.regionStates, self.regionFans = Wavefan.__build(self.states, self.waves)
+        # Constant state of each region (nan inside rarefaction fans) to fill constant regions with a single gather
+        self.regionConstants = StateArray.fromStates(
+            [State(np.nan, np.nan, np.nan, np.nan) if idx in self.regionFans else regionState(None)
+             for idx, regionState in enumerate(self.regionStates)])
 
     @staticmethod
     def __reverseStates(states):
@@ -43,56 +54,225 @@ class Wavefan:
     def __build(states, waves):
         regionBoundaries = [-np.inf]
         regionStates = []
+        regionFans = {}
 
         regionStates.append(lambda xi: states[0])
         for idx, _ in enumerate(waves):
-            Wavefan.__appendWave(regionBoundaries, regionStates, waves[idx])
+            Wavefan.__appendWave(regionBoundaries, regionStates, regionFans, waves[idx])
             regionStates.append(lambda xi, idx=idx: states[idx + 1])
 
         regionBoundaries.append(np.inf)
-        return regionBoundaries, regionStates
+        return regionBoundaries, regionStates, regionFans
 
     @staticmethod
-    def __appendWave(regionBoundaries, regionStates, wave):
+    def __appendWave(regionBoundaries, regionStates, regionFans, wave):
         if isinstance(wave, Shock):
             regionBoundaries.append(wave.speed)
         elif isinstance(wave, ContactDiscontinuity):
             regionBoundaries.append(wave.speed)
         elif isinstance(wave, Rarefaction):
             regionBoundaries.append(min(wave.speedTail, wave.speedHead))
-            regionStates.append(wave.computeRarefactionState)
+            regionFans[len(regionStates)] = wave
+            regionStates.append(wave.computeRarefactionStates)
             regionBoundaries.append(max(wave.speedTail, wave.speedHead))
         else:
             raise RuntimeError("Unknown wave")
 
-    @staticmethod
-    def __getRegionCondlist(xi, regionBoundaries):
-        condlist = []
-        condlist.append(xi <= regionBoundaries[0])
-        for left, right in zip(regionBoundaries[:-1], regionBoundaries[1:]):
-            condlist.append((left < xi) * (xi <= right))
-        condlist.append(regionBoundaries[-1] < xi)
-        return condlist
-
     def getRegionIndex(self, xi):
         return np.digitize(xi, self.regionBoundaries) - 1
 
-    def __getState(self, xi):
-        idx = self.getRegionIndex(xi)
-        return self.regionStates[idx](xi)
-
     def getState(self, xis):
-        doGet = np.vectorize(self.__getState)
-        states = doGet(xis)
-
-        try:
-            statesAggregated = type(states[0])()
-            for var in vars(statesAggregated):
-                setattr(statesAggregated, var, np.array([getattr(state, var) for state in states]))
-            return statesAggregated
-        except:
+        '''
+        States at the self similar coordinates xis = (x - x0) / t as a StateArray. Constant regions are filled with one
+        gather from the table of region states, each rarefaction fan with one batched evaluation.
+        '''
+        xis = np.asarray(xis, dtype=float)
+        regionIndex = self.getRegionIndex(xis)
+        states = self.regionConstants[regionIndex]
+        if not self.regionFans:
             return states
 
+        isSorted = xis.ndim == 1 and np.all(xis[1:] >= xis[:-1])
+        for region, fan in self.regionFans.items():
+            if isSorted:
+                inFan = slice(*np.searchsorted(xis, self.regionBoundaries[region:region + 2]))
+            else:
+                inFan = regionIndex == region
+            if xis[inFan].size > 0:
+                states[inFan] = fan.computeRarefactionStates(xis[inFan])
+        return states
+
+    def sampleSpaceTime(self, xs, ts, x0=0):
+        '''
+        States at the positions xs and times ts > 0 of a wavefan centered at x0, as a StateArray of shape
+        (len(ts), len(xs)), e.g. the frames of an animation. As the states only depend on xi = (x - x0) / t, every
+        distinct xi inside a rarefaction fan is evaluated once for all times (uniform grids of xs and ts share many).
+        See iterSpaceTime for blocks too large for memory.
+        '''
+        return self.__sampleSpaceTime(np.asarray(xs, dtype=float), np.asarray(ts, dtype=float), x0)
+
+    def iterSpaceTime(self, xs, ts, x0=0, chunkSize=2 ** 20):
+        '''
+        sampleSpaceTime in chunks of consecutive times: yields the slices of ts and their StateArrays of states, each
+        of at most chunkSize entries (but at least one time)
+        '''
+        xs, ts = np.asarray(xs, dtype=float), np.asarray(ts, dtype=float)
+        times = max(1, chunkSize // max(1, len(xs)))
+        for start in range(0, len(ts), times):
+            chunk = slice(start, min(start + times, len(ts)))
+            yield chunk, self.__sampleSpaceTime(xs, ts[chunk], x0)
+
+    def __sampleSpaceTime(self, xs, ts, x0):
+        return self.__sampleDistinct((xs - x0) / ts[:, np.newaxis])
+
+    def sampleOblique(self, coordinates, normal, t, origin=None, tangent=None, out=None, chunkSize=2 ** 20):
+        '''
+        States of a planar Riemann problem rotated against a 2D or 3D mesh, e.g. to initialise or verify
+        multidimensional codes. coordinates are the arrays of the mesh coordinates (x, y) or (x, y, z), which only
+        need to broadcast against each other (e.g. np.meshgrid(..., sparse=True)). The discontinuity passes through
+        origin (default 0) at t = 0 with the unit normal `normal` pointing from the left to the right state, vx is along
+        the normal and vt along `tangent`, which defaults to the normal rotated by 90 degrees in 2D and must be given
+        in 3D. Returns the arrays (rho, v_1, ..., v_d, pressure) of the Cartesian components of the velocity, which are
+        filled in place if given as out. The mesh is processed in slabs of the first axis of about chunkSize cells, in
+        which every distinct xi inside a rarefaction fan is evaluated once.
+        '''
+        dimension = len(coordinates)
+        normal = np.asarray(normal, dtype=float) / np.linalg.norm(normal)
+        if dimension not in [2, 3] or normal.shape != (dimension,):
+            raise ValueError('expected 2 or 3 coordinate arrays and a normal of the same dimension')
+        if tangent is None:
+            if dimension == 3:
+                raise ValueError('the direction of the tangential velocity is ambiguous in 3D, a tangent is required')
+            tangent = np.array([-normal[1], normal[0]])
+        tangent = np.asarray(tangent, dtype=float)
+        tangent = tangent - np.dot(tangent, normal) * normal
+        tangent /= np.linalg.norm(tangent)
+        origin = np.zeros(dimension) if origin is None else np.asarray(origin, dtype=float)
+
+        shape = np.broadcast(*coordinates).shape
+        coordinates = [np.broadcast_to(coordinate, shape) for coordinate in coordinates]
+        if out is None:
+            out = tuple(np.empty(shape) for _ in range(dimension + 2))
+        rows = max(1, chunkSize // max(1, int(np.prod(shape[1:]))))
+        for start in range(0, shape[0], rows):
+            slab = slice(start, start + rows)
+            distance = sum(n * (coordinate[slab] - o) for n, coordinate, o in zip(normal, coordinates, origin))
+            states = self.__sampleDistinct(distance / t)
+            out[0][slab] = states.rho
+            for component, n, e in zip(out[1:-1], normal, tangent):
+                component[slab] = states.vx * n + states.vt * e
+            out[-1][slab] = states.pressure
+        return out
+
+    def __sampleDistinct(self, xis):
+        # getState evaluating every distinct xi inside a rarefaction fan once
+        regionIndex = self.getRegionIndex(xis)
+        states = self.regionConstants[regionIndex]
+        for region, fan in self.regionFans.items():
+            inFan = np.nonzero(regionIndex == region)
+            if len(inFan[0]):
+                distinct, inverse = np.unique(xis[inFan], return_inverse=True)
+                states[inFan] = fan.computeRarefactionStates(distinct)[inverse]
+        return states
+
+    def getEdges(self):
+        '''
+        Edges of the waves as Edges in ascending order of xi, the boundaries between the Segments of getPiecewise
+        '''
+        edges = []
+        for wave in self.waves:
+            if isinstance(wave, Shock):
+                edges.append(Edge(float(wave.speed), 'shock'))
+            elif isinstance(wave, ContactDiscontinuity):
+                edges.append(Edge(float(wave.speed), 'contact'))
+            else:
+                edges.extend(sorted([Edge(float(wave.speedHead), 'head'), Edge(float(wave.speedTail), 'tail')]))
+        return edges
+
+    def locate(self, ts, x0=0):
+        '''
+        Positions of the edges (see getEdges) at the times ts for a wavefan centered at x0, an array of shape
+        np.shape(ts) + (number of edges,)
+        '''
+        return x0 + np.multiply.outer(ts, [edge.xi for edge in self.getEdges()])
+
+    def getPiecewise(self, tolerance=1e-6, maxLevels=30):
+        '''
+        Compact description of the solution as a list of Segments from xi = -inf to inf. Constant segments hold their
+        state (a StateArray of length 1) and no nodes, rarefaction fans the states at nodes xis from their lower to
+        their upper edge, between which linear interpolation is accurate to the given tolerance (relative for rho and
+        p, absolute for the velocities). The nodes are refined adaptively: an interval is bisected as long as the
+        interpolation error at its midpoint exceeds the tolerance, for at most maxLevels bisections.
+        '''
+        segments = []
+        for region in range(len(self.regionStates)):
+            lower, upper = self.regionBoundaries[region:region + 2]
+            if region in self.regionFans:
+                xis, states = self.__sampleFan(self.regionFans[region], lower, upper, tolerance, maxLevels)
+                segments.append(Segment(lower, upper, True, xis, states))
+            else:
+                segments.append(Segment(lower, upper, False, np.empty(0), self.regionConstants[[region]]))
+        return segments
+
+    @staticmethod
+    def __sampleFan(fan, lower, upper, tolerance, maxLevels):
+        xis = np.array([lower, upper])
+        states = fan.computeRarefactionStates(xis)
+        scales = [np.max(states.rho), 1, 1, np.max(states.pressure)]
+        pending = np.array([0])
+        for _ in range(maxLevels):
+            # intervals [xis[pending], xis[pending + 1]] whose midpoints are checked
+            midpoints = 0.5 * (xis[pending] + xis[pending + 1])
+            midStates = fan.computeRarefactionStates(midpoints)
+            error = np.max([np.abs(getattr(midStates, var) - 0.5 * (getattr(states, var)[pending]
+                                                                     + getattr(states, var)[pending + 1])) / scale
+                            for var, scale in zip(StateArray.variables, scales)], axis=0)
+            # (non-finite errors are refined as well)
+            refine = np.flatnonzero(~(error <= tolerance))
+            if len(refine) == 0:
+                break
+            xis = np.insert(xis, pending[refine] + 1, midpoints[refine])
+            states = StateArray(*[np.insert(getattr(states, var), pending[refine] + 1, getattr(midStates, var)[refine])
+                                  for var in StateArray.variables])
+            # both halves of the refined intervals, shifted by the insertions before them
+            left = pending[refine] + np.arange(len(refine))
+            pending = np.stack([left, left + 1], axis=-1).ravel()
+        return xis, states
+
+    def getCellAverages(self, xEdges, t, x0=0, order=8):
+        '''
+        Averages of the primitive variables over the cells [xEdges[i], xEdges[i + 1]] at time t > 0 for a wavefan
+        centered at x0, as a StateArray of len(xEdges) - 1 entries. The overlap with constant regions is integrated
+        exactly (the discontinuities are located at their known speeds), rarefaction fans with a Gauss-Legendre rule of
+        the given order on the part of each cell inside the fan, where the solution is smooth. The edges must be
+        strictly increasing.
+        '''
+        xEdges = np.asarray(xEdges, dtype=float)
+        if np.any(~(xEdges[1:] > xEdges[:-1])):
+            raise ValueError('the cell edges must be strictly increasing')
+        xiEdges = (xEdges - x0) / t
+        lower, upper = xiEdges[:-1], xiEdges[1:]
+        averages = StateArray(*[np.zeros(lower.shape) for _ in StateArray.variables])
+        nodes, weights = np.polynomial.legendre.leggauss(order)
+
+        for region in range(len(self.regionStates)):
+            overlapLower = np.maximum(lower, self.regionBoundaries[region])
+            overlapUpper = np.minimum(upper, self.regionBoundaries[region + 1])
+            inRegion = np.nonzero(overlapUpper > overlapLower)
+            halfWidth = 0.5 * (overlapUpper - overlapLower)[inRegion]
+            if region in self.regionFans:
+                center = 0.5 * (overlapUpper + overlapLower)[inRegion]
+                states = self.regionFans[region].computeRarefactionStates(center[:, None] + halfWidth[:, None] * nodes)
+                for var in StateArray.variables:
+                    getattr(averages, var)[inRegion] += halfWidth * (getattr(states, var) @ weights)
+            else:
+                for var in StateArray.variables:
+                    getattr(averages, var)[inRegion] += 2 * halfWidth * getattr(self.regionConstants, var)[region]
+
+        for var in StateArray.variables:
+            getattr(averages, var)[...] /= upper - lower
+        return averages
+
     def __str__(self):
         string = 'Wavefan:'
         tmp = ['', str(self.states[0])]
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import zipfile
+
+import numpy as np
+
+from .ContactDiscontinuity import ContactDiscontinuity
+from .EquationOfState import IdealEquationOfState
+from .Rarefaction import Rarefaction
+from .Shock import Shock
+from .State import State
+from .Wavefan import Wavefan
+
+FORMAT_VERSION = 1
+WAVE_TYPES = [Shock, ContactDiscontinuity, Rarefaction]
+PROFILE_PREFIX = 'profile_'
+
+
+class StaleEntryError(RuntimeError):
+    pass
+
+
+def computeProblemHash(stateL, stateR, gamma):
+    '''
+    Content hash of the inputs of a Riemann problem (and the storage format version)
+    '''
+    values = np.array([stateL.rho, stateL.vx, stateL.vt, stateL.pressure,
+                       stateR.rho, stateR.vx, stateR.vt, stateR.pressure, gamma], dtype='<f8')
+    return hashlib.sha256(values.tobytes() + str(FORMAT_VERSION).encode()).hexdigest()
+
+
+def toRow(state):
+    return [state.rho, state.vx, state.vt, state.pressure] if state is not None else [np.nan] * 4
+
+
+def fromRow(row):
+    return State(*[float(value) for value in row])
+
+
+def saveWavefan(path, wavefan: Wavefan, problemHash='', profiles=None):
+    '''
+    Store a solved Wavefan, and optionally sampled profiles (a dict of arrays), in an uncompressed .npz file:
+        - states: (n, 4) rows of [rho, vx, vt, pressure]
+        - waveTypes, waveSigns: index into WAVE_TYPES and sign of each wave
+        - waveStatesAhead, waveStatesBehind: states ahead/behind of each shock and rarefaction (nan for contacts)
+        - waveSpeeds: (outer, inner) speeds of each wave, i.e. (head, tail) for rarefactions
+        - isentropicConstants, invariantsA: isentrope constants of the rarefactions (nan otherwise)
+        - gamma, problemHash, formatVersion
+    Profiles are stored as 'profile_<name>' and can be memory mapped by loadWavefan.
+    '''
+    waves = wavefan.waves
+    eos = next((wave.eos for wave in waves if hasattr(wave, 'eos')), None)
+    if eos is not None and not isinstance(eos, IdealEquationOfState):
+        raise ValueError('only wavefans of an ideal gas can be stored')
+    arrays = {
+        'states': np.array([toRow(state) for state in wavefan.states], dtype=float),
+        'waveTypes': np.array([WAVE_TYPES.index(type(wave)) for wave in waves]),
+        'waveSigns': np.array([getattr(wave, 'sign', 0) for wave in waves]),
+        'waveStatesAhead': np.array([toRow(getattr(wave, 'stateA', None)) for wave in waves], dtype=float),
+        'waveStatesBehind': np.array([toRow(getattr(wave, 'stateB', None)) for wave in waves], dtype=float),
+        'waveSpeeds': np.array([[wave.speedHead, wave.speedTail] if isinstance(wave, Rarefaction)
+                                else [wave.speed, wave.speed] for wave in waves], dtype=float),
+        'contactPressures': np.array([getattr(wave, 'pressure', np.nan) if isinstance(wave, ContactDiscontinuity)
+                                      else np.nan for wave in waves], dtype=float),
+        'isentropicConstants': np.array([wave.isentrope.isentropicConstant if isinstance(wave, Rarefaction)
+                                         else np.nan for wave in waves], dtype=float),
+        'invariantsA': np.array([wave.A if isinstance(wave, Rarefaction) else np.nan for wave in waves], dtype=float),
+        'gamma': np.array(eos.gamma if eos is not None else np.nan),
+        'problemHash': np.array(problemHash),
+        'formatVersion': np.array(FORMAT_VERSION),
+    }
+    for name, profile in (profiles or {}).items():
+        arrays[PROFILE_PREFIX + name] = np.asarray(profile)
+    with open(path, 'wb') as file:
+        np.savez(file, **arrays)
+
+
+def loadNpz(path, mmap=True):
+    '''
+    Arrays of an .npz file. Members stored without compression are memory mapped (read-only) if mmap is set.
+    '''
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as file:
+        for info in archive.infolist():
+            name = info.filename[:-len('.npy')]
+            if not mmap or info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            # skip the local file header (fixed 30 bytes, then file name and extra field)
+            file.seek(info.header_offset + 26)
+            nameLength, extraLength = np.frombuffer(file.read(4), dtype='<u2')
+            file.seek(info.header_offset + 30 + int(nameLength) + int(extraLength))
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortranOrder, dtype = np.lib.format.read_array_header_1_0(file)
+            elif version == (2, 0):
+                shape, fortranOrder, dtype = np.lib.format.read_array_header_2_0(file)
+            if version not in [(1, 0), (2, 0)] or dtype.hasobject or len(shape) == 0 or np.prod(shape) == 0:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=file.tell(), shape=shape,
+                                         order='F' if fortranOrder else 'C')
+    return arrays
+
+
+def loadWavefan(path, problemHash=None, mmap=True):
+    '''
+    Rebuild a Wavefan stored by saveWavefan without solving again. Returns the wavefan and the dict of profiles
+    (memory mapped if mmap is set). Raises StaleEntryError if the format version or the given problem hash do not
+    match the stored ones.
+    '''
+    arrays = loadNpz(path, mmap=mmap)
+    if int(arrays['formatVersion']) != FORMAT_VERSION:
+        raise StaleEntryError(f'{path}: format version {int(arrays["formatVersion"])} != {FORMAT_VERSION}')
+    if problemHash is not None and str(arrays['problemHash']) != problemHash:
+        raise StaleEntryError(f'{path}: stored solution belongs to a different problem')
+
+    eos = IdealEquationOfState(float(arrays['gamma'])) if np.isfinite(arrays['gamma']) else None
+    states = [fromRow(row) for row in arrays['states']]
+    waves = []
+    for idx, waveType in enumerate(WAVE_TYPES[int(code)] for code in arrays['waveTypes']):
+        if waveType is ContactDiscontinuity:
+            waves.append(ContactDiscontinuity(float(arrays['waveSpeeds'][idx, 0]),
+                                              float(arrays['contactPressures'][idx])))
+        else:
+            waves.append(waveType(fromRow(arrays['waveStatesAhead'][idx]), fromRow(arrays['waveStatesBehind'][idx]),
+                                  eos, int(arrays['waveSigns'][idx])))
+
+    profiles = {name[len(PROFILE_PREFIX):]: array for name, array in arrays.items()
+                if name.startswith(PROFILE_PREFIX)}
+    return Wavefan(states, waves), profiles
+
+
+class WavefanStore:
+    '''
+    Directory of stored solutions, one file per problem named by its content hash:
+
+        store = WavefanStore('reference-solutions')
+        entry = store.get(stateL, stateR, gamma)
+        if entry is None:
+            wavefan = Solver().solve(stateL, stateR, gamma)
+            store.put(stateL, stateR, gamma, wavefan, profiles={'rho': wavefan.getState(xis).rho})
+
+    Entries written with another format version, or whose stored hash does not match, are treated as missing.
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, problemHash):
+        return os.path.join(self.directory, problemHash + '.npz')
+
+    def get(self, stateL, stateR, gamma, mmap=True):
+        problemHash = computeProblemHash(stateL, stateR, gamma)
+        if not os.path.exists(self.path(problemHash)):
+            return None
+        try:
+            return loadWavefan(self.path(problemHash), problemHash=problemHash, mmap=mmap)
+        except (StaleEntryError, KeyError):
+            return None
+
+    def put(self, stateL, stateR, gamma, wavefan, profiles=None):
+        problemHash = computeProblemHash(stateL, stateR, gamma)
+        temporaryPath = self.path(problemHash) + '.tmp'
+        saveWavefan(temporaryPath, wavefan, problemHash=problemHash, profiles=profiles)
+        os.replace(temporaryPath, self.path(problemHash))
+        return problemHash
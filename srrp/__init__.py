@@ -1,6 +1,18 @@
 from .Solver import Solver
+from .SolverStats import SolverStats
 from .State import State
+from .StateArray import StateArray
+from .EquationOfState import EquationOfState, IdealEquationOfState, TaubMathewsEquationOfState, TabulatedEquationOfState
 from .ContactDiscontinuity import ContactDiscontinuity
 from .Wavefan import Wavefan
 from .Shock import Shock
-from .Rarefaction import Rarefaction
\ No newline at end of file
+from .Rarefaction import Rarefaction
+from .BatchSolution import BatchSolution
+from .StarSolution import StarSolution
+from .Sweep import sweep
+from .Godunov import godunov_flux
+from .SolutionCache import SolutionCache
+from .StarSurrogate import StarSurrogate
+from .FiniteVolume import FiniteVolume
+from .WavefanStore import WavefanStore, saveWavefan, loadWavefan
+from .SolverService import SolverServer, SolverClient, SolverServiceError
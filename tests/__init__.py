@@ -3,3 +3,17 @@ from .integration.rezzolla2003 import *
 from .unit.wavefan_test import *
 from .unit.rarefaction_test import *
 from .unit.solver_test import *
+from .unit.isentrope_integral_test import *
+from .unit.sweep_test import *
+from .unit.state_array_test import *
+from .unit.solution_cache_test import *
+from .unit.wavefan_store_test import *
+from .unit.shock_test import *
+from .unit.solver_stats_test import *
+from .unit.equation_of_state_test import *
+from .unit.star_surrogate_test import *
+from .unit.godunov_test import *
+from .unit.finite_volume_test import *
+from .unit.kernels_test import *
+from .unit.import_test import *
+from .unit.solver_service_test import *
@@ -0,0 +1,131 @@
+import srrp
+import unittest
+import numpy as np
+from srrp.EquationOfState import EquationOfState, IdealEquationOfState, TaubMathewsEquationOfState, \
+    TabulatedEquationOfState
+
+
+class GenericIdealEquationOfState(EquationOfState):
+    # ideal gas through the generic implementations of EquationOfState only
+    def __init__(self, gamma):
+        self.sigma = gamma / (gamma - 1)
+
+    def computeEnthalpyFromTheta(self, theta):
+        return 1 + self.sigma * theta
+
+    def computeDEnthalpyDTheta(self, theta):
+        return self.sigma + 0 * np.asarray(theta)
+
+    def computeThetaFromEnthalpy(self, h):
+        return (h - 1) / self.sigma
+
+    def computeLogDensity(self, theta):
+        return (self.sigma - 1) * np.log(theta)
+
+
+def copyState(state):
+    return srrp.State(state.rho, state.vx, state.vt, state.pressure)
+
+
+PROBLEMS = [
+    (srrp.State(rho=1, vx=0.5, vt=0, pressure=1), srrp.State(rho=0.125, vx=0, vt=0.9, pressure=0.1)),
+    (srrp.State(rho=1, vx=0, vt=0.9, pressure=1e3), srrp.State(rho=1, vx=0, vt=0.9, pressure=1e-2)),
+    (srrp.State(rho=1, vx=-0.5, vt=0.3, pressure=1), srrp.State(rho=1, vx=0.5, vt=0, pressure=1)),
+    (srrp.State(rho=1, vx=0.5, vt=0, pressure=1), srrp.State(rho=1, vx=-0.5, vt=0, pressure=1)),
+    (srrp.State(rho=0.01, vx=-0.9, vt=0.3, pressure=1), srrp.State(rho=0.02, vx=0.9, vt=0.4, pressure=1)),
+]
+
+
+class EquationOfStateTest(unittest.TestCase):
+    def test_taub_mathews(self):
+        eos = TaubMathewsEquationOfState()
+        theta = np.logspace(-6, 1, 50)
+        h = eos.computeEnthalpyFromTheta(theta)
+        np.testing.assert_allclose((h - theta) * (h - 4 * theta), 1, rtol=1e-10)
+        np.testing.assert_allclose(eos.computeThetaFromEnthalpy(h), theta, rtol=1e-9)
+        np.testing.assert_allclose(eos.computeSpeedOfSoundFromTheta(theta) ** 2,
+                                   theta * (5 * h - 8 * theta) / (3 * h * (h - theta)), rtol=1e-12)
+
+        pressures = np.logspace(-8, 6, 30)
+        theta = eos.computeThetaOnIsentrope(pressures, 2.3)
+        np.testing.assert_allclose(eos.computePressureOnIsentrope(theta, 2.3), pressures, rtol=1e-13)
+        self.assertEqual(eos.computeRhoOnIsentrope(0., 2.3), 0)
+
+    def test_taub_adiabat(self):
+        eos = TaubMathewsEquationOfState()
+        stateA = srrp.State(rho=2, vx=0.1, vt=0.2, pressure=0.7)
+        pressures = np.array([0.1, 0.7, 1, 10, 1e4])
+        hA = eos.computeEnthalpy(stateA.pressure, stateA.rho)
+        hB = eos.computeTaubAdiabat(stateA, pressures)
+        np.testing.assert_allclose(hB ** 2 - hA ** 2, (hA / stateA.rho + hB / eos.computeRho(pressures, hB)) * (
+                pressures - stateA.pressure), atol=1e-11)
+
+        derivative = eos.computeTaubAdiabatDerivative(stateA, pressures, hB)
+        dp = 1e-6 * pressures
+        finiteDifference = (eos.computeTaubAdiabat(stateA, pressures + dp)
+                            - eos.computeTaubAdiabat(stateA, pressures - dp)) / (2 * dp)
+        np.testing.assert_allclose(derivative, finiteDifference, rtol=1e-7)
+
+    def test_shock_derivative(self):
+        eos = TaubMathewsEquationOfState()
+        stateA = srrp.State(rho=1, vx=0.3, vt=0.5, pressure=1)
+        for sign in [-1, +1]:
+            for pressureB in [1.5, 30, 1e3]:
+                dp = 1e-4 * pressureB
+                finiteDifference = (srrp.Shock.computeVxb(stateA, pressureB + dp, eos, sign)
+                                    - srrp.Shock.computeVxb(stateA, pressureB - dp, eos, sign)) / (2 * dp)
+                derivative = srrp.Shock.computeDVxbDp(stateA, pressureB, eos, sign)
+                self.assertAlmostEqual(derivative, finiteDifference, delta=1e-5 * abs(derivative))
+
+    def test_tabulated(self):
+        eos = TaubMathewsEquationOfState()
+        tabulated = TabulatedEquationOfState.fromFunction(eos.computeEnthalpyFromTheta)
+        theta = np.logspace(-4, 7, 500)
+        for method in ['computeEnthalpyFromTheta', 'computeDEnthalpyDTheta', 'computeSpeedOfSoundFromTheta']:
+            np.testing.assert_allclose(getattr(tabulated, method)(theta), getattr(eos, method)(theta), rtol=1e-8)
+        h = eos.computeEnthalpyFromTheta(theta)
+        np.testing.assert_allclose(tabulated.computeThetaFromEnthalpy(h), theta, rtol=1e-8)
+
+    def test_generic_ideal(self):
+        xis = np.linspace(-1, 1, 41)
+        for stateL, stateR in PROBLEMS:
+            solver = srrp.Solver()
+            solution = solver.solve(copyState(stateL), copyState(stateR), IdealEquationOfState(5 / 3))
+            genericSolver = srrp.Solver()
+            generic = genericSolver.solve(copyState(stateL), copyState(stateR), GenericIdealEquationOfState(5 / 3))
+            self.assertEqual(solver.solution_type, genericSolver.solution_type)
+            self.assertAlmostEqual(solution.states[1].pressure, generic.states[1].pressure,
+                                   delta=1e-12 * solution.states[1].pressure)
+            np.testing.assert_allclose(solution.getState(xis).rho, generic.getState(xis).rho, rtol=1e-10, atol=1e-14)
+
+    def test_solve_taub_mathews(self):
+        eos = TaubMathewsEquationOfState()
+        tabulated = TabulatedEquationOfState.fromFunction(eos.computeEnthalpyFromTheta)
+        xis = np.linspace(-1, 1, 41)
+        for stateL, stateR in PROBLEMS:
+            solver = srrp.Solver()
+            solution = solver.solve(copyState(stateL), copyState(stateR), eos)
+            batch = srrp.Solver().solve_many(srrp.StateArray.fromStates([stateL]), srrp.StateArray.fromStates([stateR]),
+                                             eos)
+            self.assertEqual(batch.solutionType[0], solver.solution_type)
+            self.assertAlmostEqual(batch.pressure[0], solution.states[1].pressure,
+                                   delta=1e-10 * solution.states[1].pressure)
+
+            tabulatedSolution = srrp.Solver().solve(copyState(stateL), copyState(stateR), tabulated)
+            self.assertAlmostEqual(tabulatedSolution.states[1].pressure, solution.states[1].pressure,
+                                   delta=1e-8 * solution.states[1].pressure)
+            np.testing.assert_allclose(tabulatedSolution.getState(xis).rho, solution.getState(xis).rho, rtol=1e-7,
+                                       atol=1e-12)
+
+    def test_cold_limit(self):
+        # far below the rest mass energy the Taub-Mathews gas behaves like an ideal gas with gamma = 5/3
+        stateL = srrp.State(rho=1, vx=0, vt=0, pressure=1e-6)
+        stateR = srrp.State(rho=0.125, vx=0, vt=0, pressure=1e-7)
+        ideal = srrp.Solver().solve(copyState(stateL), copyState(stateR), 5 / 3)
+        taubMathews = srrp.Solver().solve(copyState(stateL), copyState(stateR), TaubMathewsEquationOfState())
+        self.assertAlmostEqual(ideal.states[1].pressure, taubMathews.states[1].pressure,
+                               delta=1e-5 * ideal.states[1].pressure)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import srrp
+import unittest
+import numpy as np
+from srrp.EquationOfState import IdealEquationOfState, TaubMathewsEquationOfState
+from srrp.FiniteVolume import computePrimitive
+
+
+class FiniteVolumeTest(unittest.TestCase):
+    stateL = srrp.State(rho=1, vx=0.5, vt=0, pressure=1)
+    stateR = srrp.State(rho=0.125, vx=0, vt=0.5, pressure=0.1)
+
+    def test_primitive(self):
+        rng = np.random.default_rng(1)
+        speed, angle = rng.uniform(0, 0.999, 200), rng.uniform(0, 2 * np.pi, 200)
+        states = srrp.StateArray(rho=10 ** rng.uniform(-3, 3, 200), vx=speed * np.cos(angle),
+                                 vt=speed * np.sin(angle), pressure=10 ** rng.uniform(-4, 4, 200))
+        for eos in [IdealEquationOfState(4 / 3), TaubMathewsEquationOfState()]:
+            primitive = computePrimitive(*states.conserved(eos), eos)
+            for var in srrp.StateArray.variables:
+                np.testing.assert_allclose(getattr(primitive, var), getattr(states, var), rtol=1e-9, atol=1e-12)
+
+    def test_uniform_flow(self):
+        state = srrp.State(rho=1, vx=0.9, vt=0.3, pressure=0.1)
+        for flux in srrp.FiniteVolume.fluxes:
+            _, states = srrp.FiniteVolume(5 / 3, flux=flux).evolve(state, state, cells=20, t=0.1)
+            np.testing.assert_allclose(states.rho, 1, rtol=1e-12)
+            np.testing.assert_allclose(states.vx, 0.9, rtol=1e-12)
+
+    def test_convergence(self):
+        for flux in ['hll', 'hllc']:
+            rows = srrp.FiniteVolume(5 / 3, flux=flux, order=2).convergence(self.stateL, self.stateR, t=0.4,
+                                                                             cells=[50, 100, 200])
+            self.assertTrue(np.isnan(rows[0].order))
+            for row in rows[1:]:
+                self.assertGreater(row.order, 0.5)
+            self.assertLess(rows[-1].error, 1e-2)
+
+        first = srrp.FiniteVolume(5 / 3, flux='hllc', order=1).convergence(self.stateL, self.stateR, t=0.4,
+                                                                            cells=[50, 100])
+        self.assertGreater(first[-1].error, rows[-2].error)
+
+    def test_fluxes(self):
+        # the exact Godunov flux and HLLC resolve the contact at least as sharp as HLL
+        errors = {flux: srrp.FiniteVolume(5 / 3, flux=flux, order=1).convergence(
+            self.stateL, self.stateR, t=0.4, cells=[50])[0].error for flux in srrp.FiniteVolume.fluxes}
+        self.assertLess(errors['hllc'], errors['hll'])
+        self.assertLess(errors['exact'], errors['hll'])
+        self.assertAlmostEqual(errors['exact'], errors['hllc'], delta=0.2 * errors['hllc'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import srrp
+import unittest
+import numpy as np
+from srrp.EquationOfState import IdealEquationOfState, TaubMathewsEquationOfState
+
+PROBLEMS = [
+    # transonic rarefactions to the left and to the right
+    (srrp.State(rho=1, vx=0, vt=0, pressure=1), srrp.State(rho=1e-3, vx=0, vt=0, pressure=1e-3)),
+    (srrp.State(rho=1e-3, vx=0, vt=0.3, pressure=1e-3), srrp.State(rho=1, vx=0, vt=0.5, pressure=1)),
+    (srrp.State(rho=1, vx=0.5, vt=0, pressure=1), srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1)),
+    (srrp.State(rho=1, vx=0, vt=0.9, pressure=1e3), srrp.State(rho=1, vx=0, vt=0.9, pressure=1e-2)),
+    (srrp.State(rho=1, vx=0.5, vt=0, pressure=1), srrp.State(rho=1, vx=-0.5, vt=0, pressure=1)),
+    (srrp.State(rho=1, vx=0.9, vt=0, pressure=1), srrp.State(rho=1, vx=0.9, vt=0, pressure=0.5)),
+    (srrp.State(rho=1, vx=-0.9, vt=0.1, pressure=0.5), srrp.State(rho=1, vx=-0.9, vt=0, pressure=1)),
+    # vacuum at the interface
+    (srrp.State(rho=0.01, vx=-0.9, vt=0.3, pressure=1), srrp.State(rho=0.02, vx=0.9, vt=0.4, pressure=1)),
+    # no waves
+    (srrp.State(rho=1, vx=0.1, vt=0.2, pressure=1), srrp.State(rho=1, vx=0.1, vt=0.2, pressure=1)),
+]
+
+
+def copyState(state):
+    return srrp.State(state.rho, state.vx, state.vt, state.pressure)
+
+
+class GodunovTest(unittest.TestCase):
+    def test_batch_get_state(self):
+        statesL = srrp.StateArray.fromStates([stateL for stateL, _ in PROBLEMS])
+        statesR = srrp.StateArray.fromStates([stateR for _, stateR in PROBLEMS])
+        batch = srrp.Solver().solve_many(statesL, statesR, 5 / 3)
+        for xi in [-0.5, 0, 0.3]:
+            states = batch.getState(xi)
+            for idx, (stateL, stateR) in enumerate(PROBLEMS):
+                state = srrp.Solver().solve(copyState(stateL), copyState(stateR), 5 / 3).getState(np.array([xi]))
+                for var in srrp.StateArray.variables:
+                    self.assertAlmostEqual(getattr(states, var)[idx], getattr(state, var)[0], places=10)
+
+    def test_godunov_flux(self):
+        statesL = srrp.StateArray.fromStates([stateL for stateL, _ in PROBLEMS])
+        statesR = srrp.StateArray.fromStates([stateR for _, stateR in PROBLEMS])
+        for gamma, eos in [(5 / 3, IdealEquationOfState(5 / 3)), (TaubMathewsEquationOfState(),) * 2]:
+            fluxes = srrp.godunov_flux(statesL, statesR, gamma, chunkSize=4)
+            for idx, (stateL, stateR) in enumerate(PROBLEMS):
+                solution = srrp.Solver().solve(copyState(stateL), copyState(stateR), gamma)
+                expected = solution.getState(np.array([0.])).fluxes(eos)
+                for flux, value in zip(fluxes, expected):
+                    self.assertAlmostEqual(flux[idx], value[0], delta=1e-10 * (1 + abs(value[0])))
+
+        # a uniform state only advects
+        D, S_x, S_t, tau = srrp.StateArray.fromStates([PROBLEMS[-1][0]]).conserved(IdealEquationOfState(5 / 3))
+        state = PROBLEMS[-1][0]
+        fluxes = srrp.godunov_flux(state, state, 5 / 3)
+        np.testing.assert_allclose(fluxes, [D * state.vx, S_x * state.vx + state.pressure, S_t * state.vx,
+                                            S_x - D * state.vx])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import srrp
+import sys
+import unittest
+from srrp.EquationOfState import IdealEquationOfState, EntropyConservation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ImportTest(unittest.TestCase):
+    def test_scipy_free(self):
+        # the import and the solve path of srrp only need numpy, SciPy is imported lazily where it is still used
+        # (Numba imports SciPy itself, so the kernels run as plain Python here)
+        code = '''
+import sys
+sys.modules['numba'] = None
+import numpy as np
+import srrp
+for eos in [5 / 3, srrp.TaubMathewsEquationOfState()]:
+    for backend in srrp.Solver.backends:
+        solution = srrp.Solver(backend=backend).solve(srrp.State(1, 0, 0.5, 1), srrp.State(0.125, 0, 0, 0.1), eos)
+        solution.getState(np.linspace(-1, 1, 11))
+        solution.waves[0].computeRarefactionState(solution.waves[0].speedHead)
+print(any(module.split('.')[0] == 'scipy' for module in sys.modules))
+'''
+        environment = dict(os.environ, PYTHONPATH=ROOT)
+        output = subprocess.run([sys.executable, '-c', code], env=environment, check=True, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, universal_newlines=True).stdout
+        self.assertEqual(output.strip(), 'False')
+
+    def test_without_scipy(self):
+        # single pressures without an isentrope table fall back to the table if SciPy is not installed
+        code = '''
+import sys
+sys.modules['scipy'] = None
+import srrp
+from srrp.EquationOfState import IdealEquationOfState, EntropyConservation
+stateA = srrp.State(rho=1, vx=0.3, vt=0.5, pressure=1)
+isentrope = EntropyConservation.fromState(stateA, IdealEquationOfState(5 / 3))
+print(repr(float(srrp.Rarefaction.computeVxb(stateA, 0.1, isentrope, -1))))
+'''
+        environment = dict(os.environ, PYTHONPATH=ROOT)
+        output = subprocess.run([sys.executable, '-c', code], env=environment, check=True, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, universal_newlines=True).stdout
+        stateA = srrp.State(rho=1, vx=0.3, vt=0.5, pressure=1)
+        isentrope = EntropyConservation.fromState(stateA, IdealEquationOfState(5 / 3))
+        self.assertAlmostEqual(float(output), srrp.Rarefaction.computeVxb(stateA, 0.1, isentrope, -1), places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import srrp
+import unittest
+import numpy as np
+from srrp.EquationOfState import IdealEquationOfState
+from srrp.IsentropeIntegral import IsentropeIntegral
+
+
+class IsentropeIntegralTest(unittest.TestCase):
+    def test_matches_quadrature(self):
+        eos = IdealEquationOfState(5 / 3)
+        for state in [srrp.State(rho=1, vx=0.2, vt=0.9, pressure=1000),
+                      srrp.State(rho=0.125, vx=0, vt=0.99, pressure=0.1)]:
+            integral = IsentropeIntegral.fromState(state, eos)
+            self.assertLessEqual(integral.errorEstimate, integral.tolerance)
+            for pressure in np.geomspace(1e-6, 2 * state.pressure, 10):
+                expected = srrp.Rarefaction.computeVxb(state, pressure, integral.isentrope, sign=+1)
+                actual = srrp.Rarefaction.computeVxb(state, pressure, integral.isentrope, sign=+1, integral=integral)
+                self.assertAlmostEqual(expected, actual, places=12)
+
+    def test_vanishing_tangential_velocity(self):
+        # For A = 0 the integrand in the isentrope coordinate is the constant 2 / sqrt(gamma - 1)
+        gamma = 4 / 3
+        eos = IdealEquationOfState(gamma)
+        integral = IsentropeIntegral.fromState(srrp.State(rho=1, vx=0, vt=0, pressure=10), eos)
+        s = integral.isentrope.computeCoordinate(np.array([0.1, 1, 10]))
+        np.testing.assert_allclose(integral.computeIntegralCoordinate(s), 2 * s / np.sqrt(gamma - 1), rtol=1e-14)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import srrp
+import copy
+import unittest
+import math
+import scipy.integrate
+from srrp import Kernels
+from srrp.EquationOfState import IdealEquationOfState, EntropyConservation
+
+
+PROBLEMS = [
+    (srrp.State(rho=1, vx=0, vt=0.3, pressure=1), srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1)),
+    (srrp.State(rho=1, vx=0.5, vt=0, pressure=1), srrp.State(rho=1, vx=-0.5, vt=0, pressure=1)),
+    (srrp.State(rho=1, vx=-0.9, vt=0.3, pressure=1), srrp.State(rho=1, vx=0.9, vt=0, pressure=0.5)),
+    (srrp.State(rho=0.01, vx=-0.9, vt=0.3, pressure=1), srrp.State(rho=0.02, vx=0.9, vt=0.4, pressure=1)),
+    (srrp.State(rho=1, vx=0, vt=0.9, pressure=1e-2), srrp.State(rho=1, vx=0, vt=0.9, pressure=1e3)),
+    (srrp.State(rho=1, vx=0.99, vt=0, pressure=1), srrp.State(rho=1, vx=-0.99, vt=0.1, pressure=1e-3)),
+]
+
+
+class KernelsTest(unittest.TestCase):
+    def test_star_root(self):
+        args = (1., 0., 0., 1., 0.125, 0., 0., 0.1, 5 / 3, 0.)
+        a, b = math.log(0.1), math.log(1.)
+        root = Kernels.findStarRoot(args, a, b, Kernels.starResidual(a, args), Kernels.starResidual(b, args))
+        self.assertAlmostEqual(Kernels.starResidual(root, args), 0, places=14)
+        reference = srrp.Solver().solve(srrp.State(rho=1, vx=0, vt=0, pressure=1),
+                                        srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1), 5 / 3)
+        self.assertAlmostEqual(math.exp(root), reference.states[1].pressure, places=12)
+
+    def test_rarefaction_integral(self):
+        for args in [(5 / 3, 0.), (4 / 3, 0.5), (5 / 3, 20.)]:
+            for a, b in [(1., 0.), (1e-3, 0.), (30., 0.1)]:
+                reference = scipy.integrate.quad(Kernels.rarefactionIntegrand, a, b, args=(args,), epsabs=1e-14,
+                                                 epsrel=1e-13)[0]
+                self.assertAlmostEqual(Kernels.integrateRarefaction(args, a, b), reference,
+                                       delta=1e-12 * max(1, abs(reference)))
+        self.assertEqual(Kernels.integrateRarefaction((5 / 3, 0.), 1., 1.), 0)
+
+    def test_wave_velocities(self):
+        eos = IdealEquationOfState(5 / 3)
+        stateA = srrp.State(rho=2, vx=0.3, vt=0.4, pressure=0.7)
+        isentrope = EntropyConservation.fromState(stateA, eos)
+        for sign in [-1, 1]:
+            for pressureB in [0.7 * (1 + 1e-10), 1, 10, 1e4]:
+                self.assertAlmostEqual(
+                    Kernels.computeShockVxb(stateA.rho, stateA.vx, stateA.vt, stateA.pressure, pressureB, 5 / 3, sign),
+                    srrp.Shock.computeVxb(stateA, pressureB, eos, sign), places=13)
+            for pressureB in [0, 1e-6, 0.1, 0.7]:
+                self.assertAlmostEqual(
+                    Kernels.computeRarefactionVxb(stateA.rho, stateA.vx, stateA.vt, stateA.pressure, pressureB, 5 / 3,
+                                                  sign),
+                    srrp.Rarefaction.computeVxb(stateA, pressureB, isentrope, sign), places=10)
+
+    def test_solver_backends(self):
+        for gamma in [4 / 3, 5 / 3]:
+            for stateL, stateR in PROBLEMS:
+                reference = srrp.Solver(backend='numpy')
+                referenceSolution = reference.solve(copy.copy(stateL), copy.copy(stateR), gamma)
+                solver = srrp.Solver(backend='kernels')
+                solution = solver.solve(copy.copy(stateL), copy.copy(stateR), gamma)
+                self.assertEqual(solver.solution_type, reference.solution_type)
+                for state, referenceState in zip(solution.states, referenceSolution.states):
+                    for var in srrp.StateArray.variables:
+                        self.assertAlmostEqual(getattr(state, var), getattr(referenceState, var),
+                                               delta=1e-11 * max(1, abs(getattr(referenceState, var))))
+
+                star = srrp.Solver(backend='kernels').solve_star(copy.copy(stateL), copy.copy(stateR), gamma)
+                self.assertEqual(star.pressure, solution.states[1].pressure)
+
+        with self.assertRaises(ValueError):
+            srrp.Solver(backend='fortran')
+
+
+if __name__ == '__main__':
+    unittest.main()
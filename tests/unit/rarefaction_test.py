@@ -1,7 +1,7 @@
 import srrp
 import unittest
 import numpy as np
-from srrp.EquationOfState import IdealEquationOfState
+from srrp.EquationOfState import IdealEquationOfState, EntropyConservation
 
 
 class RarefactionTest(unittest.TestCase):
@@ -16,6 +16,63 @@ class RarefactionTest(unittest.TestCase):
             self.assertLessEqual(state.rho, stateA.rho)
             self.assertLessEqual(state.pressure, stateA.pressure)
 
+    def test_batched_rarefaction_states(self):
+        stateA = srrp.State(rho=1, vx=0.3, vt=0.9, pressure=1000)
+        eos = IdealEquationOfState(5 / 3)
+        isentrope = EntropyConservation.fromState(stateA, eos)
+        vxB = srrp.Rarefaction.computeVxb(stateA, 0.2, isentrope, sign=-1)
+        rarefaction = srrp.Rarefaction.fromStateAheadAndSpeedPressureBehind(stateA, vxB, 0.2, eos, sign=-1)
+        eps = 1e-9 * (rarefaction.speedHead - rarefaction.speedTail)
+        xis = np.linspace(rarefaction.speedHead - eps, rarefaction.speedTail + eps, 20)
+
+        states = rarefaction.computeRarefactionStates(xis)
+        for idx, xi in enumerate(xis):
+            state = rarefaction.computeRarefactionState(xi)
+            self.assertAlmostEqual(state.pressure, states.pressure[idx], delta=1e-10 * state.pressure)
+            self.assertAlmostEqual(state.rho, states.rho[idx], delta=1e-10 * state.rho)
+            self.assertAlmostEqual(state.vx, states.vx[idx], places=12)
+            self.assertAlmostEqual(state.vt, states.vt[idx], places=12)
+
+    def test_vacuum_tail(self):
+        # the tail of a fan into vacuum has h = 1 and a finite tangential velocity
+        stateA = srrp.State(rho=1, vx=-0.99, vt=0.1, pressure=0.01)
+        eos = IdealEquationOfState(5 / 3)
+        rarefaction = srrp.Solver().solve(stateA, srrp.State(rho=1, vx=0.99, vt=0, pressure=0.01), eos).waves[0]
+        with np.errstate(divide='raise', invalid='raise'):
+            state = rarefaction.computeRarefactionState(rarefaction.speedTail)
+            states = rarefaction.computeRarefactionStates(np.array([rarefaction.speedTail, rarefaction.speedHead]))
+            fanStates = srrp.Rarefaction.computeFanStates(
+                srrp.StateArray(*[np.array([getattr(stateA, var)]) for var in srrp.StateArray.variables]),
+                srrp.StateArray(*[np.array([getattr(rarefaction.stateB, var)]) for var in srrp.StateArray.variables]),
+                np.array([rarefaction.speedTail]), eos, sign=-1)
+        # (the scalar root finder stops at a small positive pressure, where vt is still steep in p)
+        self.assertAlmostEqual(state.vt, rarefaction.stateB.vt, places=3)
+        for vt in [states.vt[0], fanStates.vt[0]]:
+            self.assertAlmostEqual(vt, rarefaction.stateB.vt, places=12)
+        self.assertAlmostEqual(states.vt[1], stateA.vt, places=12)
+
+    def test_velocity_derivative(self):
+        stateA = srrp.State(rho=1, vx=0.3, vt=0.5, pressure=1)
+        eos = IdealEquationOfState(5 / 3)
+        isentrope = EntropyConservation.fromState(stateA, eos)
+        for sign in [-1, +1]:
+            for pressureB in [1e-3, 0.5]:
+                dp = 1e-6 * pressureB
+                finiteDifference = (srrp.Rarefaction.computeVxb(stateA, pressureB + dp, isentrope, sign)
+                                    - srrp.Rarefaction.computeVxb(stateA, pressureB - dp, isentrope, sign)) / (2 * dp)
+                derivative = srrp.Rarefaction.computeDVxbDp(stateA, pressureB, isentrope, sign)
+                self.assertAlmostEqual(derivative, finiteDifference, delta=1e-7 * abs(derivative))
+
+    def test_pressure_array(self):
+        stateA = srrp.State(rho=1, vx=0.3, vt=0.5, pressure=1)
+        isentrope = EntropyConservation.fromState(stateA, IdealEquationOfState(5 / 3))
+        pressures = np.array([0, 1e-3, 0.5, 1, 2])
+        for sign in [-1, +1]:
+            vxB = srrp.Rarefaction.computeVxb(stateA, pressures, isentrope, sign)
+            for idx, pressureB in enumerate(pressures[1:], 1):
+                self.assertAlmostEqual(vxB[idx], srrp.Rarefaction.computeVxb(stateA, pressureB, isentrope, sign),
+                                       places=12)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,32 @@
+import srrp
+import unittest
+import numpy as np
+from srrp.EquationOfState import IdealEquationOfState
+
+
+class ShockTest(unittest.TestCase):
+    def test_velocity_derivative(self):
+        eos = IdealEquationOfState(5 / 3)
+        states = [srrp.State(rho=1, vx=0.3, vt=0.5, pressure=1), srrp.State(rho=10, vx=-0.7, vt=0.1, pressure=1e-2)]
+        for stateA in states:
+            for sign in [-1, +1]:
+                for pressureB in [1.5, 30, 1e3]:
+                    dp = 1e-6 * pressureB
+                    finiteDifference = (srrp.Shock.computeVxb(stateA, pressureB + dp, eos, sign)
+                                        - srrp.Shock.computeVxb(stateA, pressureB - dp, eos, sign)) / (2 * dp)
+                    derivative = srrp.Shock.computeDVxbDp(stateA, pressureB, eos, sign)
+                    self.assertAlmostEqual(derivative, finiteDifference, delta=1e-4 * abs(derivative))
+
+    def test_pressure_array(self):
+        eos = IdealEquationOfState(5 / 3)
+        stateA = srrp.State(rho=1, vx=0.3, vt=0.5, pressure=1)
+        pressures = np.array([0.2, 1, 1.5, 30])
+        for sign in [-1, +1]:
+            vxB = srrp.Shock.computeVxb(stateA, pressures, eos, sign)
+            self.assertEqual(vxB[1], stateA.vx)
+            for idx, pressureB in enumerate(pressures):
+                self.assertEqual(vxB[idx], srrp.Shock.computeVxb(stateA, pressureB, eos, sign))
+
+
+if __name__ == '__main__':
+    unittest.main()
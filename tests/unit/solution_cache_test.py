@@ -0,0 +1,32 @@
+import srrp
+import unittest
+
+
+class SolutionCacheTest(unittest.TestCase):
+    def test_hits_and_eviction(self):
+        cache = srrp.SolutionCache(maxsize=2)
+        stateL = srrp.State(rho=1, vx=0.5, vt=0, pressure=1)
+        stateR = srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1)
+
+        solution = cache.solve(stateL, stateR, 5 / 3)
+        self.assertIs(cache.solve(srrp.State(rho=1, vx=0.5, vt=0, pressure=1), stateR, 5 / 3), solution)
+        self.assertEqual(cache.cacheInfo(), (1, 1, 2, 1))
+
+        cache.solve(stateL, stateR, 4 / 3)
+        cache.solve(stateL, srrp.State(rho=0.125, vx=0, vt=0.5, pressure=0.1), 5 / 3)
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn((stateL, stateR, 5 / 3), cache)
+        self.assertIn((stateL, stateR, 4 / 3), cache)
+
+    def test_tolerance(self):
+        cache = srrp.SolutionCache(tolerance=1e-8)
+        stateR = srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1)
+        solution = cache.solve(srrp.State(rho=1, vx=0.5, vt=0, pressure=1), stateR, 5 / 3)
+        self.assertIs(cache.solve(srrp.State(rho=1 + 1e-12, vx=0.5, vt=0, pressure=1), stateR, 5 / 3), solution)
+        self.assertIsNot(cache.solve(srrp.State(rho=1 + 1e-6, vx=0.5, vt=0, pressure=1), stateR, 5 / 3), solution)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import socket
+import srrp
+import tempfile
+import threading
+import unittest
+import numpy as np
+from srrp.SolverService import REQUEST, RESPONSE, STATUS_ERROR
+
+
+def randomProblems(size, seed=0):
+    random = np.random.RandomState(seed)
+    statesL = srrp.StateArray(rho=10 ** random.uniform(-1, 1, size), vx=random.uniform(-0.9, 0.9, size),
+                              vt=random.uniform(0, 0.4, size), pressure=10 ** random.uniform(-2, 2, size))
+    statesR = srrp.StateArray(rho=10 ** random.uniform(-1, 1, size), vx=random.uniform(-0.9, 0.9, size),
+                              vt=random.uniform(0, 0.4, size), pressure=10 ** random.uniform(-2, 2, size))
+    return statesL, statesR
+
+
+class SolverServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = srrp.SolverServer(os.path.join(self.directory, 'srrp.sock'), batchWindow=0.01).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        os.rmdir(self.directory)
+
+    def test_solve(self):
+        statesL, statesR = randomProblems(40)
+        expected = srrp.Solver().solve_many(statesL, statesR, 4 / 3)
+        with srrp.SolverClient(self.server.address) as client:
+            for _ in range(2):
+                batch = client.solve(statesL, statesR, 4 / 3)
+                np.testing.assert_array_equal(batch.solutionType, expected.solutionType)
+                np.testing.assert_array_equal(batch.pressure, expected.pressure)
+                np.testing.assert_array_equal(batch.waveSpeeds, expected.waveSpeeds)
+                np.testing.assert_array_equal(batch.isShockR, expected.isShockR)
+                np.testing.assert_array_equal(batch.states[1].vt, expected.states[1].vt)
+        self.assertEqual(self.server.cacheInfo()[:2], (40, 40))
+
+    def test_get_state(self):
+        statesL, statesR = randomProblems(3, seed=1)
+        xis = np.linspace(-1, 1, 51)
+        with srrp.SolverClient(self.server.address) as client:
+            states = client.getState(statesL, statesR, 5 / 3, xis)
+        for idx in range(3):
+            wavefan = srrp.Solver().solve(statesL[idx], statesR[idx], 5 / 3)
+            expected = wavefan.getState(xis)
+            for var in srrp.StateArray.variables:
+                np.testing.assert_allclose(getattr(states, var)[idx], getattr(expected, var), rtol=1e-10, atol=1e-12)
+
+    def test_concurrent_clients(self):
+        statesL, statesR = randomProblems(64, seed=2)
+        results = [None] * 8
+
+        def send(idx):
+            with srrp.SolverClient(self.server.address) as client:
+                chunk = range(8 * idx, 8 * idx + 8)
+                results[idx] = np.concatenate([client.solve(statesL[problem], statesR[problem], 5 / 3).pressure
+                                               for problem in chunk])
+
+        threads = [threading.Thread(target=send, args=(idx,)) for idx in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # (the lockstep iteration of a batch depends slightly on the problems batched together)
+        np.testing.assert_allclose(np.concatenate(results), srrp.Solver().solve_many(statesL, statesR, 5 / 3).pressure,
+                                   rtol=1e-12)
+        # concurrent requests are coalesced into batches
+        self.assertEqual(self.server.requests, 64)
+        self.assertLess(self.server.batches, 64)
+
+    def test_invalid_request(self):
+        statesL, statesR = randomProblems(8, seed=3)
+        statesL.vx[5] = 1.5
+        results = [None] * 8
+        barrier = threading.Barrier(8)
+
+        def send(idx):
+            with srrp.SolverClient(self.server.address) as client:
+                barrier.wait()
+                try:
+                    results[idx] = client.solve(statesL[idx], statesR[idx], 5 / 3).pressure
+                except srrp.SolverServiceError as error:
+                    results[idx] = error
+
+        threads = [threading.Thread(target=send, args=(idx,)) for idx in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # only the invalid problem fails, the ones batched with it are solved
+        self.assertIsInstance(results[5], srrp.SolverServiceError)
+        self.assertIn('rows [0]', str(results[5]))
+        for idx in [0, 1, 2, 3, 4, 6, 7]:
+            expected = srrp.Solver().solve(statesL[idx], statesR[idx], 5 / 3).states[1].pressure
+            np.testing.assert_allclose(results[idx], expected, rtol=1e-12)
+
+    def test_error(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.server.address)
+            connection.sendall(REQUEST.pack(99, 5 / 3, 0, 0))
+            status, size, _ = RESPONSE.unpack(connection.recv(RESPONSE.size, socket.MSG_WAITALL))
+            self.assertEqual(status, STATUS_ERROR)
+            self.assertIn('unknown operation', connection.recv(size, socket.MSG_WAITALL).decode())
+
+
+if __name__ == '__main__':
+    unittest.main()
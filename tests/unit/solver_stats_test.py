@@ -0,0 +1,55 @@
+import srrp
+import unittest
+import numpy as np
+from srrp.EquationOfState import IdealEquationOfState, EntropyConservation
+
+
+class SolverStatsTest(unittest.TestCase):
+    def test_solve(self):
+        stats = srrp.SolverStats()
+        solver = srrp.Solver(stats)
+        stateL = srrp.State(rho=1, vx=0, vt=0.5, pressure=1)
+        stateR = srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1)
+        solution = solver.solve(stateL, stateR, 5 / 3)
+        self.assertEqual(stats.counts['solves'], 1)
+        self.assertEqual(stats.counts['rootIterations'], solver.iterations)
+        self.assertGreaterEqual(stats.counts['tableBuilds'], 2)
+        for phase in ['integrals', 'classification', 'root', 'wavefan']:
+            self.assertGreater(stats.times[phase], 0)
+        self.assertNotIn('rarefaction', stats.times)
+
+        with stats:
+            solution.getState(np.linspace(-1, 1, 100))
+            solution.waves[0].computeRarefactionState(solution.waves[0].speedHead)
+        self.assertGreater(stats.times['rarefaction'], 0)
+        self.assertGreater(stats.counts['rarefactionIterations'], 0)
+
+        # nothing is recorded without active stats
+        counts = dict(stats.counts)
+        srrp.Solver().solve(srrp.State(rho=1, vx=0, vt=0, pressure=1), srrp.State(rho=1, vx=0, vt=0, pressure=0.1),
+                            5 / 3)
+        self.assertEqual(dict(stats.counts), counts)
+
+    def test_quadrature_counts(self):
+        stateA = srrp.State(rho=1, vx=0, vt=0.5, pressure=1)
+        isentrope = EntropyConservation.fromState(stateA, IdealEquationOfState(5 / 3))
+        with srrp.SolverStats() as stats:
+            srrp.Rarefaction.computeVxb(stateA, 0.5, isentrope, sign=-1)
+        self.assertEqual(stats.counts['quadCalls'], 1)
+        self.assertGreaterEqual(stats.counts['quadSubdivisions'], 1)
+
+    def test_aggregation(self):
+        statesL = srrp.State(rho=1, vx=0, vt=np.linspace(0, 0.9, 10), pressure=1)
+        statesR = srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1)
+        stats = srrp.SolverStats()
+        srrp.sweep(statesL, statesR, 5 / 3, workers=1, chunkSize=4, stats=stats)
+        self.assertEqual(stats.counts['solves'], 10)
+
+        total = stats + stats
+        self.assertEqual(total.counts['solves'], 20)
+        self.assertAlmostEqual(total.times['root'], 2 * stats.times['root'])
+        self.assertEqual(stats.counts['solves'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
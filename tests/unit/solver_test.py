@@ -1,4 +1,5 @@
 import srrp
+import copy
 import unittest
 import numpy as np
 
@@ -35,6 +36,128 @@ class SolverTest(unittest.TestCase):
         self.assertEqual(solution1.waves[1].speed, -solution2.waves[1].speed)
         self.assertEqual(solution1.waves[2].speed, -solution2.waves[0].speed)
 
+    def test_p_star_prediction(self):
+        # two rarefactions in cold gas without tangential velocities, where the prediction becomes exact
+        stateL = srrp.State(rho=1, vx=-1e-3, vt=0, pressure=1e-6)
+        stateR = srrp.State(rho=1, vx=1e-3, vt=0, pressure=1e-6)
+        solver = srrp.Solver()
+        solution = solver.solve(stateL, stateR, 5 / 3)
+        self.assertEqual(solver.solution_type, 'RR')
+        p_star = solution.states[1].pressure
+        self.assertAlmostEqual(solver.predict_p_star(srrp.Util.relativeSpeed(-1e-3, 1e-3)), p_star,
+                               delta=1e-3 * p_star)
+
+        for stateL, stateR in [(srrp.State(10, 0, 0.5, 13.3), srrp.State(1, 0, 0, 1e-6)),
+                               (srrp.State(1, 0.9, 0, 1), srrp.State(1, -0.9, 0.3, 1e-2))]:
+            solver.solve(stateL, stateR, 5 / 3)
+            self.assertLessEqual(solver.iterations, 6)
+
+    def test_du_curve(self):
+        solver = srrp.Solver()
+        solver.solve(srrp.State(rho=1, vx=0, vt=0.9, pressure=1), srrp.State(rho=0.125, vx=0.3, vt=0, pressure=0.1),
+                     5 / 3)
+        pressures = np.linspace(0.01, 2, 50)
+        dus = solver.get_du(pressures)
+        for p_star, du in zip(pressures, dus):
+            get_du = solver.get_du_RR if p_star < 0.1 else solver.get_du_RS if p_star < 1 else solver.get_du_SS
+            self.assertAlmostEqual(du, get_du(p_star), places=14)
+
+    def test_vacuum(self):
+        gamma = 5 / 3
+        stateL = srrp.State(rho=0.01, vx=-0.9, vt=0.3, pressure=1)
+        stateR = srrp.State(rho=0.02, vx=0.9, vt=0.4, pressure=1)
+        batch = srrp.Solver().solve_many(srrp.StateArray(0.01, -0.9, 0.3, 1), srrp.StateArray(0.02, 0.9, 0.4, 1), gamma)
+        solver = srrp.Solver()
+        solution = solver.solve(stateL, stateR, gamma)
+        self.assertEqual(solver.solution_type, 'RR*')
+        self.assertEqual(batch.solutionType[0], 'RR*')
+
+        for state, states in zip(solution.states[1:3], batch.states[1:3]):
+            self.assertEqual(state.pressure, 0)
+            self.assertEqual(state.rho, 0)
+            self.assertAlmostEqual(state.vx, states.vx[0], places=10)
+        np.testing.assert_allclose(solution.regionBoundaries[1:3] + solution.regionBoundaries[4:6],
+                                   batch.waveSpeeds[0, [0, 1, 3, 4]], atol=1e-10)
+        states = solution.getState(np.linspace(-1, 1, 101))
+        self.assertTrue(np.all(np.isfinite(states.rho)))
+        self.assertTrue(np.all(np.diff(states.vx) >= 0))
+
+    def test_near_vacuum(self):
+        # two rarefactions with p* far below the pressures of both states, where the lower bracket of the numpy path
+        # has to be stepped down to the root
+        stateL = srrp.State(rho=5.818, vx=0.543, vt=0.748, pressure=0.3197)
+        stateR = srrp.State(rho=2.546, vx=0.804, vt=-0.070, pressure=0.002875)
+        expected = srrp.Solver(backend='kernels').solve(copy.copy(stateL), copy.copy(stateR), 5 / 3)
+        solver = srrp.Solver()
+        solution = solver.solve(copy.copy(stateL), copy.copy(stateR), 5 / 3)
+        batch = srrp.Solver().solve_many(srrp.StateArray(5.818, 0.543, 0.748, 0.3197),
+                                         srrp.StateArray(2.546, 0.804, -0.070, 0.002875), 5 / 3)
+        self.assertEqual(solver.solution_type, 'RR')
+        self.assertLess(solution.states[1].pressure, 1e-15)
+        for pressure in [solution.states[1].pressure, batch.pressure[0]]:
+            self.assertAlmostEqual(pressure, expected.states[1].pressure, delta=1e-8 * expected.states[1].pressure)
+        self.assertAlmostEqual(solution.states[1].vx, expected.states[1].vx, places=12)
+
+    def test_solve_star(self):
+        gamma = 5 / 3
+        problems = [
+            (srrp.State(rho=1, vx=0.5, vt=0, pressure=1), srrp.State(rho=0.125, vx=0, vt=0.9, pressure=0.1)),
+            (srrp.State(rho=0.125, vx=0.3, vt=0, pressure=0.1), srrp.State(rho=1, vx=-0.5, vt=0.6, pressure=1)),
+            (srrp.State(rho=0.01, vx=-0.9, vt=0.3, pressure=1), srrp.State(rho=0.02, vx=0.9, vt=0.4, pressure=1))]
+        for stateL, stateR in problems:
+            stats = srrp.SolverStats()
+            star = srrp.Solver(stats=stats).solve_star(stateL, stateR, gamma)
+            self.assertFalse(star.isMaterialized)
+            self.assertNotIn('wavefan', stats.times)
+
+            solution = srrp.Solver().solve(stateL, stateR, gamma)
+            self.assertEqual(star.pressure, solution.states[1].pressure)
+            self.assertEqual(star.vxLPrime, solution.states[1].vx)
+            self.assertEqual(star.vxRPrime, solution.states[2].vx)
+            if star.solutionType != 'RR*':
+                self.assertEqual(star.contactSpeed, solution.waves[1].speed)
+
+            self.assertEqual(star.regionBoundaries, solution.regionBoundaries)
+            self.assertTrue(star.isMaterialized)
+            self.assertIn('wavefan', stats.times)
+            xis = np.linspace(-1, 1, 21)
+            np.testing.assert_array_equal(star.getState(xis).rho, solution.getState(xis).rho)
+
+    def test_solve_many(self):
+        gamma = 5 / 3
+        statesL = srrp.State(rho=np.array([1, 1, 1, 0.125, 1]), vx=np.array([0.5, 0, 0, 0, -0.5]),
+                             vt=np.array([0, 0.9, 0, 0.9, 0]), pressure=np.array([1, 1e3, 1, 0.1, 1]))
+        statesR = srrp.State(rho=np.array([0.125, 1, 0.125, 1, 1]), vx=np.array([0, 0, 0.5, -0.5, 0.5]),
+                             vt=np.array([0.9, 0.9, 0, 0, 0]), pressure=np.array([0.1, 1e-2, 0.1, 1, 1]))
+        batch = srrp.Solver().solve_many(statesL, statesR, gamma)
+        self.assertEqual(len(batch), 5)
+
+        for idx in range(len(batch)):
+            stateL = srrp.State(statesL.rho[idx], statesL.vx[idx], statesL.vt[idx], statesL.pressure[idx])
+            stateR = srrp.State(statesR.rho[idx], statesR.vx[idx], statesR.vt[idx], statesR.pressure[idx])
+            solver = srrp.Solver()
+            solution = solver.solve(stateL, stateR, gamma)
+            self.assertEqual(solver.solution_type, batch.solutionType[idx])
+            self.assertAlmostEqual(solution.states[1].pressure, batch.pressure[idx], delta=1e-9 * batch.pressure[idx])
+            self.assertAlmostEqual(solution.waves[1].speed, batch.contactSpeed[idx], places=10)
+            for state, states in zip(solution.states, batch.states):
+                self.assertAlmostEqual(state.rho, states.rho[idx], delta=1e-9 * state.rho)
+                self.assertAlmostEqual(state.vx, states.vx[idx], places=10)
+                self.assertAlmostEqual(state.vt, states.vt[idx], places=10)
+            self.assertEqual(isinstance(solution.waves[0], srrp.Shock), batch.isShockL[idx])
+            self.assertEqual(isinstance(solution.waves[2], srrp.Shock), batch.isShockR[idx])
+            boundaries = solution.regionBoundaries[1:-1]
+            speeds = [batch.waveSpeeds[idx, 0]] + ([] if batch.isShockL[idx] else [batch.waveSpeeds[idx, 1]]) + [
+                batch.waveSpeeds[idx, 2]] + ([] if batch.isShockR[idx] else [batch.waveSpeeds[idx, 3]]) + [
+                batch.waveSpeeds[idx, 4]]
+            np.testing.assert_allclose(boundaries, speeds, atol=1e-10)
+
+        invalidL = srrp.StateArray(rho=statesL.rho, vx=statesL.vx, vt=statesL.vt, pressure=np.array([1, -1, 1, 0.1, 1]))
+        invalidR = srrp.StateArray(rho=statesR.rho, vx=np.array([0, 0, 0.5, -0.5, 1]), vt=statesR.vt,
+                                   pressure=statesR.pressure)
+        with self.assertRaisesRegex(ValueError, r'rows \[1, 4\]'):
+            srrp.Solver().solve_many(invalidL, invalidR, gamma)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+import srrp
+import unittest
+import numpy as np
+
+
+def randomProblems(n, seed=42):
+    random = np.random.RandomState(seed)
+    pressureL = 10 ** random.uniform(-1, 1, n)
+    pressureR = pressureL * 10 ** random.uniform(-1, 1, n)
+    thetaL, thetaR = 10 ** random.uniform(-1, 1, (2, n))
+    du = random.uniform(-0.4, 0.4, n)
+    vxL = random.uniform(-0.5, 0.5, n)
+    vxR = (vxL - du) / (1 - vxL * du)
+    return (srrp.StateArray(rho=pressureL / thetaL, vx=vxL, vt=0, pressure=pressureL),
+            srrp.StateArray(rho=pressureR / thetaR, vx=vxR, vt=0, pressure=pressureR))
+
+
+class StarSurrogateTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.surrogate = srrp.StarSurrogate(5 / 3, pressureRatio=(0.1, 1), theta=(0.1, 10), normalVelocity=(-0.4, 0.4),
+                                           nodes=10)
+
+    def test_lookup(self):
+        statesL, statesR = randomProblems(500)
+        exact = srrp.Solver().solve_many(statesL, statesR, 5 / 3)
+        pressure, contactSpeed, errorEstimate = self.surrogate.lookup(statesL, statesR)
+        self.assertEqual(self.surrogate.vacuumNodes, 0)
+        self.assertTrue(np.all(np.isfinite(errorEstimate)))
+        np.testing.assert_allclose(pressure, exact.pressure, rtol=2 * np.max(errorEstimate))
+        np.testing.assert_allclose(contactSpeed, exact.contactSpeed, atol=2 * np.max(errorEstimate))
+
+        # outside of the table
+        _, _, errorEstimate = self.surrogate.lookup(srrp.State(rho=1, vx=0, vt=0.5, pressure=1),
+                                                    srrp.State(rho=1, vx=0, vt=0, pressure=0.5))
+        self.assertEqual(errorEstimate, np.inf)
+
+    def test_solve(self):
+        statesL, statesR = randomProblems(200, seed=1)
+        statesL.vt[:10] = 0.3
+        exact = srrp.Solver().solve_many(statesL, statesR, 5 / 3)
+
+        lookups, refinements = self.surrogate.lookups, self.surrogate.refinements
+        solution = self.surrogate.solve(statesL, statesR, tolerance=1e-2)
+        self.assertEqual(self.surrogate.lookups - lookups, 200)
+        self.assertEqual(self.surrogate.refinements - refinements, 10)
+        np.testing.assert_array_equal(solution.solutionType, exact.solutionType)
+        np.testing.assert_array_equal(solution.pressure[:10], exact.pressure[:10])
+        np.testing.assert_allclose(solution.pressure, exact.pressure, rtol=1e-3)
+        np.testing.assert_allclose(solution.waveSpeeds, exact.waveSpeeds, atol=1e-3)
+        for states, exactStates in zip(solution.states, exact.states):
+            np.testing.assert_allclose(states.rho, exactStates.rho, rtol=1e-3)
+            np.testing.assert_allclose(states.vx, exactStates.vx, atol=1e-3)
+
+        solution = self.surrogate.solve(statesL, statesR, tolerance=0)
+        np.testing.assert_array_equal(solution.pressure, exact.pressure)
+
+    def test_tangential(self):
+        surrogate = srrp.StarSurrogate(4 / 3, pressureRatio=(0.1, 1), theta=(0.1, 10), normalVelocity=(-0.4, 0.4),
+                                       tangential=(0, 0.5), nodes=[6, 6, 6, 6, 4, 4])
+        self.assertEqual(surrogate.cells, 2)
+        statesL, statesR = randomProblems(200, seed=2)
+        statesL.vt[:], statesR.vt[:] = 0.2, 0.3
+        exact = srrp.Solver().solve_many(statesL, statesR, 4 / 3)
+        pressure, _, errorEstimate = surrogate.lookup(statesL, statesR)
+        self.assertTrue(np.all(np.isfinite(errorEstimate)))
+        self.assertTrue(np.all(np.abs(pressure / exact.pressure - 1) <= errorEstimate))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import srrp
+import unittest
+import numpy as np
+from srrp.EquationOfState import IdealEquationOfState
+
+
+class StateArrayTest(unittest.TestCase):
+    def test_indexing(self):
+        states = srrp.StateArray.empty(4)
+        states[:2] = srrp.State(rho=1, vx=0.5, vt=0, pressure=1)
+        states[2:] = srrp.StateArray(rho=[0.125, 0.2], vx=0, vt=[0.9, 0.3], pressure=0.1)
+
+        np.testing.assert_array_equal(states.rho, [1, 1, 0.125, 0.2])
+        np.testing.assert_array_equal(states.vt, [0, 0, 0.9, 0.3])
+        self.assertEqual(len(states), 4)
+        self.assertEqual(states[2], srrp.State(rho=0.125, vx=0, vt=0.9, pressure=0.1))
+
+    def test_conserved(self):
+        eos = IdealEquationOfState(5 / 3)
+        state = srrp.State(rho=0.125, vx=0.4, vt=0.5, pressure=0.1)
+        D, Sx, St, tau = srrp.StateArray.fromStates([state, state]).conserved(eos)
+
+        h = eos.computeEnthalpy(state.pressure, state.rho)
+        W = state.lorentz()
+        np.testing.assert_allclose(D, state.rho * W)
+        np.testing.assert_allclose(Sx, state.rho * h * W ** 2 * state.vx)
+        np.testing.assert_allclose(St, state.rho * h * W ** 2 * state.vt)
+        np.testing.assert_allclose(tau, state.rho * h * W ** 2 - state.pressure - state.rho * W)
+
+
+if __name__ == '__main__':
+    unittest.main()
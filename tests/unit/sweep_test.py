@@ -0,0 +1,30 @@
+import srrp
+import unittest
+import numpy as np
+
+
+class SweepTest(unittest.TestCase):
+    def test_sweep_matches_solve_many(self):
+        tangentialSpeeds = np.linspace(0, 0.99, 25)
+        statesL = srrp.State(rho=1, vx=0, vt=tangentialSpeeds[:, np.newaxis], pressure=1e3)
+        statesR = srrp.State(rho=1, vx=0, vt=tangentialSpeeds[np.newaxis, :], pressure=1e-2)
+        expected = srrp.Solver().solve_many(statesL, statesR, 5 / 3)
+
+        reports = []
+        result = srrp.sweep(statesL, statesR, 5 / 3, workers=2, chunkSize=100,
+                            progress=lambda solved, total: reports.append((solved, total)))
+
+        self.assertEqual(len(reports), 7)
+        self.assertEqual(reports[-1], (625, 625))
+        np.testing.assert_allclose(result.pressure, expected.pressure, rtol=1e-12)
+        np.testing.assert_allclose(result.waveSpeeds, expected.waveSpeeds, rtol=1e-12)
+        np.testing.assert_allclose(result.states[1].rho, expected.states[1].rho, rtol=1e-12)
+        np.testing.assert_array_equal(result.solutionType, expected.solutionType)
+
+        serial = srrp.sweep(statesL, statesR, 5 / 3, workers=1, chunkSize=100)
+        np.testing.assert_array_equal(result.pressure, serial.pressure)
+        np.testing.assert_array_equal(result.states[2].vt, serial.states[2].vt)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import srrp
+import tempfile
+import unittest
+import numpy as np
+from srrp.WavefanStore import StaleEntryError, computeProblemHash
+
+
+class WavefanStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_roundtrip(self):
+        stateL = srrp.State(rho=0.125, vx=0, vt=0.3, pressure=0.1)
+        stateR = srrp.State(rho=1, vx=-0.5, vt=0, pressure=1)
+        solution = srrp.Solver().solve(stateL, stateR, 5 / 3)
+        xis = np.linspace(-1, 1, 101)
+        path = os.path.join(self.directory.name, 'solution.npz')
+        problemHash = computeProblemHash(stateL, stateR, 5 / 3)
+        srrp.saveWavefan(path, solution, problemHash=problemHash, profiles={'rho': solution.getState(xis).rho})
+
+        loaded, profiles = srrp.loadWavefan(path, problemHash=problemHash)
+        self.assertIsInstance(profiles['rho'], np.memmap)
+        np.testing.assert_array_equal(profiles['rho'], solution.getState(xis).rho)
+        np.testing.assert_array_equal(loaded.regionBoundaries, solution.regionBoundaries)
+        for state, loadedState in zip(solution.states, loaded.states):
+            self.assertEqual(state, loadedState)
+        for wave, loadedWave in zip(solution.waves, loaded.waves):
+            self.assertIs(type(wave), type(loadedWave))
+        np.testing.assert_array_equal(loaded.getState(xis).vt, solution.getState(xis).vt)
+
+        with self.assertRaises(StaleEntryError):
+            srrp.loadWavefan(path, problemHash=computeProblemHash(stateL, stateR, 4 / 3))
+
+    def test_store(self):
+        store = srrp.WavefanStore(self.directory.name)
+        stateL = srrp.State(rho=1, vx=0.5, vt=0, pressure=1)
+        stateR = srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1)
+        self.assertIsNone(store.get(stateL, stateR, 5 / 3))
+
+        solution = srrp.Solver().solve(stateL, stateR, 5 / 3)
+        store.put(stateL, stateR, 5 / 3, solution)
+        loaded, profiles = store.get(stateL, stateR, 5 / 3)
+        self.assertEqual(profiles, {})
+        self.assertEqual(loaded.waves[1].speed, solution.waves[1].speed)
+        self.assertIsNone(store.get(stateL, stateR, 4 / 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
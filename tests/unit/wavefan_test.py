@@ -1,6 +1,7 @@
 import srrp
 import unittest
 import numpy as np
+import scipy.integrate
 
 
 class WavefanTest(unittest.TestCase):
@@ -25,6 +26,7 @@ class WavefanTest(unittest.TestCase):
             self.assertEqual(wavefan.regionStates[i](0), states[i])
 
         states2 = wavefan.getState(xis)
+        self.assertIsInstance(states2, srrp.StateArray)
 
         def checkState(idx):
             self.assertEqual(states[idx].rho, states2.rho[idx])
@@ -37,6 +39,143 @@ class WavefanTest(unittest.TestCase):
         checkState(2)
         checkState(3)
 
+    def test_unsorted_state_access(self):
+        stateL = srrp.State(rho=1, vx=0.5, vt=0, pressure=1)
+        stateR = srrp.State(rho=0.125, vx=0, vt=0.3, pressure=0.1)
+        solution = srrp.Solver().solve(stateL, stateR, 5 / 3)
+        xis = np.linspace(-1, 1, 200)
+        states = solution.getState(xis)
+
+        permutation = np.random.default_rng(0).permutation(len(xis))
+        shuffled = solution.getState(xis[permutation].reshape(20, 10))
+        np.testing.assert_array_equal(states.rho[permutation].reshape(20, 10), shuffled.rho)
+        np.testing.assert_array_equal(states.vt[permutation].reshape(20, 10), shuffled.vt)
+
+    def test_scalar_state_access(self):
+        solution = srrp.Solver().solve(srrp.State(rho=1, vx=0, vt=0, pressure=1),
+                                       srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1), 5 / 3)
+        rarefaction = solution.waves[0]
+        xi = 0.5 * (rarefaction.speedHead + rarefaction.speedTail)
+        state = solution.getState(xi)
+        expected = rarefaction.computeRarefactionState(xi)
+        for var in srrp.StateArray.variables:
+            self.assertEqual(np.shape(getattr(state, var)), ())
+            self.assertAlmostEqual(float(getattr(state, var)), getattr(expected, var), places=10)
+
+    def test_sample_space_time(self):
+        stateL = srrp.State(rho=1, vx=0, vt=0.3, pressure=1)
+        stateR = srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1)
+        solution = srrp.Solver().solve(stateL, stateR, 5 / 3)
+        xs = np.linspace(0, 1, 101)
+        ts = np.linspace(0.05, 0.4, 8)
+        states = solution.sampleSpaceTime(xs, ts, x0=0.5)
+        self.assertEqual(states.shape, (8, 101))
+        for idx, t in enumerate(ts):
+            expected = solution.getState((xs - 0.5) / t)
+            for var in srrp.StateArray.variables:
+                np.testing.assert_allclose(getattr(states, var)[idx], getattr(expected, var), rtol=1e-13)
+
+        chunks = list(solution.iterSpaceTime(xs, ts, x0=0.5, chunkSize=250))
+        self.assertEqual([chunk.stop - chunk.start for chunk, _ in chunks], [2, 2, 2, 2])
+        for chunk, chunkStates in chunks:
+            np.testing.assert_array_equal(chunkStates.rho, states.rho[chunk])
+
+    def test_sample_oblique(self):
+        stateL = srrp.State(rho=1, vx=0.2, vt=0.3, pressure=1)
+        stateR = srrp.State(rho=0.125, vx=0, vt=-0.4, pressure=0.1)
+        solution = srrp.Solver().solve(stateL, stateR, 5 / 3)
+        x, y = np.meshgrid(np.linspace(0, 1, 40), np.linspace(0, 2, 30), indexing='ij', sparse=True)
+        normal = np.array([3, 4]) / 5
+        rho, vx, vy, pressure = solution.sampleOblique((x, y), [3, 4], t=0.5, origin=[0.5, 1], chunkSize=100)
+        expected = solution.getState((normal[0] * (x - 0.5) + normal[1] * (y - 1)) / 0.5)
+        np.testing.assert_allclose(rho, expected.rho, rtol=1e-13)
+        np.testing.assert_allclose(pressure, expected.pressure, rtol=1e-13)
+        np.testing.assert_allclose(vx, expected.vx * normal[0] - expected.vt * normal[1], atol=1e-14)
+        np.testing.assert_allclose(vy, expected.vx * normal[1] + expected.vt * normal[0], atol=1e-14)
+
+        # in 3D with the tangent in the x-y plane, filling given arrays
+        z = np.linspace(-1, 1, 5)[np.newaxis, np.newaxis, :]
+        out = tuple(np.zeros((40, 30, 5)) for _ in range(5))
+        result = solution.sampleOblique((x[..., np.newaxis], y[..., np.newaxis], z), [0, 0, 1], t=0.5,
+                                        tangent=[1, 1, 0], out=out, chunkSize=1000)
+        self.assertIs(result[0], out[0])
+        expected = solution.getState(np.broadcast_to(z / 0.5, (40, 30, 5)))
+        np.testing.assert_allclose(out[1], expected.vt / np.sqrt(2), atol=1e-14)
+        np.testing.assert_allclose(out[2], expected.vt / np.sqrt(2), atol=1e-14)
+        np.testing.assert_allclose(out[3], expected.vx, atol=1e-14)
+        with self.assertRaises(ValueError):
+            solution.sampleOblique((x[..., np.newaxis], y[..., np.newaxis], z), [0, 0, 1], t=0.5)
+
+    def test_piecewise(self):
+        stateL = srrp.State(rho=1, vx=0, vt=0.3, pressure=1)
+        stateR = srrp.State(rho=0.125, vx=0, vt=0, pressure=0.1)
+        solution = srrp.Solver().solve(stateL, stateR, 5 / 3)
+        edges = solution.getEdges()
+        self.assertEqual([edge.kind for edge in edges], ['head', 'tail', 'contact', 'shock'])
+        self.assertEqual([edge.xi for edge in edges], solution.regionBoundaries[1:-1])
+        positions = solution.locate(np.array([0.1, 0.4]), x0=0.5)
+        self.assertEqual(positions.shape, (2, 4))
+        np.testing.assert_allclose(positions[1], 0.5 + 0.4 * np.array([edge.xi for edge in edges]))
+
+        for tolerance in [1e-3, 1e-7]:
+            segments = solution.getPiecewise(tolerance)
+            self.assertEqual([segment.isFan for segment in segments], [False, True, False, False, False])
+            for segment in segments:
+                xis = np.linspace(max(segment.xiLower, -1), min(segment.xiUpper, 1), 2001)[1:-1]
+                exact = solution.getState(xis)
+                if not segment.isFan:
+                    np.testing.assert_array_equal(exact.rho, segment.states.rho[0])
+                    continue
+                self.assertEqual((segment.xis[0], segment.xis[-1]), (segment.xiLower, segment.xiUpper))
+                for var in ['rho', 'pressure']:
+                    interpolated = np.interp(xis, segment.xis, getattr(segment.states, var))
+                    np.testing.assert_allclose(interpolated, getattr(exact, var), rtol=0,
+                                               atol=2 * tolerance * np.max(getattr(exact, var)))
+                for var in ['vx', 'vt']:
+                    interpolated = np.interp(xis, segment.xis, getattr(segment.states, var))
+                    np.testing.assert_allclose(interpolated, getattr(exact, var), rtol=0, atol=2 * tolerance)
+            self.assertLess(len(segments[1].xis), 10 / np.sqrt(tolerance))
+
+    def test_piecewise_vacuum(self):
+        solution = srrp.Solver().solve(srrp.State(rho=1, vx=-0.99, vt=0.1, pressure=0.01),
+                                       srrp.State(rho=1, vx=0.99, vt=0, pressure=0.01), 5 / 3)
+        tolerance = 1e-6
+        fans = [segment for segment in solution.getPiecewise(tolerance) if segment.isFan]
+        self.assertEqual(len(fans), 2)
+        for segment in fans:
+            self.assertTrue(np.all(np.isfinite(segment.states.vt)))
+            xis = np.linspace(segment.xiLower, segment.xiUpper, 2001)
+            exact = solution.getState(xis)
+            for var in srrp.StateArray.variables:
+                scale = np.max(getattr(exact, var)) if var in ['rho', 'pressure'] else 1
+                interpolated = np.interp(xis, segment.xis, getattr(segment.states, var))
+                np.testing.assert_allclose(interpolated, getattr(exact, var), rtol=0, atol=2 * tolerance * scale)
+
+    def test_cell_averages(self):
+        states = [srrp.State(1, 0, 0, 1), srrp.State(2, 0.1, 0, 1), srrp.State(3, 0.2, 0, 2)]
+        waves = [srrp.ContactDiscontinuity(-0.25, 1), srrp.ContactDiscontinuity(0.5, 2)]
+        wavefan = srrp.Wavefan(states, waves)
+        averages = wavefan.getCellAverages([-1.5, -0.5, 0.5, 2.5], t=2, x0=0.5)
+        np.testing.assert_allclose(averages.rho, [1, 1.5, 2.5])
+        np.testing.assert_allclose(averages.vx, [0, 0.05, 0.15])
+        with self.assertRaises(ValueError):
+            wavefan.getCellAverages([-1.5, -0.5, -0.5, 2.5], t=2)
+
+    def test_cell_averages_rarefaction(self):
+        stateL = srrp.State(rho=10, vx=0, vt=0.2, pressure=13.33)
+        stateR = srrp.State(rho=1, vx=0, vt=0, pressure=1e-6)
+        solution = srrp.Solver().solve(stateL, stateR, 5 / 3)
+        fan = solution.waves[0]
+        edges = np.array([-0.8, -0.5, 0.1, 0.2, 0.9])
+        averages = solution.getCellAverages(edges, t=1)
+        for idx in range(len(edges) - 1):
+            lower, upper = edges[idx], edges[idx + 1]
+            points = sorted({lower, upper, *np.clip(solution.regionBoundaries[1:-1], lower, upper)})
+            reference = sum(scipy.integrate.quad(lambda xi: solution.getState([xi]).rho[0], a, b, epsabs=1e-13)[0]
+                            for a, b in zip(points[:-1], points[1:]))
+            self.assertAlmostEqual(averages.rho[idx], reference / (upper - lower), places=10)
+        self.assertLess(fan.speedHead, edges[1])
+
 
 if __name__ == '__main__':
     unittest.main()